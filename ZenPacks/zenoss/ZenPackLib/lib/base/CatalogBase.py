@@ -6,15 +6,72 @@
 # License.zenoss under the directory where your Zenoss product is installed.
 #
 ##############################################################################
+import zlib
+import transaction
+
+from Acquisition import aq_base
 from Products.ZenUtils.Search import makeFieldIndex, makeKeywordIndex
-from ..functions import catalog_search
+from ..functions import (
+    catalog_search, catalog_records, load_objects, merge_results)
 from ..helpers.ZenPackLibLog import DEFAULTLOG
 
+
+def makeBooleanIndex(indexName):
+    """Return BooleanIndex, or FieldIndex if BooleanIndex isn't available."""
+    try:
+        from Products.PluginIndexes.BooleanIndex.BooleanIndex import BooleanIndex
+    except ImportError:
+        return makeFieldIndex(indexName)
+
+    return BooleanIndex(indexName)
+
+
+def makePathPrefixIndex(indexName):
+    """Return PathIndex for path-like values such as "/a/b/c"."""
+    from Products.PluginIndexes.PathIndex.PathIndex import PathIndex
+    return PathIndex(indexName)
+
+
+def global_catalog_shard(device_id, shards):
+    """Return number of the global catalog shard for device_id."""
+    return (zlib.crc32(device_id or '') & 0xffffffff) % shards
+
+
+def get_sort_params(args, kwargs):
+    """Return (sort_on, sort_order, limit) from catalog_search arguments."""
+    if args and isinstance(args[0], dict):
+        query = args[0]
+    elif args:
+        # AdvancedQuery with optional sort specs.
+        sort_specs = args[1] if len(args) > 1 else ()
+        if not sort_specs:
+            return None, 'ascending', None
+        elif isinstance(sort_specs[0], tuple):
+            return sort_specs[0][0], sort_specs[0][1], None
+        else:
+            return sort_specs[0], 'ascending', None
+    else:
+        query = kwargs
+
+    return (
+        query.get('sort_on'),
+        query.get('sort_order', 'ascending'),
+        query.get('sort_limit'))
+
+
 class CatalogBase(object):
     """Abstract base class that implements cataloging properties."""
 
     _device_catalogs = {}
+    _device_catalog_columns = {}
     _global_catalogs = {}
+    _global_catalog_columns = {}
+    _global_catalog_shards = {}
+
+    # Metadata columns in device and global catalogs created from now on.
+    # Existing catalogs aren't given them, as that would mean cataloging
+    # every object again. Readers must handle their absence.
+    _default_catalog_columns = ('title',)
     LOG = DEFAULTLOG
 
     # Searching ##############################################################
@@ -28,70 +85,240 @@ class CatalogBase(object):
 
     @classmethod
     def global_search(cls, dmd, name=None, *args, **kwargs):
-        """Return iterable of brains from named catalog that match."""
-        name = "{}_{}".format(
-            cls.zenpack_name.replace(".", "_"),
-            name or cls.__name__)
+        """Return iterable of brains from named catalog that match.
 
-        return catalog_search(dmd.Devices, name, *args, **kwargs)
+        The shards of a sharded catalog are searched in turn, and their
+        results are merged.
+
+        """
+        name = name or cls.__name__
+        shards = cls._global_catalog_shards.get(name)
+        if not shards:
+            return catalog_search(
+                dmd.Devices,
+                cls.get_global_search_name(name),
+                *args, **kwargs)
+
+        sort_on, sort_order, limit = get_sort_params(args, kwargs)
+        return merge_results(
+            [catalog_search(
+                dmd.Devices,
+                cls.get_global_search_name(name, shard),
+                *args, **kwargs) for shard in xrange(shards)],
+            sort_on=sort_on,
+            sort_order=sort_order,
+            limit=limit)
 
     # Method alias for backwards compatibility.
     class_search = global_search
 
+    def device_records(self, name, *args, **kwargs):
+        """Return list of CatalogRecord from named catalog that match.
+
+        See catalog_records for supported arguments.
+
+        """
+        return catalog_records(self, name, *args, **kwargs)
+
+    @classmethod
+    def global_records(cls, dmd, name=None, *args, **kwargs):
+        """Return list of CatalogRecord from named catalog that match.
+
+        See catalog_records for supported arguments.
+
+        """
+        name = name or cls.__name__
+        shards = cls._global_catalog_shards.get(name)
+        if not shards:
+            return catalog_records(
+                dmd.Devices,
+                cls.get_global_search_name(name),
+                *args, **kwargs)
+
+        # Records need the sort field to be merged.
+        sort_on = kwargs.get('sort_on')
+        fields = kwargs.get('fields')
+        if sort_on and fields is not None and sort_on not in fields:
+            kwargs['fields'] = tuple(fields) + (sort_on,)
+
+        return merge_results(
+            [catalog_records(
+                dmd.Devices,
+                cls.get_global_search_name(name, shard),
+                *args, **kwargs) for shard in xrange(shards)],
+            sort_on=sort_on,
+            sort_order=kwargs.get('sort_order', 'ascending'),
+            limit=kwargs.get('limit'))
+
     # Catalog Lookup #########################################################
 
-    def get_all_catalogs(self):
-        """Return list of device and global catalogs for this object."""
-        catalogs = self.get_device_catalogs()
+    def get_all_catalogs(self, create=True):
+        """Return list of device and global catalogs for this object.
 
-        try:
-            dmd = self.getDmd()
-        except Exception:
-            pass
-        else:
-            catalogs.extend(self.get_global_catalogs(dmd))
+        Catalogs that don't exist yet are created unless create is False,
+        in which case None is returned in their place.
+
+        """
+        catalogs = self.get_device_catalogs(create=create)
+
+        if self._global_catalogs:
+            try:
+                dmd = self.getDmd()
+            except Exception:
+                pass
+            else:
+                catalogs.extend(
+                    self.get_object_global_catalogs(dmd, create=create))
 
         return catalogs
 
-    def get_device_catalogs(self):
+    def get_object_global_catalogs(self, dmd, create=True):
+        """Return list of global catalogs, or shards, for this object."""
+        catalogs = []
+        for name in self._global_catalogs:
+            shards = self._global_catalog_shards.get(name)
+            if shards:
+                shard = global_catalog_shard(self.device_id(), shards)
+            else:
+                shard = None
+
+            catalogs.append(
+                self.get_global_catalog(dmd, name, shard=shard, create=create))
+
+        return catalogs
+
+    def get_device_catalogs(self, create=True):
         """Return list of device catalogs for this object."""
-        return [self.get_device_catalog(x) for x in self._device_catalogs]
+        if not self._device_catalogs:
+            return []
+
+        device = self.device()
+        return [
+            self.get_device_catalog(x, device=device, create=create)
+            for x in self._device_catalogs]
 
     @classmethod
     def get_global_catalogs(cls, dmd):
-        """Return list of global catalogs for this class."""
-        return [cls.get_global_catalog(dmd, x) for x in cls._global_catalogs]
+        """Return list of global catalogs, including all shards, for this class."""
+        catalogs = []
+        for name in cls._global_catalogs:
+            shards = cls._global_catalog_shards.get(name)
+            if shards:
+                catalogs.extend(
+                    cls.get_global_catalog(dmd, name, shard=x)
+                    for x in xrange(shards))
+            else:
+                catalogs.append(cls.get_global_catalog(dmd, name))
+
+        return catalogs
 
-    def get_device_catalog(self, name):
+    def get_device_catalog(self, name, device=None, create=True):
         """Return device catalog by name."""
-        catalog = getattr(
-            self.device(),
-            "{}Search".format(name),
-            None)
+        if device is None:
+            device = self.device()
+            if device is None:
+                return None
 
-        if catalog:
+        catalog = self.get_cached_catalog(device, "{}Search".format(name))
+        if catalog is not None or not create:
             return catalog
         else:
             return self.create_device_catalog(name)
 
     @classmethod
-    def get_global_catalog(cls, dmd, name):
-        """Return global catalog by name."""
-        catalog = getattr(
+    def get_global_catalog(cls, dmd, name, shard=None, create=True):
+        """Return global catalog, or one of its shards, by name."""
+        catalog = cls.get_cached_catalog(
             dmd.Devices,
-            "{}_{}Search".format(cls.zenpack_name.replace('.', '_'), name),
-            None)
+            cls.get_global_catalog_name(name, shard))
 
-        if catalog:
+        if catalog is not None or not create:
             return catalog
         else:
-            return cls.create_global_catalog(dmd, name)
+            return cls.create_global_catalog(dmd, name, shard=shard)
+
+    @classmethod
+    def get_global_search_name(cls, name, shard=None):
+        """Return global catalog's name as used by catalog_search."""
+        names = cls.__dict__.get('_global_search_names')
+        if names is None:
+            names = {}
+            setattr(cls, '_global_search_names', names)
+
+        search_name = names.get((name, shard))
+        if search_name is None:
+            search_name = "{}_{}".format(
+                cls.zenpack_name.replace('.', '_'), name)
+
+            if shard is not None:
+                search_name = "{}_shard{}".format(search_name, shard)
+
+            names[(name, shard)] = search_name
+
+        return search_name
+
+    @classmethod
+    def get_global_catalog_name(cls, name, shard=None):
+        """Return global catalog's id in dmd.Devices."""
+        return "{}Search".format(cls.get_global_search_name(name, shard))
+
+    @staticmethod
+    def get_global_shard_ids(context, catalog_id):
+        """Return ids of shards for catalog_id found in context."""
+        prefix = "{}_shard".format(catalog_id[:-len('Search')])
+        return [
+            x for x in context.objectIds()
+            if x.startswith(prefix) and x.endswith('Search') and
+            x[len(prefix):-len('Search')].isdigit()]
+
+    # Catalog Handle Cache ###################################################
+
+    # Set to False to look up catalogs on every index and unindex.
+    catalog_cache = True
+
+    @staticmethod
+    def get_cached_catalog(context, name):
+        """Return catalog named name on context or None.
+
+        Resolved catalogs are cached in a volatile attribute of context. The
+        cache is per-connection, and is discarded whenever context is
+        invalidated, or a catalog is created or deleted through CatalogBase.
+
+        """
+        if not CatalogBase.catalog_cache:
+            return getattr(context, name, None)
+
+        base = aq_base(context)
+        cache = getattr(base, '_v_zpl_catalogs', None)
+        if cache is None:
+            cache = {}
+            base._v_zpl_catalogs = cache
+
+        catalog = cache.get(name)
+        if catalog is not None:
+            return catalog.__of__(context)
+
+        catalog = getattr(context, name, None)
+        if catalog is not None:
+            cache[name] = aq_base(catalog)
+
+        return catalog
+
+    @staticmethod
+    def clear_catalog_cache(context):
+        """Discard resolved catalogs cached on context."""
+        base = aq_base(context)
+        if getattr(base, '_v_zpl_catalogs', None) is not None:
+            base._v_zpl_catalogs = None
 
     # Catalog Creation and Maintenance #######################################
 
+    # Number of objects cataloged between savepoints or commits.
+    reindex_batch = 1000
+
     def create_device_catalog(self, name):
         indexes = self._device_catalogs.get(name)
-        if indexes:
+        if indexes is not None:
             # Create an id index in all device catalogs.
             expanded_indexes = {'id': 'field'}
             expanded_indexes.update(indexes)
@@ -99,45 +326,101 @@ class CatalogBase(object):
                 context=self.device(),
                 name='{}Search'.format(name),
                 indexes=expanded_indexes,
-                classname='{0}.{1}.{1}'.format(self.zenpack_name, name))
+                classname='{0}.{1}.{1}'.format(self.zenpack_name, name),
+                columns=self._device_catalog_columns.get(name, ()),
+                new_columns=self._default_catalog_columns)
 
     @classmethod
-    def create_global_catalog(cls, dmd, name):
+    def create_global_catalog(cls, dmd, name, shard=None):
+        """Return global catalog, or one of its shards. Create it first if necessary.
+
+        Global catalogs can hold every instance of a class in the system.
+        They're not reindexed here. Added indexes are recorded and
+        reindexed by ZenPack.update_global_catalogs during install, if
+        there are few enough objects, or by "zenpacklib --reindex-catalogs".
+
+        """
         indexes = cls._global_catalogs.get(name)
-        if indexes:
+        if indexes is not None:
             # Create id and device indexes in all global catalogs.
             expanded_indexes = {'id': 'field', 'device_id': 'field'}
             expanded_indexes.update(indexes)
             return cls.create_catalog(
                 context=dmd.Devices,
-                name='{}_{}Search'.format(cls.zenpack_name.replace('.', '_'), name),
+                name=cls.get_global_catalog_name(name, shard),
                 indexes=expanded_indexes,
-                classname='{0}.{1}.{1}'.format(cls.zenpack_name, name))
+                classname='{0}.{1}.{1}'.format(cls.zenpack_name, name),
+                columns=cls._global_catalog_columns.get(name, ()),
+                new_columns=cls._default_catalog_columns,
+                defer_reindex=True)
 
     @staticmethod
-    def create_catalog(context, name, indexes, classname):
-        """Return catalog. Create it first if necessary."""
+    def create_catalog(context, name, indexes, classname, columns=(),
+                       new_columns=(), defer_reindex=False):
+        """Return catalog. Create it first if necessary.
+
+        Existing objects are cataloged for added indexes and columns unless
+        defer_reindex is True. The pending reindex is recorded in the
+        catalog either way. new_columns are only added to a new catalog.
+
+        """
         zcatalog = getattr(context, name, None)
         if not zcatalog:
             from Products.ZCatalog.ZCatalog import manage_addZCatalog
             manage_addZCatalog(context, name, name)
             zcatalog = context._getOb(name)
-
-        if CatalogBase.create_catalog_indexes(zcatalog, indexes):
-            CatalogBase.reindex_catalog(context, zcatalog, classname)
+            CatalogBase.clear_catalog_cache(context)
+            columns = tuple(new_columns) + tuple(columns)
+
+        idxs = CatalogBase.create_catalog_indexes(zcatalog, indexes)
+        if CatalogBase.create_catalog_columns(zcatalog, columns) and not idxs:
+            # Metadata is updated for any reindexed index.
+            idxs = ['id']
+
+        if idxs:
+            if len(idxs) == len(zcatalog.indexes()):
+                idxs = []
+
+            CatalogBase.mark_reindex(zcatalog, classname, idxs)
+            if defer_reindex:
+                CatalogBase.LOG.info(
+                    "%s needs to be reindexed (zenpacklib --reindex-catalogs)",
+                    name)
+            else:
+                CatalogBase.reindex_catalog(context, zcatalog)
 
         return zcatalog
 
     @staticmethod
-    def create_catalog_indexes(zcatalog, indexes):
-        """Return True if zcatalog indexes were changed."""
+    def create_catalog_columns(zcatalog, columns):
+        """Return True if zcatalog metadata columns were added."""
         from Products.ZCatalog.Catalog import CatalogError
 
         changed = False
+        for column in columns:
+            try:
+                zcatalog._catalog.addColumn(column)
+            except CatalogError:
+                # Column already exists.
+                pass
+            else:
+                changed = True
+
+        return changed
+
+    @staticmethod
+    def create_catalog_indexes(zcatalog, indexes):
+        """Return sorted list of index names added to zcatalog."""
+        from Products.ZCatalog.Catalog import CatalogError
+
+        added = []
         catalog = zcatalog._catalog
         index_factories = {
             'field': makeFieldIndex,
             'keyword': makeKeywordIndex,
+            'numeric': makeFieldIndex,
+            'boolean': makeBooleanIndex,
+            'path': makePathPrefixIndex,
             }
 
         for index_name, index_type in indexes.iteritems():
@@ -152,21 +435,262 @@ class CatalogBase(object):
                 # Index already exists.
                 pass
             else:
-                changed = True
+                added.append(index_name)
 
-        return changed
+        return sorted(added)
+
+    @staticmethod
+    def mark_reindex(zcatalog, classname, idxs):
+        """Record that idxs of zcatalog need reindexing for classname.
+
+        An empty idxs means all indexes. Pending indexes are merged with
+        any reindex that is already pending, which then restarts.
+
+        """
+        pending = getattr(aq_base(zcatalog), '_zpl_reindex', None)
+        if pending and pending['classname'] == classname:
+            if idxs and pending['idxs']:
+                idxs = sorted(set(idxs).union(pending['idxs']))
+            else:
+                idxs = []
+
+        zcatalog._zpl_reindex = {
+            'classname': classname,
+            'idxs': list(idxs),
+            'last': None,
+            }
+
+    @staticmethod
+    def get_pending_reindex(zcatalog):
+        """Return pending reindex recorded in zcatalog, or None."""
+        return getattr(aq_base(zcatalog), '_zpl_reindex', None)
 
     @classmethod
-    def reindex_catalog(cls, context, zcatalog, classname):
+    def reindex_catalog(cls, context, zcatalog, classname=None, idxs=None,
+                        batch=None, commit=False):
+        """Catalog objects within context for zcatalog's pending reindex.
+
+        A new reindex of idxs is recorded first if classname is given.
+        See reindex_catalogs for batch and commit.
+
+        Returns the number of objects cataloged.
+
+        """
+        if classname:
+            cls.mark_reindex(zcatalog, classname, idxs or [])
+
+        return cls.reindex_catalogs(
+            context, [zcatalog], batch=batch, commit=commit)
+
+    @classmethod
+    def reindex_catalogs(cls, context, zcatalogs, select=None, batch=None,
+                         commit=False, limit=None):
+        """Catalog objects within context for zcatalogs' pending reindexes.
+
+        zcatalogs must all be catalogs for the same class. Each object is
+        loaded once, and cataloged in zcatalogs[select(obj)], or in each of
+        zcatalogs if select is None. Only pending indexes are updated.
+
+        A savepoint is made every batch objects, or a commit if commit is
+        True. Progress is recorded in each catalog so an interrupted and
+        committed reindex resumes after the last object of its last batch.
+
+        If limit is given and more than limit objects need to be cataloged,
+        nothing is done, the reindex is left pending, and None is returned.
+
+        Returns the number of objects loaded.
+
+        """
         from Products.Zuul.interfaces import ICatalogTool
 
-        for result in ICatalogTool(context).search(types=(classname,)):
-            try:
-                obj = result.getObject()
-            except Exception as e:
-                cls.LOG.warning("failed to index non-existent object: %s", e)
+        pending = [cls.get_pending_reindex(x) for x in zcatalogs]
+        active = [x for x in pending if x]
+        if not active:
+            return 0
+
+        batch = batch or cls.reindex_batch
+        lasts = [x['last'] for x in active]
+        last = None if None in lasts else min(lasts)
+
+        results = ICatalogTool(context).search(types=(active[0]['classname'],))
+        paths = sorted(x.getPath() for x in results)
+        if last:
+            paths = [x for x in paths if x > last]
+
+        names = ", ".join(x.id for x, p in zip(zcatalogs, pending) if p)
+        total = len(paths)
+        if limit is not None and total > limit:
+            cls.LOG.warning(
+                "Not reindexing %s objects in %s now. Run "
+                "\"zenpacklib --reindex-catalogs %s\" to reindex them.",
+                total, names, cls.zenpack_name)
+            return None
+
+        if total > batch:
+            cls.LOG.info("Reindexing %s objects in %s", total, names)
+
+        count = 0
+        for path, obj in load_objects(context, paths, batch=batch):
+            if select is None:
+                targets = xrange(len(zcatalogs))
             else:
-                zcatalog.catalog_object(obj, obj.getPrimaryId())
+                targets = (select(obj),)
+
+            for i in targets:
+                if not pending[i]:
+                    continue
+
+                if pending[i]['last'] and path <= pending[i]['last']:
+                    continue
+
+                zcatalogs[i].catalog_object(
+                    obj, obj.getPrimaryId(), idxs=pending[i]['idxs'])
+
+            count += 1
+            if count % batch == 0 and count < total:
+                for zcatalog, p in zip(zcatalogs, pending):
+                    if p:
+                        zcatalog._zpl_reindex = dict(p, last=path)
+
+                if commit:
+                    transaction.commit()
+                else:
+                    transaction.savepoint(optimistic=True)
+
+                cls.LOG.info(
+                    "Reindexed %s of %s objects in %s", count, total, names)
+
+        for zcatalog, p in zip(zcatalogs, pending):
+            if p:
+                del zcatalog._zpl_reindex
+
+        if commit:
+            transaction.commit()
+
+        return count
+
+    @classmethod
+    def update_global_catalog(cls, dmd, name, batch=None, commit=False,
+                              limit=None):
+        """Create and reindex global catalog, or its shards, by name.
+
+        Also migrates between sharded and unsharded catalogs when the
+        class's global_catalog_shards has changed. Objects are cataloged
+        in the new catalogs first, then the old catalogs are deleted. See
+        reindex_catalogs for batch, commit and limit. Old catalogs are kept
+        if the reindex is left pending.
+
+        Returns the number of objects loaded, or None if the reindex was
+        left pending.
+
+        """
+        shards = cls._global_catalog_shards.get(name)
+        if shards:
+            zcatalogs = [
+                cls.create_global_catalog(dmd, name, shard=x)
+                for x in xrange(shards)]
+
+            def select(obj):
+                return global_catalog_shard(obj.device_id(), shards)
+        else:
+            zcatalogs = [cls.create_global_catalog(dmd, name)]
+            select = None
+
+        if any(x is None for x in zcatalogs):
+            return 0
+
+        count = cls.reindex_catalogs(
+            dmd.Devices, zcatalogs, select=select, batch=batch, commit=commit,
+            limit=limit)
+
+        if count is None:
+            return None
+
+        catalog_id = cls.get_global_catalog_name(name)
+        existing_ids = set(dmd.Devices.objectIds())
+        old_ids = set(
+            [catalog_id] + cls.get_global_shard_ids(dmd.Devices, catalog_id))
+        old_ids = sorted(
+            old_ids.intersection(existing_ids).difference(
+                x.id for x in zcatalogs))
+
+        if old_ids:
+            for old_id in old_ids:
+                cls.LOG.info("Removing catalog %s", old_id)
+                dmd.Devices._delObject(old_id)
+
+            cls.clear_catalog_cache(dmd.Devices)
+            if commit:
+                transaction.commit()
+
+        return count
+
+    @classmethod
+    def plan_global_catalog(cls, dmd, name):
+        """Return what update_global_catalog would do, without doing it.
+
+        Returns a dict of catalog ids to create and delete, indexes to
+        reindex ("all" for every index), and the number of objects that
+        would be loaded to reindex them.
+
+        """
+        from Products.Zuul.interfaces import ICatalogTool
+
+        indexes = cls._global_catalogs.get(name)
+        if indexes is None:
+            return None
+
+        shards = cls._global_catalog_shards.get(name)
+        if shards:
+            catalog_ids = [
+                cls.get_global_catalog_name(name, x) for x in xrange(shards)]
+        else:
+            catalog_ids = [cls.get_global_catalog_name(name)]
+
+        index_names = set(['id', 'device_id']).union(indexes)
+        columns = set(cls._global_catalog_columns.get(name, ()))
+
+        create = []
+        reindex = set()
+        reindex_all = False
+        for catalog_id in catalog_ids:
+            zcatalog = getattr(aq_base(dmd.Devices), catalog_id, None)
+            if zcatalog is None:
+                create.append(catalog_id)
+                reindex_all = True
+                continue
+
+            pending = cls.get_pending_reindex(zcatalog)
+            if pending:
+                if pending['idxs']:
+                    reindex.update(pending['idxs'])
+                else:
+                    reindex_all = True
+
+            reindex.update(
+                index_names.difference(zcatalog._catalog.indexes.keys()))
+
+            if columns.difference(zcatalog._catalog.names):
+                reindex.add('id')
+
+        catalog_id = cls.get_global_catalog_name(name)
+        old_ids = set(
+            [catalog_id] + cls.get_global_shard_ids(dmd.Devices, catalog_id))
+        delete = sorted(
+            old_ids.intersection(dmd.Devices.objectIds()).difference(
+                catalog_ids))
+
+        objects = 0
+        if reindex_all or reindex:
+            objects = ICatalogTool(dmd.Devices).count(
+                types=('{0}.{1}.{1}'.format(cls.zenpack_name, name),))
+
+        return {
+            'create': create,
+            'delete': delete,
+            'reindex': 'all' if reindex_all else sorted(reindex),
+            'objects': objects,
+            }
 
     # Indexing and Unindexing ################################################
 
@@ -177,8 +701,12 @@ class CatalogBase(object):
                 catalog.catalog_object(self, self.getPrimaryId())
 
     def unindex_object(self):
-        """Unindex from all configured catalogs."""
-        for catalog in self.get_all_catalogs():
+        """Unindex from all configured catalogs.
+
+        Catalogs that don't exist are not created just to unindex from.
+
+        """
+        for catalog in self.get_all_catalogs(create=False):
             if catalog:
                 catalog.uncatalog_object(self.getPrimaryId())
 
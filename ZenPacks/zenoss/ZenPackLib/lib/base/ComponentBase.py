@@ -8,6 +8,7 @@
 ##############################################################################
 import os
 import json
+from Acquisition import aq_base
 from Products.AdvancedQuery import Eq, Or
 from Products.Zuul.decorators import memoize
 from Products.Zuul.catalog.events import IndexingEvent
@@ -21,7 +22,20 @@ from Products.ZenRelations.Exceptions import ZenSchemaError
 
 from .ModelBase import ModelBase
 from ..utils import FACET_BLACKLIST
-from ..functions import catalog_search
+from ..functions import catalog_records, load_objects
+from ..prefetch import RequestMemo
+
+
+def update_remote_relationship_count(obj, relationship):
+    """Update obj's counter for the remote side of relationship.
+
+    Return True if the counter was changed.
+
+    """
+    update = getattr(obj, 'update_relationship_counts', None)
+    if update:
+        return update([relationship.remoteName()])
+    return False
 
 
 class ComponentBase(ModelBase):
@@ -124,6 +138,9 @@ class ComponentBase(ModelBase):
         if (old_obj and old_obj.id == id_) or (not old_obj and not id_):
             return
 
+        # Memoized Infos of either side may now be wrong.
+        RequestMemo.invalidate()
+
         # Remove current object from relationship.
         if old_obj:
             relationship.removeRelation()
@@ -131,18 +148,20 @@ class ComponentBase(ModelBase):
             # Index old object. It might have a custom path reporter.
             notify(IndexingEvent(old_obj.primaryAq(), 'path', False))
 
+            if update_remote_relationship_count(old_obj, relationship):
+                old_obj.index_object()
+
         # If there is no new ID to add, we're done.
         if id_ is None:
             return
 
         # Find and add new object to relationship.
-        for result in catalog_search(self.device(), 'ComponentBase', id=id_):
-            try:
-                new_obj = result.getObject()
-            except Exception as e:
-                self.LOG.error("Trying to add relation to non-existent object {}".format(e))
-            else:
-                relationship.addRelation(new_obj)
+        device = self.device()
+        records = catalog_records(device, 'ComponentBase', id=id_, fields=())
+
+        for _, new_obj in load_objects(device, records):
+            relationship.addRelation(new_obj)
+            update_remote_relationship_count(new_obj, relationship)
 
             # Index remote object. It might have a custom path reporter.
             notify(IndexingEvent(new_obj.primaryAq(), 'path', False))
@@ -180,17 +199,18 @@ class ComponentBase(ModelBase):
         new_ids = set(ids)
         current_ids = set(o.id for o in relationship.objectValuesGen())
         changed_ids = new_ids.symmetric_difference(current_ids)
+        if changed_ids:
+            # Memoized Infos of either side may now be wrong.
+            RequestMemo.invalidate()
 
         query = Or(*[Eq('id', x) for x in changed_ids])
 
+        device = self.device()
+        records = catalog_records(device, 'ComponentBase', query, fields=())
+
         obj_map = {}
-        for result in catalog_search(self.device(), 'ComponentBase', query):
-            try:
-                component = result.getObject()
-            except Exception as e:
-                self.LOG.error("Trying to access non-existent object {}".format(e))
-            else:
-                obj_map[result.id] = component
+        for _, component in load_objects(device, records):
+            obj_map[component.id] = component
 
         for id_ in new_ids.symmetric_difference(current_ids):
             obj = obj_map.get(id_)
@@ -204,6 +224,7 @@ class ComponentBase(ModelBase):
             if id_ in new_ids:
                 self.LOG.debug("Adding {} to {}".format(obj, relationship))
                 relationship.addRelation(obj)
+                update_remote_relationship_count(obj, relationship)
 
                 # Index remote object. It might have a custom path reporter.
                 notify(IndexingEvent(obj, 'path', False))
@@ -215,12 +236,112 @@ class ComponentBase(ModelBase):
                 if not isinstance(relationship, ToManyContRelationship):
                     # Index remote object. It might have a custom path reporter.
                     notify(IndexingEvent(obj, 'path', False))
+                    update_remote_relationship_count(obj, relationship)
 
             # For componentSearch. Would be nice if we could target
             # idxs=['getAllPaths'], but there's a chance that it won't exist
             # yet.
             obj.index_object()
 
+        if changed_ids:
+            self.update_relationship_counts([relationship.id])
+
+    # Relationship Counters ##################################################
+
+    def get_relationship_count(self, relname):
+        """Return maintained number of objects in relname or None.
+
+        None is returned when no counter is maintained for relname.
+
+        """
+        counts = getattr(aq_base(self), '_relationship_counts', None)
+        if counts:
+            return counts.get(relname)
+
+    def set_relationship_count(self, relname, count):
+        """Set maintained number of objects in relname.
+
+        Return True if the counter was changed.
+
+        """
+        counts = dict(getattr(aq_base(self), '_relationship_counts', None) or {})
+        if counts.get(relname) == count:
+            return False
+
+        counts[relname] = count
+        self._relationship_counts = counts
+        return True
+
+    def update_relationship_counts(self, relnames=None):
+        """Recompute counters for relnames, or all counted relationships.
+
+        Return True if any counter was changed.
+
+        """
+        changed = False
+        counted_relnames = self.get_counted_relnames()
+
+        for relname in relnames or counted_relnames:
+            if relname not in counted_relnames:
+                continue
+
+            relationship = getattr(self, relname, None)
+            if relationship is None:
+                continue
+
+            if self.set_relationship_count(relname, relationship.countObjects()):
+                changed = True
+
+        return changed
+
+    def relationship_counts(self):
+        """Return dictionary of maintained relationship counters.
+
+        Counters are only read. They're recomputed by ZPL relationship
+        setters, deletion and zenpacklib --repair-counts.
+
+        """
+        return dict(getattr(aq_base(self), '_relationship_counts', None) or {})
+
+    @memoize
+    def get_counted_relnames(self):
+        """Return non-containing ToMany relationship names with counters."""
+        return [
+            relname for relname, relschema in self._relations
+            if isinstance(relschema, ToMany) and
+            not isinstance(relschema, ToManyCont)]
+
+    def manage_beforeDelete(self, item, container):
+        """Decrement related objects' counters before deletion."""
+        # Same test used by RelationshipManager to detect deletion rather
+        # than a copy, move or rename.
+        if getattr(item, "_operation", -1) < 1:
+            for relname, relschema in self._relations:
+                if isinstance(relschema, ToManyCont) or \
+                        not issubclass(relschema.remoteType, ToMany) or \
+                        issubclass(relschema.remoteType, ToManyCont):
+                    continue
+
+                relationship = getattr(self, relname, None)
+                if relationship is None:
+                    continue
+
+                remote_objs = relationship()
+                if isinstance(relationship, ToOneRelationship):
+                    remote_objs = [remote_objs] if remote_objs else []
+
+                for remote_obj in remote_objs:
+                    get_count = getattr(remote_obj, 'get_relationship_count', None)
+                    if not get_count:
+                        continue
+
+                    count = get_count(relschema.remoteName)
+                    if count:
+                        remote_obj.set_relationship_count(
+                            relschema.remoteName, count - 1)
+
+        super(ComponentBase, self).manage_beforeDelete(item, container)
+
     @property
     def containing_relname(self):
         """Return name of containing relationship."""
@@ -330,6 +451,61 @@ class ComponentBase(ModelBase):
                             yield facet
                             seen.add((self.id, relname, facet.id))
 
+    def walk_facets(self):
+        """Generate (relnames, obj, included) for every facet path.
+
+        This is the traversal of get_facets(recurse_all=True), except that
+        each related object is also marked with whether get_facets() would
+        include it: directly-related objects always, and others if they
+        are reached through extra_paths. relnames is a tuple of the
+        relationship names followed from this component to obj.
+
+        """
+        seen = set()
+
+        def walk(obj, relnames, streams, included, depth):
+            if depth > (200 if included else 15):
+                return
+
+            for relname in obj.get_faceting_relnames():
+                rel = getattr(obj, relname, None)
+                if not rel or not callable(rel):
+                    continue
+
+                relobjs = rel()
+                if not relobjs:
+                    continue
+
+                if isinstance(rel, ToOneRelationship):
+                    # This is really a single object.
+                    relobjs = [relobjs]
+
+                if included:
+                    # get_facets matches extra_paths streams against relname.
+                    next_streams = [
+                        x for x in streams
+                        if any(pattern.match(relname) for pattern in x)]
+                else:
+                    next_streams = []
+
+                for relobj in relobjs:
+                    key = (obj.id, relname, relobj.id, included)
+                    if key in seen:
+                        # avoid a cycle
+                        continue
+
+                    seen.add(key)
+                    yield relnames + (relname,), relobj, included
+
+                    if hasattr(relobj, 'get_faceting_relnames'):
+                        for facet_path in walk(
+                                relobj, relnames + (relname,), next_streams,
+                                bool(next_streams), depth + 1):
+                            yield facet_path
+
+        return walk(
+            self, (), getattr(self, '_v_path_pattern_streams', []), True, 0)
+
     def rrdPath(self):
         """Return filesystem path for RRD files for this component.
 
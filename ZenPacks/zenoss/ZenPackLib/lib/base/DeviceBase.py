@@ -72,6 +72,10 @@ class DeviceBase(ModelBase):
         Support user-defined *-replacement and *-addition monitoring
         templates that can replace or augment the standard templates.
 
+        This method only resolves templates. It never writes to the
+        device. Use update_template_bindings to persist the resulting
+        bindings to zDeviceTemplates.
+
         """
         templates = []
 
@@ -87,9 +91,6 @@ class DeviceBase(ModelBase):
 
             if replacement and replacement not in templates:
                 templates.append(replacement)
-                self.setZenProperty(
-                    'zDeviceTemplates',
-                    self.zDeviceTemplates + [replacement.titleOrId()])
             else:
                 templates.append(template)
 
@@ -98,8 +99,34 @@ class DeviceBase(ModelBase):
 
             if addition and addition not in templates:
                 templates.append(addition)
-                self.setZenProperty(
-                    'zDeviceTemplates',
-                    self.zDeviceTemplates + [addition.titleOrId()])
 
         return templates
+
+    def get_template_bindings(self):
+        """Return zDeviceTemplates value including resolved templates.
+
+        Any *-replacement or *-addition template resolved by
+        getRRDTemplates is appended to the currently bound template
+        names.
+
+        """
+        bindings = list(self.zDeviceTemplates)
+        for template in self.getRRDTemplates():
+            template_name = template.titleOrId()
+            if template_name not in bindings:
+                bindings.append(template_name)
+
+        return bindings
+
+    def update_template_bindings(self):
+        """Bind resolved templates to this device.
+
+        Return True if zDeviceTemplates was changed.
+
+        """
+        bindings = self.get_template_bindings()
+        if bindings == list(self.zDeviceTemplates):
+            return False
+
+        self.setZenProperty('zDeviceTemplates', bindings)
+        return True
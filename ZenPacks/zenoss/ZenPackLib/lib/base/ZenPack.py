@@ -6,15 +6,21 @@
 # License.zenoss under the directory where your Zenoss product is installed.
 #
 ##############################################################################
+import collections
 import os
+import importlib
 from lxml import etree
 import yaml
 import difflib
 import time
-import sys
+import transaction
+from xml.sax.saxutils import quoteattr
 
 from Acquisition import aq_base
 from Products.ZenModel.ZenPack import ZenPack as ZenPackBase
+from .CatalogBase import CatalogBase
+from .DeviceBase import DeviceBase
+from ..functions import load_objects
 from ..helpers.Dumper import Dumper
 from ..helpers.ZenPackLibLog import ZenPackLibLog, new_log
 from Products.ZenEvents import ZenEventClasses
@@ -35,6 +41,17 @@ for x in dir(ZenEventClasses):
         RESERVED_CLASSES.add(y)
 
 
+def get_device_path(path):
+    """Return path of the device containing component path, or None."""
+    parts = path.split('/')
+    try:
+        index = parts.index('devices')
+    except ValueError:
+        return None
+
+    return '/'.join(parts[:index + 2])
+
+
 class ZenPack(ZenPackBase):
     """
     ZenPack loader that handles custom installation and removal tasks.
@@ -44,19 +61,189 @@ class ZenPack(ZenPackBase):
     """
     LOG = LOG
 
+    # Update changed monitoring templates in place, changing only the
+    # thresholds, datasources, datapoints and graphs that differ. Set to
+    # False to replace the whole template instead.
+    RECONCILE_TEMPLATES = True
+
     def __init__(self, *args, **kwargs):
         super(ZenPack, self).__init__(*args, **kwargs)
 
-    def _buildDeviceRelations(self, app, batch=10):
-        count = 0
-        for d in app.zport.dmd.Devices.getSubDevicesGen():
-            d.buildRelations()
-            count += 1
-            if count % batch == 0:
-                sys.stderr.write('.')
-        if count > batch:
-            sys.stderr.write('\n')
-        self.LOG.info('Finished adding {} relationships to existing devices'.format(self.id))
+    def _buildDeviceRelations(self, app, batch=1000, commit=False,
+                              checkpoint=None):
+        """Build relationships on devices of classes in NEW_RELATIONS.
+
+        See devicerelations.build_relations for batch, commit and
+        checkpoint. zenpacklib --build-relations does the same in
+        parallel worker processes.
+
+        """
+        from ..devicerelations import build_relations, get_device_paths
+
+        start = time.time()
+        dmd = app.zport.dmd
+        count = build_relations(
+            dmd, get_device_paths(dmd, self.NEW_RELATIONS),
+            batch=batch, commit=commit, checkpoint=checkpoint, log=self.LOG)
+
+        self.LOG.info(
+            'Finished building {} relationships on {} devices ({:.1f}s)'.format(
+                self.id, count, time.time() - start))
+
+    def bind_device_templates(self, app, batch=100):
+        """Persist *-replacement and *-addition template bindings.
+
+        DeviceBase.getRRDTemplates only resolves templates. This applies
+        the resolved bindings to zDeviceTemplates for devices in this
+        ZenPack's device classes, using a savepoint every batch devices.
+
+        """
+        seen = set()
+        changed = 0
+        for dcname in sorted(self.device_classes):
+            deviceclass = self.device_classes[dcname].get_organizer(app.zport.dmd)
+            if not deviceclass:
+                continue
+
+            for device in deviceclass.getSubDevicesGen():
+                if device.id in seen or not isinstance(device, DeviceBase):
+                    continue
+                seen.add(device.id)
+
+                if device.update_template_bindings():
+                    changed += 1
+                    if changed % batch == 0:
+                        transaction.savepoint(optimistic=True)
+
+        if changed:
+            self.LOG.info('Updated template bindings on {} devices'.format(changed))
+
+    def remove_components(self, app, batch=100, commit=False):
+        """Remove this ZenPack's components, one device at a time.
+
+        Relationships this ZenPack added to a device are deleted whole,
+        taking every component they contain with them. Device catalogs
+        holding only components being removed are deleted rather than
+        unindexed from. Any other components, such as those contained by
+        components of other ZenPacks, are deleted individually.
+
+        A savepoint is made, or the transaction committed if commit is
+        True, every batch devices. Removed components no longer match
+        the search used to find them, so a committed removal that was
+        interrupted continues where it left off when run again.
+
+        Returns the number of components removed.
+
+        """
+        from Products.Zuul.interfaces import ICatalogTool
+        from Products.ZenUtils.Utils import importClass
+
+        dmd = app.zport.dmd
+
+        # {device path or None: set([component path])}
+        device_paths = collections.defaultdict(set)
+        for brain in ICatalogTool(dmd).search(types=self.NEW_COMPONENT_TYPES):
+            path = brain.getPath()
+            device_paths[get_device_path(path)].add(path)
+
+        if not device_paths:
+            return 0
+
+        relations = [
+            (importClass(x), relnames)
+            for x, relnames in self.NEW_RELATIONS.iteritems()]
+
+        catalog_names = set()
+        for component_type in self.NEW_COMPONENT_TYPES:
+            cls = importClass(*component_type.rsplit('.', 1))
+            catalog_names.update(
+                '{}Search'.format(x)
+                for x in getattr(cls, '_device_catalogs', ()))
+
+        total = len(device_paths)
+        removed = 0
+        start = time.time()
+        for count, device_path in enumerate(sorted(device_paths), 1):
+            paths = device_paths[device_path]
+            prefixes = ()
+            if device_path:
+                device = dmd.unrestrictedTraverse(device_path, None)
+                if device is not None:
+                    prefixes = self.remove_device_relations(
+                        device, relations, catalog_names, paths)
+
+            # Delete what's left, skipping components within others.
+            remaining = []
+            for path in sorted(paths):
+                if path.startswith(prefixes):
+                    continue
+                remaining.append(path)
+                prefixes += ('{}/'.format(path),)
+
+            for path, component in load_objects(dmd, remaining):
+                component.getPrimaryParent()._delObject(component.id)
+
+            removed += len(paths)
+            if count % batch == 0 or count == total:
+                if commit:
+                    transaction.commit()
+                else:
+                    transaction.savepoint(optimistic=True)
+
+                self.LOG.info(
+                    'Removed {} {} components from {} of {} devices '
+                    '({:.1f}s)'.format(
+                        removed, self.id, count, total, time.time() - start))
+
+        return removed
+
+    def remove_device_relations(self, device, relations, catalog_names, paths):
+        """Delete this ZenPack's relationships and catalogs from device.
+
+        relations is a list of (device class, relnames) and paths is the
+        set of paths of components being removed from device. Returns a
+        tuple of path prefixes for components removed with relationships.
+
+        """
+        for name in catalog_names:
+            zcatalog = getattr(aq_base(device), name, None)
+            if zcatalog is None:
+                continue
+
+            if paths.issuperset(zcatalog._catalog.uids.keys()):
+                device._delObject(name)
+
+        CatalogBase.clear_catalog_cache(device)
+
+        prefixes = []
+        for cls, relnames in relations:
+            if not isinstance(device, cls):
+                continue
+
+            for relname in relnames:
+                if getattr(aq_base(device), relname, None) is None:
+                    continue
+
+                device._delObject(relname)
+                prefixes.append('{}/{}/'.format(device.getPrimaryId(), relname))
+
+        return tuple(prefixes)
+
+    def update_global_catalogs(self, app, batch=None, commit=False,
+                               limit=None):
+        """Create global catalogs and reindex any added indexes.
+
+        Only indexes added since the catalog was last updated are
+        reindexed. Catalogs are also migrated to or from shards. See
+        CatalogBase.update_global_catalog for batch, commit and limit.
+
+        """
+        dmd = app.zport.dmd
+        for name in getattr(self, 'GLOBAL_CATALOG_CLASSES', ()):
+            module = importlib.import_module('{}.{}'.format(self.id, name))
+            cls = getattr(module, name)
+            cls.update_global_catalog(
+                dmd, name, batch=batch, commit=commit, limit=limit)
 
     def install(self, app):
         self.createZProperties(app)
@@ -68,6 +255,11 @@ class ZenPack(ZenPackBase):
             self.LOG.info('Adding {} relationships to existing devices'.format(self.id))
             self._buildDeviceRelations(app)
 
+        # Create global catalogs and index existing components. Install
+        # runs in one transaction, so larger reindexes are left for
+        # "zenpacklib --reindex-catalogs" to do in committed batches.
+        self.update_global_catalogs(app, limit=CatalogBase.reindex_batch)
+
         # load monitoring templates
         for dcname, dcspec in self.device_classes.iteritems():
             dcspecparam = self._v_specparams.device_classes.get(dcname)
@@ -77,6 +269,9 @@ class ZenPack(ZenPackBase):
                 mtspecparam = dcspecparam.templates.get(mtname)
                 self.update_object(app, deviceclass, 'rrdTemplates', mtname, mtspec, mtspecparam)
 
+        # bind any user-defined replacement or addition templates
+        self.bind_device_templates(app)
+
         # Load event classes
         for ecname, ecspec in self.event_classes.iteritems():
             ecspec.instantiate(app.zport.dmd)
@@ -85,11 +280,130 @@ class ZenPack(ZenPackBase):
         for psname, psspec in self.process_class_organizers.iteritems():
             psspec.create(app.zport.dmd)
 
+    # Rough seconds per operation used by plan_install to estimate run time.
+    PLAN_SECONDS = {
+        'zproperties': 0.01,
+        'device_classes': 0.5,
+        'templates': 1.0,
+        'event_classes': 0.2,
+        'event_class_mappings': 0.05,
+        'process_class_organizers': 0.2,
+        'process_classes': 0.05,
+        'relations': 0.01,
+        'catalogs': 0.002,
+        }
+
+    def plan_install(self, app):
+        """Return what install would do, without doing it.
+
+        The returned dict can be serialized as JSON. It has the action
+        for each zProperty, device class, template, event class, event
+        class mapping, process class organizer and process class, the
+        number of devices whose relationships would be built, the
+        global catalog changes, and estimated seconds for each section.
+
+        Templates are compared with their spec in memory, as during
+        install. Anything else changed while planning is rolled back to a
+        savepoint.
+        """
+        dmd = app.zport.dmd
+        savepoint = transaction.savepoint()
+        try:
+            plan = collections.OrderedDict()
+            plan['zenpack'] = self.id
+
+            plan['zproperties'] = {
+                x[0]: 'exists' if dmd.Devices.hasProperty(x[0]) else 'create'
+                for x in self.packZProperties}
+
+            plan['device_classes'] = {}
+            plan['templates'] = {}
+            for dcname, dcspec in self.device_classes.iteritems():
+                deviceclass = dcspec.get_organizer(dmd)
+                if deviceclass:
+                    plan['device_classes'][dcname] = 'exists'
+                elif dcspec.create:
+                    plan['device_classes'][dcname] = 'create'
+                else:
+                    plan['device_classes'][dcname] = 'missing'
+
+                dcspecparam = self._v_specparams.device_classes.get(dcname)
+                for mtname, mtspec in dcspec.templates.iteritems():
+                    key = '{}/{}'.format(dcname, mtname)
+                    candidate = None
+                    if deviceclass:
+                        candidate = (
+                            self.get_object(deviceclass, 'rrdTemplates', '{}-backup'.format(mtname)) or
+                            self.get_object(deviceclass, 'rrdTemplates', mtname))
+
+                    if not candidate:
+                        plan['templates'][key] = 'create'
+                    elif self.object_changed(app, candidate, mtspec, dcspecparam.templates.get(mtname)):
+                        plan['templates'][key] = 'reconcile' if self.RECONCILE_TEMPLATES else 'replace'
+                    else:
+                        plan['templates'][key] = 'unchanged'
+
+            plan['event_classes'] = {}
+            plan['event_class_mappings'] = {}
+            for ecname, ecspec in self.event_classes.iteritems():
+                eventclass = ecspec.get_organizer(dmd)
+                plan['event_classes'][ecname] = 'exists' if eventclass else 'create'
+                for mapping_id, mapping_spec in ecspec.mappings.iteritems():
+                    key = '{}/{}'.format(ecname, mapping_id)
+                    if eventclass:
+                        plan['event_class_mappings'][key] = mapping_spec.plan(eventclass)
+                    else:
+                        plan['event_class_mappings'][key] = 'create'
+
+            plan['process_class_organizers'] = {}
+            plan['process_classes'] = {}
+            for psname, psspec in self.process_class_organizers.iteritems():
+                porg = psspec.get_organizer(dmd)
+                plan['process_class_organizers'][psname] = 'exists' if porg else 'create'
+                for pcname, pcspec in psspec.process_classes.iteritems():
+                    key = '{}/{}'.format(psname, pcname)
+                    if porg:
+                        plan['process_classes'][key] = pcspec.plan(porg)
+                    else:
+                        plan['process_classes'][key] = 'create'
+
+            plan['relations'] = {'devices': 0}
+            if self.NEW_COMPONENT_TYPES:
+                from ..devicerelations import get_device_paths
+                plan['relations']['devices'] = len(
+                    get_device_paths(dmd, self.NEW_RELATIONS))
+
+            plan['catalogs'] = {}
+            for name in getattr(self, 'GLOBAL_CATALOG_CLASSES', ()):
+                module = importlib.import_module('{}.{}'.format(self.id, name))
+                catalog_plan = getattr(module, name).plan_global_catalog(dmd, name)
+                if catalog_plan:
+                    plan['catalogs'][name] = catalog_plan
+        finally:
+            savepoint.rollback()
+
+        # Objects that are left alone aren't counted.
+        estimate = collections.OrderedDict()
+        for section, seconds in sorted(self.PLAN_SECONDS.iteritems()):
+            if section == 'relations':
+                count = plan['relations']['devices']
+            elif section == 'catalogs':
+                count = sum(x['objects'] for x in plan['catalogs'].itervalues())
+            else:
+                count = len([
+                    x for x in plan[section].itervalues()
+                    if x not in ('exists', 'missing', 'unchanged')])
+            estimate[section] = round(count * seconds, 1)
+
+        estimate['total'] = round(sum(estimate.values()), 1)
+        plan['estimated_seconds'] = estimate
+
+        return plan
+
     def remove(self, app, leaveObjects=False):
         if self._v_specparams is None:
             return
 
-        from Products.Zuul.interfaces import ICatalogTool
         if leaveObjects:
             # Check whether the ZPL-managed monitoring templates have
             # been modified by the user.  If so, those changes will
@@ -129,17 +443,15 @@ class ZenPack(ZenPackBase):
                     self.LOG.info('Removing Catalog {}'.format(catalog))
                     dc._delObject(catalog)
 
+                for shard in CatalogBase.get_global_shard_ids(dc, catalog):
+                    self.LOG.info('Removing Catalog {}'.format(shard))
+                    dc._delObject(shard)
+
+            CatalogBase.clear_catalog_cache(dc)
+
             if self.NEW_COMPONENT_TYPES:
                 self.LOG.info('Removing {} components'.format(self.id))
-                cat = ICatalogTool(app.zport.dmd)
-                for brain in cat.search(types=self.NEW_COMPONENT_TYPES):
-                    try:
-                        component = brain.getObject()
-                    except Exception as e:
-                        self.LOG.error("Trying to remove non-existent object {}".format(e))
-                        continue
-                    else:
-                        component.getPrimaryParent()._delObject(component.id)
+                self.remove_components(app, commit=True)
 
                 # Remove our Device relations additions.
                 from Products.ZenUtils.Utils import importClass
@@ -149,7 +461,7 @@ class ZenPack(ZenPackBase):
                                                if x[0] not in self.NEW_RELATIONS[device_module_id]])
 
                 self.LOG.info('Removing {} relationships from existing devices.'.format(self.id))
-                self._buildDeviceRelations(app)
+                self._buildDeviceRelations(app, commit=True)
 
             for dcname, dcspec in self.device_classes.iteritems():
                 if dcspec.remove:
@@ -183,9 +495,18 @@ class ZenPack(ZenPackBase):
         else:
             # check the difference between our candidate and the new spec
             # and back up the candidate if there is a difference
-            diff = self.check_diff(app, parent, relname, candidate_target, spec, specparam)
-            # if there was a difference, keep the backup and create the new template
-            if diff:
+            reconcile = self.RECONCILE_TEMPLATES and hasattr(spec, 'reconcile')
+            diff = self.check_diff(app, parent, relname, candidate_target, spec, specparam,
+                                   move=not reconcile)
+            # if there was a difference, keep the backup and update the
+            # candidate in place or create the new template
+            if diff and reconcile:
+                touched = spec.reconcile(app.zport.dmd, candidate_target, backup_id=diff)
+                self.LOG.info("Updated {} objects in {}/{}".format(
+                    touched, parent.getDmdKey(), object_id))
+                if backup_target:
+                    self.move_object(parent, relname, backup_target.id, object_id)
+            elif diff:
                 spec.create(app.zport.dmd)
             else:
                 # otherwise just return the backup template to its original location
@@ -195,22 +516,30 @@ class ZenPack(ZenPackBase):
                 else:
                     pass
 
-    def check_diff(self, app, parent, relname, object, spec, specparam):
-        """Return True if object has changed creating preupgrade backup if needed"""
+    def check_diff(self, app, parent, relname, object, spec, specparam, move=True):
+        """Return preupgrade backup id if object has changed, otherwise False
+
+        object is moved to the backup if move is True. Otherwise it's left
+        for the objects in it that change to be copied to the backup.
+        """
         diff = self.object_changed(app, object, spec, specparam)
         if not diff:
             return False
         # preserve the existing object if different
         time_str = time.strftime("%Y%m%d%H%M", time.localtime())
         preupgrade_id = "{}-preupgrade-{}".format(object.id, time_str)
-        self.move_object(parent, relname, object.id, preupgrade_id)
+        if move:
+            self.move_object(parent, relname, object.id, preupgrade_id)
+            backed_up = "The existing object will be"
+        else:
+            backed_up = "Objects in it that are changed will be"
         LOG.info("Existing object {}/{} differs from "
                  "the newer version included with the {} ZenPack.  "
-                 "The existing object will be "
-                 "backed up to '{}'.  Please review and reconcile any "
+                 "{} backed up to '{}'.  Please review and reconcile any "
                  "local changes before deleting the backup:\n{}".format(
-                    parent.getDmdKey(), object.id, self.id, preupgrade_id, diff))
-        return True
+                    parent.getDmdKey(), object.id, self.id, backed_up,
+                    preupgrade_id, diff))
+        return preupgrade_id
 
     def get_object(self, parent, relname, object_id):
         """Attempt to retrieve an object given its id, parent instance, and relation name"""
@@ -294,18 +623,14 @@ class ZenPack(ZenPackBase):
                             remove_func(preppedId)
 
     def object_changed(self, app, object, spec, specparam):
-        """Compare new and old objects with prototype creation"""
-        # get YAML representation of object
-        object_yaml = yaml.dump(specparam.fromObject(object), Dumper=Dumper)
-
-        # get YAML representation of prototype
-        proto_id = '{}-new'.format(spec.name)
-        proto_object = spec.create(app.zport.dmd, False, proto_id)
-        proto_object_param = specparam.fromObject(proto_object)
-        proto_object_yaml = yaml.dump(proto_object_param, Dumper=Dumper)
-        spec.remove(app.zport.dmd, proto_id)
+        """Return diff between object and spec, or None if they match
 
-        return self.get_yaml_diff(object_yaml, proto_object_yaml)
+        What object would be if it were created from spec is worked out in
+        memory by fromSpec, so no prototype is created.
+        """
+        object_yaml = yaml.dump(specparam.fromObject(object), Dumper=Dumper)
+        spec_yaml = yaml.dump(specparam.fromSpec(spec, object), Dumper=Dumper)
+        return self.get_yaml_diff(object_yaml, spec_yaml)
 
     def object_changed_safe(self, object, specparam):
         """Compare new and old objects without prototype creation 
@@ -426,60 +751,160 @@ class ZenPack(ZenPackBase):
             download=download,
             REQUEST=REQUEST)
 
+        managed = self.get_zpl_managed_paths()
         for filename in findFiles(self, 'objects', lambda f: f.endswith('.xml')):
-            self.filter_xml(filename)
+            self.filter_xml(filename, managed=managed)
 
         return result
 
-    def filter_xml(self, filename):
+    def get_zpl_managed_paths(self):
+        """Return set of paths of zpl_managed objects from this ZenPack's specs.
+
+        Only objects created from monitoring template, event class and
+        process class specs can be zpl_managed, so only those are looked
+        up rather than every object being exported.
+        """
+        dmd = self.dmd
+        candidates = []
+        for dcspec in self.device_classes.itervalues():
+            deviceclass = dcspec.get_organizer(dmd)
+            if deviceclass:
+                candidates.extend(
+                    self.get_object(deviceclass, 'rrdTemplates', x)
+                    for x in dcspec.templates)
+
+        for ecspec in self.event_classes.itervalues():
+            eventclass = ecspec.get_organizer(dmd)
+            if eventclass:
+                candidates.append(eventclass)
+                candidates.extend(
+                    self.get_object(eventclass, 'instances', eventclass.prepId(x))
+                    for x in ecspec.mappings)
+
+        for pcospec in self.process_class_organizers.itervalues():
+            organizer = pcospec.get_organizer(dmd)
+            if organizer:
+                candidates.append(organizer)
+                candidates.extend(
+                    self.get_object(organizer, 'osProcessClasses', organizer.prepId(x))
+                    for x in pcospec.process_classes)
+
+        return set(
+            x.getPrimaryId() for x in candidates
+            if x is not None and getattr(aq_base(x), 'zpl_managed', False))
+
+    def filter_xml(self, filename, managed=None):
+        """Remove zpl_managed objects from an exported objects.xml file.
+
+        The file is parsed incrementally and written out one top-level
+        element at a time. Objects are pruned if their path, or the path
+        of an object containing them, is in managed. managed defaults to
+        get_zpl_managed_paths().
+        """
+        if managed is None:
+            managed = self.get_zpl_managed_paths()
+
+        def is_managed(path):
+            while path:
+                if path in managed:
+                    return True
+                path = path.rpartition('/')[0]
+            return False
+
+        def is_path_comment(elem, path):
+            return elem is not None and elem.tag is etree.Comment and \
+                (elem.text or '').strip() == repr(tuple(path.split('/')))
+
         pruned = 0
+        kept = 0
+        tmpname = '{}.tmp'.format(filename)
         try:
-            tree = etree.parse(filename)
+            with open(tmpname, 'w') as f:
+                depth = 0
+                path = []
+                # pruning flag for each open object element
+                pruning = []
+                # top-level comment not yet written
+                comment = None
+                root = None
+                events = ('start', 'end', 'comment')
+                for action, elem in etree.iterparse(filename, events=events):
+                    if action == 'comment':
+                        if depth == 1:
+                            if comment is not None:
+                                f.write('{}\n'.format(etree.tostring(comment, with_tail=False)))
+                                kept += 1
+                            comment = elem
+                        continue
 
-            path = []
-            context = etree.iterwalk(tree, events=('start', 'end'))
-            for action, elem in context:
-                if elem.tag == 'object':
                     if action == 'start':
-                        path.append(elem.attrib.get('id'))
+                        depth += 1
+                        if depth == 1:
+                            root = elem
+                            f.write('<{}{}>\n'.format(elem.tag, ''.join(
+                                ' {}={}'.format(k, quoteattr(v))
+                                for k, v in elem.attrib.items())))
+                        elif elem.tag == 'object':
+                            path.append(elem.attrib.get('id'))
+                            parent_pruning = pruning[-1] if pruning else False
+                            pruning.append(parent_pruning or is_managed('/'.join(path)))
+                        elif elem.tag == 'tomanycont':
+                            path.append(elem.attrib.get('id'))
+                        continue
 
-                    elif action == 'end':
+                    depth -= 1
+                    prune = False
+                    if elem.tag == 'object':
                         obj_path = '/'.join(path)
-                        try:
-                            obj = self.dmd.getObjByPath(obj_path)
-                            if getattr(obj, 'zpl_managed', False):
-                                self.LOG.debug("Removing {} from {}".format(obj_path, filename))
-                                pruned += 1
-
-                                # if there's a comment before it with the
-                                # primary path of the object, remove that first.
+                        prune = pruning.pop()
+                        if prune and not (pruning and pruning[-1]):
+                            self.LOG.debug("Removing {} from {}".format(obj_path, filename))
+                            pruned += 1
+
+                            # Also remove the comment with the primary path of
+                            # the object if there's one before it.
+                            if depth > 1:
                                 prev = elem.getprevious()
-                                if '<!-- ' + repr(tuple('/'.join(path).split('/'))) + ' -->' == repr(prev):
+                                if is_path_comment(prev, obj_path):
                                     elem.getparent().remove(prev)
-
-                                # Remove the ZPL-managed object
                                 elem.getparent().remove(elem)
-
-                        except Exception:
-                            self.LOG.warning("Unable to postprocess {} in {}".format(obj_path, filename))
+                            elif is_path_comment(comment, obj_path):
+                                comment = None
 
                         path.pop()
-
-                if elem.tag == 'tomanycont':
-                    if action == 'start':
-                        path.append(elem.attrib.get('id'))
-                    elif action == 'end':
+                    elif elem.tag == 'tomanycont':
                         path.pop()
 
-            if len(tree.getroot()) == 0:
+                    if depth == 1:
+                        if comment is not None:
+                            f.write('{}\n'.format(etree.tostring(comment, with_tail=False)))
+                            kept += 1
+                            comment = None
+                        if not prune:
+                            f.write('{}\n'.format(etree.tostring(elem, with_tail=False)))
+                            kept += 1
+
+                        # Free what's been written.
+                        root.clear()
+
+                    elif depth == 0:
+                        if comment is not None:
+                            f.write('{}\n'.format(etree.tostring(comment, with_tail=False)))
+                            kept += 1
+                        f.write('</{}>\n'.format(elem.tag))
+
+            if not kept:
                 self.LOG.info("Removing {}".format(filename))
                 os.remove(filename)
             elif pruned:
                 self.LOG.info("Pruning {} objects from {}".format(pruned, filename))
-                with open(filename, 'w') as f:
-                    f.write(etree.tostring(tree))
+                os.rename(tmpname, filename)
             else:
                 self.LOG.debug("Leaving {} unchanged".format(filename))
 
         except Exception, e:
             self.LOG.error("Unable to postprocess {}: {}".format(filename, e))
+
+        finally:
+            if os.path.exists(tmpname):
+                os.remove(tmpname)
@@ -0,0 +1,290 @@
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+import collections
+import gc
+import math
+import os
+import platform
+import resource
+import sys
+import threading
+import timeit
+
+import yaml
+
+from .helpers.Dumper import Dumper
+from .helpers.loaders import OrderedLoader, ZenPackSpecLoader
+from .helpers.utils import get_merged_docs, get_optimized_yaml, optimize_yaml
+
+# Stages in the order they're run.
+STAGES = (
+    'parse',
+    'construct',
+    'plumb',
+    'classes',
+    'js',
+    'dump',
+    'optimize',
+    )
+
+# Stage changes smaller than these are noise, whatever the tolerance.
+MIN_SECONDS = 0.001
+MIN_PEAK_KB = 1024
+
+
+class PeakMemory(object):
+    """Context manager that records peak resident memory growth in KB.
+
+    Resident memory is sampled from /proc/self/statm in a thread. Where
+    that isn't available, growth of the process's maximum resident set
+    size is used, which is zero unless a new maximum is reached.
+
+        with PeakMemory() as peak:
+            load_yaml(filename)
+        print peak.kb
+
+    """
+
+    interval = 0.005
+
+    def __init__(self):
+        self.kb = 0
+        self.start = None
+        self.peak = None
+        self.thread = None
+        self.done = threading.Event()
+
+    def __enter__(self):
+        self.start = self.peak = get_rss_kb()
+        if self.start is None:
+            self.start = get_maxrss_kb()
+            return self
+
+        self.thread = threading.Thread(target=self.sample)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.thread:
+            self.done.set()
+            self.thread.join()
+            self.peak = max(self.peak, get_rss_kb())
+        else:
+            self.peak = get_maxrss_kb()
+
+        self.kb = max(self.peak - self.start, 0)
+
+    def sample(self):
+        while not self.done.wait(self.interval):
+            self.peak = max(self.peak, get_rss_kb())
+
+
+def get_rss_kb():
+    """Return current resident memory in KB, or None if unknown."""
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+    except (IOError, IndexError, ValueError):
+        return None
+
+    return pages * resource.getpagesize() / 1024
+
+
+def get_maxrss_kb():
+    """Return maximum resident memory so far in KB."""
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return maxrss / 1024
+
+    return maxrss
+
+
+def read_yaml(yaml_doc):
+    """Return YAML text for a file, or a directory as load_yaml merges it."""
+    if os.path.isdir(yaml_doc):
+        filenames = sorted(
+            os.path.join(yaml_doc, x)
+            for x in os.listdir(yaml_doc) if x.endswith('.yaml'))
+
+        if len(filenames) != 1:
+            return get_optimized_yaml(get_merged_docs(filenames))
+
+        yaml_doc = filenames[0]
+
+    with open(yaml_doc, 'r') as stream:
+        return stream.read()
+
+
+def summarize(values):
+    """Return OrderedDict of statistics for a list of numbers."""
+    values = sorted(values)
+    count = len(values)
+    mean = sum(values) / float(count)
+    if count % 2:
+        median = values[count // 2]
+    else:
+        median = (values[count // 2 - 1] + values[count // 2]) / 2.0
+
+    if count > 1:
+        stdev = math.sqrt(
+            sum((x - mean) ** 2 for x in values) / float(count - 1))
+    else:
+        stdev = 0.0
+
+    return collections.OrderedDict([
+        ('min', values[0]),
+        ('max', values[-1]),
+        ('mean', mean),
+        ('median', median),
+        ('stdev', stdev),
+        ])
+
+
+class Benchmark(object):
+    """Time each stage of loading a zenpack.yaml.
+
+    Every repeat runs all stages on fresh objects. Stages are:
+
+    * parse: compose the YAML document.
+    * construct: build the ZenPackSpec, including its initial plumbing.
+    * plumb: plumb class properties and relations again.
+    * classes: create classes and register them (ZenPackSpec.create).
+    * js: build the global and device JavaScript snippets.
+    * dump: dump specparams with Dumper and load the result.
+    * optimize: optimize_yaml.
+
+    """
+
+    def __init__(self, yaml_doc, repeat=5):
+        self.yaml_doc = yaml_doc
+        self.repeat = repeat
+        self.text = read_yaml(yaml_doc)
+        self.seconds = collections.defaultdict(list)
+        self.peak_kb = collections.defaultdict(int)
+        self.cfg = None
+
+    def run(self):
+        """Return OrderedDict of results that can be dumped as JSON."""
+        from ZenPacks.zenoss.ZenPackLib import zenpacklib
+
+        quiet = ZenPackSpecLoader.QUIET
+        ZenPackSpecLoader.QUIET = True
+        try:
+            for _ in xrange(self.repeat):
+                gc.collect()
+                self.run_once()
+        finally:
+            ZenPackSpecLoader.QUIET = quiet
+
+        stages = collections.OrderedDict()
+        for stage in STAGES:
+            stages[stage] = summarize(self.seconds[stage])
+            stages[stage]['peak_kb'] = self.peak_kb[stage]
+
+        cfg = self.cfg
+        return collections.OrderedDict([
+            ('name', cfg.name),
+            ('source', os.path.abspath(self.yaml_doc)),
+            ('zenpacklib', zenpacklib.__version__),
+            ('python', platform.python_version()),
+            ('repeat', self.repeat),
+            ('counts', collections.OrderedDict([
+                ('classes', len(cfg.classes)),
+                ('class_relationships', len(cfg.class_relationships)),
+                ('device_classes', len(cfg.device_classes)),
+                ('templates', sum(
+                    len(x.templates) for x in cfg.device_classes.values())),
+                ('event_classes', len(cfg.event_classes)),
+                ('process_classes', sum(
+                    len(x.process_classes)
+                    for x in cfg.process_class_organizers.values())),
+                ])),
+            ('stages', stages),
+            ])
+
+    def run_once(self):
+        """Run all stages once."""
+        loader = ZenPackSpecLoader(self.text)
+        try:
+            node = self.time('parse', loader.get_single_node)
+            cfg = self.time('construct', loader.construct_document, node)
+        finally:
+            loader.dispose()
+
+        def plumb():
+            cfg.plumb_properties()
+            cfg.plumb_relations()
+
+        def js():
+            return (
+                ''.join(x.global_js_snippet for x in cfg.ordered_classes),
+                cfg.get_device_js_snippet())
+
+        def dump():
+            dumped = yaml.dump(cfg.specparams, Dumper=Dumper)
+            return yaml.load(dumped, Loader=OrderedLoader)
+
+        def optimize():
+            # optimize_yaml prints any differences it finds.
+            stdout = sys.stdout
+            sys.stdout = open(os.devnull, 'w')
+            try:
+                return optimize_yaml(self.text)
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+
+        self.time('plumb', plumb)
+        self.time('classes', cfg.create)
+        self.time('js', js)
+        self.time('dump', dump)
+        self.time('optimize', optimize)
+        self.cfg = cfg
+
+    def time(self, stage, function, *args):
+        """Return result of function(*args), recording time and memory."""
+        with PeakMemory() as peak:
+            start = timeit.default_timer()
+            result = function(*args)
+            self.seconds[stage].append(timeit.default_timer() - start)
+
+        self.peak_kb[stage] = max(self.peak_kb[stage], peak.kb)
+        return result
+
+
+def compare(results, baseline, tolerance=0.1):
+    """Return list of regressions in results from baseline results.
+
+    A stage regressed if its median time or peak memory grew by more than
+    tolerance (a fraction) and by more than MIN_SECONDS or MIN_PEAK_KB.
+    Stages missing from either are skipped.
+
+    """
+    regressions = []
+    for stage, current in results['stages'].iteritems():
+        previous = baseline.get('stages', {}).get(stage)
+        if not previous:
+            continue
+
+        for metric, minimum in (('median', MIN_SECONDS), ('peak_kb', MIN_PEAK_KB)):
+            if metric not in previous:
+                continue
+
+            change = current[metric] - previous[metric]
+            if change > minimum and change > previous[metric] * tolerance:
+                regressions.append(collections.OrderedDict([
+                    ('stage', stage),
+                    ('metric', metric),
+                    ('baseline', previous[metric]),
+                    ('current', current[metric]),
+                    ('change', change / previous[metric] if previous[metric] else None),
+                    ]))
+
+    return regressions
@@ -0,0 +1,205 @@
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+import collections
+import functools
+import os
+import time
+
+import Missing
+import transaction
+
+from .base.CatalogBase import CatalogBase, global_catalog_shard
+from .helpers.ZenPackLibLog import DEFAULTLOG
+
+
+class CatalogChecker(object):
+    """Compare zenpacklib device and global catalogs with the model.
+
+    Each device's components are compared with the entries for that
+    device in the catalogs they belong in. An entry is missing if a
+    component isn't cataloged, extra if there's no such component, and
+    stale if its metadata differs from the component's current values.
+    Only catalogs that at least one of the device's components belongs
+    in are checked. Every component is missing from a catalog that
+    doesn't exist.
+
+    Problems are fixed if repair is True, creating catalogs as needed.
+
+    """
+
+    LOG = DEFAULTLOG
+
+    def __init__(self, dmd, repair=False):
+        self.dmd = dmd
+        self.repair = repair
+
+    def check_paths(self, paths):
+        """Return Counter of problems for devices given by path.
+
+        Repairs are committed once all devices have been checked.
+
+        """
+        self.dmd._p_jar.sync()
+        stats = collections.Counter()
+        for path in paths:
+            try:
+                device = self.dmd.unrestrictedTraverse(path)
+            except (KeyError, AttributeError):
+                self.LOG.warning("Device %s no longer exists", path)
+                continue
+
+            stats.update(self.check_device(device))
+
+        if self.repair:
+            transaction.commit()
+        else:
+            transaction.abort()
+
+        return stats
+
+    def check_device(self, device):
+        """Return Counter of problems for device."""
+        stats = collections.Counter(devices=1)
+
+        # {catalog id: (get_catalog, is_global, {uid: component})}
+        catalogs = {}
+        for component in self.get_components(device):
+            stats['components'] += 1
+            uid = component.getPrimaryId()
+            for catalog_id, get_catalog, is_global in self.get_catalog_getters(
+                    device, component):
+                if catalog_id not in catalogs:
+                    catalogs[catalog_id] = (get_catalog, is_global, {})
+
+                catalogs[catalog_id][2][uid] = component
+
+        for catalog_id, (get_catalog, is_global, expected) in catalogs.iteritems():
+            zcatalog = get_catalog(create=False)
+            if zcatalog is None:
+                stats['missing'] += len(expected)
+                self.LOG.debug(
+                    "%s: missing %s components", catalog_id, len(expected))
+
+                if self.repair:
+                    zcatalog = get_catalog(create=True)
+                    for uid, component in expected.iteritems():
+                        zcatalog.catalog_object(component, uid)
+                        stats['repaired'] += 1
+
+                continue
+
+            if is_global:
+                actual = set(
+                    x.getPath() for x in zcatalog(device_id=device.id))
+            else:
+                actual = set(zcatalog._catalog.uids.keys())
+
+            for uid, component in expected.iteritems():
+                if uid not in actual:
+                    stats['missing'] += 1
+                    self.LOG.debug("%s: missing %s", zcatalog.id, uid)
+                elif self.is_stale(zcatalog, uid, component):
+                    stats['stale'] += 1
+                    self.LOG.debug("%s: stale %s", zcatalog.id, uid)
+                else:
+                    continue
+
+                if self.repair:
+                    zcatalog.catalog_object(component, uid)
+                    stats['repaired'] += 1
+
+            for uid in actual.difference(expected):
+                stats['extra'] += 1
+                self.LOG.debug("%s: extra %s", zcatalog.id, uid)
+                if self.repair:
+                    zcatalog.uncatalog_object(uid)
+                    stats['repaired'] += 1
+
+        return stats
+
+    def get_catalog_getters(self, device, component):
+        """Generate (catalog id, get_catalog, is_global) for component.
+
+        get_catalog(create) returns the catalog, or None if it doesn't
+        exist and create is False.
+
+        """
+        for name in component._device_catalogs:
+            yield (
+                '{}Search'.format(name),
+                functools.partial(
+                    component.get_device_catalog, name, device=device),
+                False)
+
+        cls = component.__class__
+        for name in component._global_catalogs:
+            shards = component._global_catalog_shards.get(name)
+            if shards:
+                shard = global_catalog_shard(component.device_id(), shards)
+            else:
+                shard = None
+
+            yield (
+                cls.get_global_catalog_name(name, shard),
+                functools.partial(
+                    cls.get_global_catalog, self.dmd, name, shard=shard),
+                True)
+
+    def get_components(self, device):
+        """Generate device's zenpacklib components without using catalogs."""
+        if hasattr(device, 'getDeviceComponentsNoIndexGen'):
+            components = device.getDeviceComponentsNoIndexGen()
+        else:
+            components = device.getDeviceComponents()
+
+        for component in components:
+            if isinstance(component, CatalogBase):
+                yield component
+
+    def is_stale(self, zcatalog, uid, component):
+        """Return True if uid's metadata differs from component."""
+        metadata = zcatalog._catalog.getMetadataForUID(uid)
+        for column, cataloged in metadata.iteritems():
+            if cataloged is Missing.Value:
+                cataloged = None
+
+            try:
+                value = getattr(component, column, None)
+                if callable(value):
+                    value = value()
+            except Exception:
+                continue
+
+            if value != cataloged:
+                return True
+
+        return False
+
+
+# Checker for the current worker process.
+_worker_checker = None
+
+
+def init_worker(repair):
+    """Connect to ZODB in a new worker process."""
+    global _worker_checker
+    from Products.ZenUtils.ZenScriptBase import ZenScriptBase
+    dmd = ZenScriptBase(connect=True, noopts=True).dmd
+    _worker_checker = CatalogChecker(dmd, repair=repair)
+
+
+def check_paths(paths):
+    """Check devices in a worker process.
+
+    Returns (pid, paths, stats, seconds).
+
+    """
+    start = time.time()
+    stats = _worker_checker.check_paths(paths)
+    return os.getpid(), paths, dict(stats), time.time() - start
@@ -0,0 +1,105 @@
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+import importlib
+import itertools
+import os
+import time
+
+import transaction
+
+from .functions import load_objects
+from .helpers.ZenPackLibLog import DEFAULTLOG
+
+
+def get_device_paths(dmd, new_relations):
+    """Return sorted paths of devices affected by new_relations.
+
+    new_relations is a ZenPack's NEW_RELATIONS. Only devices that are
+    instances of its device classes, or their subclasses, are returned.
+
+    """
+    from Products.ZenUtils.Utils import importClass
+    from Products.Zuul.interfaces import ICatalogTool
+
+    if not new_relations:
+        return []
+
+    types = [importClass(x) for x in new_relations]
+    return sorted(
+        x.getPath() for x in ICatalogTool(dmd.Devices).search(types=types))
+
+
+def get_batches(paths, batch):
+    """Return lists of at most batch sorted paths from one device class."""
+    batches = []
+    for _, group in itertools.groupby(
+            sorted(paths), key=lambda x: x.rsplit('/devices/', 1)[0]):
+        group = list(group)
+        batches.extend(
+            group[i:i + batch] for i in xrange(0, len(group), batch))
+
+    return batches
+
+
+def build_relations(dmd, paths, batch=1000, commit=False, checkpoint=None,
+                    log=DEFAULTLOG):
+    """Call buildRelations on devices given by path.
+
+    A savepoint is made, or the transaction committed if commit is True,
+    after every batch devices. Committed batches are added to checkpoint,
+    and devices already in checkpoint are skipped.
+
+    Returns the number of devices updated.
+
+    """
+    if checkpoint is not None:
+        paths = [x for x in paths if x not in checkpoint]
+
+    count = 0
+    start = time.time()
+    for chunk in get_batches(paths, batch):
+        for _, device in load_objects(dmd, chunk):
+            device.buildRelations()
+            count += 1
+
+        if commit:
+            transaction.commit()
+            if checkpoint is not None:
+                checkpoint.add(chunk)
+        else:
+            transaction.savepoint(optimistic=True)
+
+        log.info("Built relationships on {} of {} devices ({:.1f}s)".format(
+            count, len(paths), time.time() - start))
+
+    return count
+
+
+# dmd for the current worker process.
+_worker_dmd = None
+
+
+def init_worker(zenpack_id):
+    """Connect to ZODB and load zenpack_id in a new worker process."""
+    global _worker_dmd
+    from Products.ZenUtils.ZenScriptBase import ZenScriptBase
+    importlib.import_module(zenpack_id)
+    _worker_dmd = ZenScriptBase(connect=True, noopts=True).dmd
+
+
+def build_paths(paths):
+    """Build relationships for one batch of devices in a worker process.
+
+    Returns (pid, paths, count, seconds).
+
+    """
+    start = time.time()
+    _worker_dmd._p_jar.sync()
+    count = build_relations(_worker_dmd, paths, batch=len(paths), commit=True)
+    return os.getpid(), paths, count, time.time() - start
@@ -10,9 +10,12 @@ import os
 import importlib
 import collections
 import imp
+import itertools
 import sys
 import operator
 import re
+from Acquisition import aq_base
+from Products.AdvancedQuery import Between, Eq, Ge, Generic, Le
 from Products.AdvancedQuery.AdvancedQuery import _BaseQuery as BaseQuery
 
 from Products.ZenModel.Device import Device as BaseDevice
@@ -20,6 +23,7 @@ from Products.Zuul.infos.device import DeviceInfo as BaseDeviceInfo
 from Products.ZenModel.DeviceComponent import DeviceComponent as BaseDeviceComponent
 from Products.Zuul.infos.component import ComponentInfo as BaseComponentInfo
 from .helpers.ZenPackLibLog import DEFAULTLOG
+from .helpers.CatalogRecord import CatalogRecord
 
 
 # Private Functions #########################################################
@@ -107,17 +111,26 @@ def fix_kwargs(kwargs):
     return new_kwargs
 
 
-def catalog_search(scope, name, *args, **kwargs):
-    """Return iterable of matching brains in named catalog."""
-
+def get_catalog(scope, name):
+    """Return named catalog found from scope, or None."""
     catalog = getattr(scope, '{}Search'.format(name), None)
     if not catalog:
         DEFAULTLOG.debug("Catalog {}Search not found at {}.  It should be created when the first included component is indexed".format(name, scope))
+        return None
+
+    return catalog
+
+
+def catalog_search(scope, name, *args, **kwargs):
+    """Return iterable of matching brains in named catalog."""
+
+    catalog = get_catalog(scope, name)
+    if catalog is None:
         return []
 
     if args:
         if isinstance(args[0], BaseQuery):
-            return catalog.evalAdvancedQuery(args[0])
+            return catalog.evalAdvancedQuery(args[0], *args[1:])
         elif isinstance(args[0], dict):
             return catalog(args[0])
         else:
@@ -129,6 +142,156 @@ def catalog_search(scope, name, *args, **kwargs):
     return catalog(**kwargs)
 
 
+def catalog_records(scope, name, *args, **kwargs):
+    """Return list of CatalogRecord for matches in named catalog.
+
+    Records are built from catalog metadata without loading objects.
+    Accepts the same query arguments as catalog_search, plus these
+    keyword arguments:
+
+        fields: Metadata columns to include. All columns by default.
+        sort_on: Index to sort by.
+        sort_order: "ascending" (default) or "descending".
+        limit: Maximum number of records.
+
+    Raises KeyError if a field isn't one of the catalog's columns.
+
+    """
+    fields = kwargs.pop('fields', None)
+    sort_on = kwargs.pop('sort_on', None)
+    sort_order = kwargs.pop('sort_order', 'ascending')
+    limit = kwargs.pop('limit', None)
+
+    catalog = get_catalog(scope, name)
+    if catalog is None:
+        return []
+
+    columns = catalog.schema()
+    if fields is None:
+        fields = columns
+    else:
+        missing = set(fields).difference(columns)
+        if missing:
+            raise KeyError(
+                "{} has no metadata for {}".format(
+                    catalog.id, ", ".join(sorted(missing))))
+
+    if args and isinstance(args[0], BaseQuery):
+        sort_specs = ()
+        if sort_on:
+            if sort_order.startswith('desc'):
+                sort_specs = ((sort_on, 'desc'),)
+            else:
+                sort_specs = (sort_on,)
+
+        brains = catalog_search(scope, name, args[0], sort_specs)
+    else:
+        query = dict(args[0]) if args else {}
+        query.update(kwargs)
+        if sort_on:
+            query['sort_on'] = sort_on
+            query['sort_order'] = sort_order
+            if limit:
+                query['sort_limit'] = limit
+
+        brains = catalog_search(scope, name, query)
+
+    if limit:
+        brains = brains[:limit]
+
+    return [
+        CatalogRecord(x.getPath(), ((f, getattr(x, f, None)) for f in fields))
+        for x in brains]
+
+
+def merge_results(results, sort_on=None, sort_order='ascending', limit=None):
+    """Return list of results merged from several catalog searches.
+
+    Results are sorted by their sort_on attribute, if given, and limited
+    to limit results. Used to search sharded catalogs.
+
+    """
+    merged = list(itertools.chain.from_iterable(results))
+    if sort_on:
+        merged.sort(
+            key=lambda x: getattr(x, sort_on, None),
+            reverse=sort_order.startswith(('desc', 'rev')))
+
+    if limit:
+        merged = merged[:limit]
+
+    return merged
+
+
+def range_query(index, low=None, high=None, exclusive=False):
+    """Return query matching index values between low and high.
+
+    Either bound can be None for an open-ended range. Bounds are
+    inclusive unless exclusive is True. Works with field, numeric and
+    boolean indexes. Example:
+
+        catalog_records(device, 'Disk', range_query('size', low=1024))
+
+    """
+    if low is not None and high is not None:
+        query = Between(index, low, high)
+    elif low is not None:
+        query = Ge(index, low)
+    elif high is not None:
+        query = Le(index, high)
+    else:
+        raise ValueError("range_query requires low or high")
+
+    if exclusive:
+        for bound in (low, high):
+            if bound is not None:
+                query = query & ~Eq(index, bound)
+
+    return query
+
+
+def prefix_query(index, path):
+    """Return query matching path index values that start with path."""
+    return Generic(index, {'query': path, 'level': 0})
+
+
+def load_objects(scope, records, batch=100):
+    """Generate (path, object) tuples for records, batch at a time.
+
+    records can be CatalogRecords, catalog brains, or paths. Objects are
+    loaded in path order. Each container is traversed once per batch, and
+    objects that can't be found are logged and skipped.
+
+    """
+    root = scope.getPhysicalRoot()
+    paths = sorted(set(
+        x if isinstance(x, basestring) else x.getPath() for x in records))
+
+    for i in xrange(0, len(paths), batch):
+        containers = {}
+        objects = []
+        for path in paths[i:i + batch]:
+            container_path, _, id_ = path.rpartition('/')
+            try:
+                container = containers.get(container_path)
+                if container is None:
+                    container = containers[container_path] = \
+                        root.unrestrictedTraverse(container_path)
+
+                objects.append((path, container._getOb(id_)))
+            except Exception as e:
+                DEFAULTLOG.warning(
+                    "Unable to load non-existent object {}: {}".format(path, e))
+
+        # Load the batch in one round trip where ZODB supports it.
+        prefetch = getattr(root._p_jar, 'prefetch', None)
+        if prefetch is not None:
+            prefetch(*[aq_base(x[1]) for x in objects])
+
+        for path_and_object in objects:
+            yield path_and_object
+
+
 def get_symbol_name(*args):
     """Return fully-qualified symbol name given path args.
 
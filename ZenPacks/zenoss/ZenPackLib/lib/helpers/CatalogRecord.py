@@ -0,0 +1,37 @@
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+
+class CatalogRecord(dict):
+    """Catalog metadata for one cataloged object.
+
+    Values are available as items or attributes. getPath returns the
+    object's path like a catalog brain, but the object itself is never
+    loaded. Use load_objects to load objects for records.
+
+    """
+
+    __slots__ = ('uid',)
+
+    def __init__(self, uid, values):
+        super(CatalogRecord, self).__init__(values)
+        self.uid = uid
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __repr__(self):
+        return '<CatalogRecord {} {}>'.format(
+            self.uid, super(CatalogRecord, self).__repr__())
+
+    def getPath(self):
+        return self.uid
@@ -0,0 +1,34 @@
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+import os
+
+
+class Checkpoint(object):
+    """Completed device paths stored one per line in a file."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.paths = set()
+        if os.path.exists(filename):
+            with open(filename) as f:
+                self.paths.update(x.strip() for x in f if x.strip())
+
+    def __contains__(self, path):
+        return path in self.paths
+
+    def __len__(self):
+        return len(self.paths)
+
+    def add(self, paths):
+        """Record paths as completed."""
+        with open(self.filename, 'a') as f:
+            for path in paths:
+                f.write('{}\n'.format(path))
+
+        self.paths.update(paths)
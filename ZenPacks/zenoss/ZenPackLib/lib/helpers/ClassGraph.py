@@ -0,0 +1,258 @@
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+import collections
+import json
+import os
+
+import yaml
+
+from .loaders import ZenPackSpecLoader
+
+# Base of classes that don't specify one, as ClassSpec defaults it.
+DEFAULT_BASES = ['zenpacklib.Component']
+
+CARDINALITIES = {
+    ('ToOne', 'ToOne'): '1:1',
+    ('ToMany', 'ToOne'): '1:M',
+    ('ToManyCont', 'ToOne'): '1:MC',
+    ('ToMany', 'ToMany'): 'M:M',
+    }
+
+
+class Relationship(collections.namedtuple('Relationship', [
+        'left_class', 'left_relname', 'left_type',
+        'right_class', 'right_relname', 'right_type'])):
+    """Relationship parsed from a class_relationships entry."""
+
+    __slots__ = ()
+
+    @property
+    def cardinality(self):
+        return CARDINALITIES[(self.left_type, self.right_type)]
+
+
+def short_name(classname):
+    """Return classname without its module, as Python would name it."""
+    return classname.rsplit('.', 1)[-1]
+
+
+class ClassGraph(object):
+    """Class inheritance and relationships read from zenpack.yaml.
+
+    Only the name, classes and class_relationships sections are read. No
+    specs are built and no base classes are imported, so this is much
+    faster than load_yaml for packs with many templates or event classes.
+
+        graph = ClassGraph.load('zenpack.yaml')
+        print graph.to_dot()
+
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+        self.relationships = []
+        self._bases = collections.OrderedDict()
+        self._default_bases = None
+
+    @classmethod
+    def load(cls, yaml_doc):
+        """Return ClassGraph for a YAML file, directory of files or string."""
+        graph = cls()
+        if os.path.isdir(yaml_doc):
+            for filename in sorted(os.listdir(yaml_doc)):
+                if filename.endswith('.yaml'):
+                    graph.add_file(os.path.join(yaml_doc, filename))
+        elif os.path.isfile(yaml_doc):
+            graph.add_file(yaml_doc)
+        else:
+            graph.add_node(yaml.compose(yaml_doc, Loader=yaml.SafeLoader))
+
+        return graph
+
+    def add_file(self, filename):
+        """Add classes and relationships from a YAML file."""
+        with open(filename, 'r') as stream:
+            self.add_node(yaml.compose(stream, Loader=yaml.SafeLoader))
+
+    def add_node(self, node):
+        """Add classes and relationships from a composed YAML document.
+
+        Composing only builds the document's node tree, so other sections
+        are skipped without constructing anything from them.
+
+        """
+        if not isinstance(node, yaml.MappingNode):
+            return
+
+        for key_node, value_node in node.value:
+            key = key_node.value
+            if key == 'name' and isinstance(value_node, yaml.ScalarNode):
+                self.name = value_node.value
+
+            elif key == 'classes' and isinstance(value_node, yaml.MappingNode):
+                for class_node, params_node in value_node.value:
+                    self.add_class(class_node.value, get_bases(params_node))
+
+            elif key == 'class_relationships' and isinstance(value_node, yaml.SequenceNode):
+                for item_node in value_node.value:
+                    self.relationships.append(Relationship(
+                        **ZenPackSpecLoader.str_to_relschemaspec(
+                            str(item_node.value))))
+
+    def add_class(self, name, bases=None):
+        """Add class, or DEFAULTS, with bases if they're specified."""
+        if name == 'DEFAULTS':
+            if bases is not None:
+                self._default_bases = bases
+        elif bases is not None or name not in self._bases:
+            self._bases[name] = bases
+
+    @property
+    def classes(self):
+        """Return OrderedDict of class names to lists of base class names."""
+        default_bases = self._default_bases or DEFAULT_BASES
+        return collections.OrderedDict(
+            (name, bases if bases is not None else default_bases)
+            for name, bases in self._bases.iteritems())
+
+    def to_yuml(self):
+        """Return yUML (http://yuml.me/) class diagram source."""
+        classes = self.classes
+        lines = ["# Classes"]
+        for cname in sorted(classes):
+            lines.append("[{}]".format(cname))
+
+        lines.append("\n# Inheritence")
+        for cname, bases in classes.iteritems():
+            for base in bases:
+                lines.append("[{}]^-[{}]".format(short_name(base), cname))
+
+        lines.append("\n# Containing Relationships")
+        for rel in self.relationships:
+            if rel.cardinality == '1:MC':
+                lines.append("[{}]++{}-{}[{}]".format(
+                    rel.left_class, rel.left_relname,
+                    rel.right_relname, rel.right_class))
+
+        lines.append("\n# Non-Containing Relationships")
+        formats = {
+            '1:1': "[{}]{}-.-{}[{}]",
+            '1:M': "[{}]{}-.-{}++[{}]",
+            'M:M': "[{}]++{}-.-{}++[{}]",
+            }
+
+        for rel in self.relationships:
+            if rel.cardinality in formats:
+                lines.append(formats[rel.cardinality].format(
+                    rel.left_class, rel.left_relname,
+                    rel.right_relname, rel.right_class))
+
+        return "\n".join(lines)
+
+    def to_dot(self):
+        """Return Graphviz DOT source.
+
+        Inheritance edges point to the base class with a hollow arrow.
+        Containing relationships have a diamond at the container, and the
+        "many" end of a relationship has a crow's foot.
+
+        """
+        def quote(value):
+            return json.dumps(value)
+
+        def arrowtail(rel):
+            if rel.left_type == 'ToManyCont':
+                return 'diamond'
+            return 'crow' if rel.right_type == 'ToMany' else 'none'
+
+        def arrowhead(rel):
+            return 'none' if rel.left_type == 'ToOne' else 'crow'
+
+        lines = ['digraph {} {{'.format(quote(self.name or 'classes'))]
+        lines.append('    rankdir=BT;')
+        lines.append('    node [shape=box];')
+
+        classes = self.classes
+        for cname in sorted(classes):
+            lines.append('    {};'.format(quote(cname)))
+
+        for cname, bases in classes.iteritems():
+            for base in bases:
+                lines.append('    {} -> {} [arrowhead=empty];'.format(
+                    quote(cname), quote(short_name(base))))
+
+        for rel in self.relationships:
+            lines.append(
+                '    {} -> {} [dir=both, arrowtail={}, arrowhead={}, '
+                'taillabel={}, headlabel={}{}];'.format(
+                    quote(rel.left_class), quote(rel.right_class),
+                    arrowtail(rel), arrowhead(rel),
+                    quote(rel.left_relname), quote(rel.right_relname),
+                    '' if rel.cardinality == '1:MC' else ', style=dashed'))
+
+        lines.append('}')
+        return '\n'.join(lines)
+
+    def to_json(self):
+        """Return JSON-serializable adjacency of classes.
+
+        Each class maps to its bases and to the relationships it has, seen
+        from its side. Classes that only appear in relationships are
+        included with no bases.
+
+        """
+        adjacency = collections.OrderedDict()
+
+        def entry(cname, bases=None):
+            if cname not in adjacency:
+                adjacency[cname] = collections.OrderedDict([
+                    ('bases', list(bases or [])), ('relationships', [])])
+
+            return adjacency[cname]
+
+        for cname, bases in self.classes.iteritems():
+            entry(cname, bases)
+
+        for rel in self.relationships:
+            entry(rel.left_class)['relationships'].append(collections.OrderedDict([
+                ('relname', rel.left_relname),
+                ('type', rel.left_type),
+                ('cardinality', rel.cardinality),
+                ('remote_class', rel.right_class),
+                ('remote_relname', rel.right_relname),
+                ]))
+
+            entry(rel.right_class)['relationships'].append(collections.OrderedDict([
+                ('relname', rel.right_relname),
+                ('type', rel.right_type),
+                ('cardinality', rel.cardinality),
+                ('remote_class', rel.left_class),
+                ('remote_relname', rel.left_relname),
+                ]))
+
+        return collections.OrderedDict([
+            ('name', self.name), ('classes', adjacency)])
+
+
+def get_bases(params_node):
+    """Return list of base class names in a class's YAML, or None."""
+    if not isinstance(params_node, yaml.MappingNode):
+        return None
+
+    for param_node, value_node in params_node.value:
+        if param_node.value != 'base':
+            continue
+
+        if isinstance(value_node, yaml.SequenceNode):
+            return [str(x.value) for x in value_node.value]
+
+        if isinstance(value_node, yaml.ScalarNode) and value_node.value:
+            return [str(value_node.value)]
+
+    return None
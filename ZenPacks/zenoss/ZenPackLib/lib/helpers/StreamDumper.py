@@ -0,0 +1,126 @@
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+import os
+import re
+
+from yaml.events import (
+    DocumentEndEvent, DocumentStartEvent, MappingEndEvent, MappingStartEvent)
+
+from .Dumper import Dumper
+
+
+class StreamDumper(object):
+    """Write a ZenPackSpecParams YAML document one spec at a time.
+
+    The output is what yaml.dump(zpsp, Dumper=Dumper) would produce for a
+    ZenPackSpecParams with specs in one section, such as device_classes,
+    but only the spec being written is represented in memory.
+
+        with StreamDumper(sys.stdout, zenpack_name, 'device_classes') as d:
+            for dc_name, dcspec in dcspecs:
+                d.dump(dc_name, dcspec)
+
+    """
+
+    def __init__(self, stream, zenpack_name, section):
+        self.stream = stream
+        self.zenpack_name = zenpack_name
+        self.section = section
+        self.dumper = Dumper(stream, encoding='utf-8')
+        self.remaining = []
+
+    def __enter__(self):
+        from ..params.ZenPackSpecParams import ZenPackSpecParams
+
+        self.dumper.open()
+        self.dumper.emit(DocumentStartEvent())
+
+        # Write the document up to the section, and keep what follows it.
+        root = self.represent(ZenPackSpecParams(self.zenpack_name))
+        self.dumper.emit(MappingStartEvent(None, root.tag, False))
+        items = list(root.value)
+        for i, (key, value) in enumerate(items):
+            if key.value == self.section:
+                self.remaining = items[i + 1:]
+                break
+
+            self.serialize(key)
+            self.serialize(value)
+
+        self.serialize(self.represent(self.section))
+        self.dumper.emit(
+            MappingStartEvent(None, u'tag:yaml.org,2002:map', True))
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            return
+
+        self.dumper.emit(MappingEndEvent())
+        for key, value in self.remaining:
+            self.serialize(key)
+            self.serialize(value)
+
+        self.dumper.emit(MappingEndEvent())
+        self.dumper.emit(DocumentEndEvent())
+        self.dumper.close()
+
+    def dump(self, name, spec):
+        """Write spec to the section."""
+        self.serialize(self.represent(name))
+        self.serialize(self.represent(spec))
+        self.stream.flush()
+
+    def represent(self, data):
+        """Return YAML node for data without keeping it for aliases."""
+        node = self.dumper.represent_data(data)
+        self.dumper.represented_objects = {}
+        self.dumper.object_keeper = []
+        self.dumper.alias_key = None
+        return node
+
+    def serialize(self, node):
+        """Emit events for node."""
+        self.dumper.anchor_node(node)
+        self.dumper.serialize_node(node, None, None)
+        self.dumper.serialized_nodes = {}
+        self.dumper.anchors = {}
+
+
+def dump_split(directory, zenpack_name, section, specs):
+    """Write each (name, spec) in specs to its own YAML file in directory.
+
+    Each file is a complete document with the ZenPack's name and one spec
+    in section, so directory can be loaded with load_yaml. Files are named
+    for the section and spec. Returns the list of filenames written.
+
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    filenames = []
+    for name, spec in specs:
+        basename = '{}_{}'.format(
+            section, re.sub(r'[^\w.-]+', '_', name.strip('/')) or 'root')
+
+        filename = os.path.join(directory, '{}.yaml'.format(basename))
+        suffix = 1
+        while filename in filenames:
+            suffix += 1
+            filename = os.path.join(
+                directory, '{}_{}.yaml'.format(basename, suffix))
+
+        with open(filename, 'w') as stream:
+            with StreamDumper(stream, zenpack_name, section) as dumper:
+                dumper.dump(name, spec)
+
+        filenames.append(filename)
+
+    return filenames
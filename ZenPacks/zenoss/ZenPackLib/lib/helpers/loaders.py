@@ -348,7 +348,8 @@ class ZenPackSpecLoader(OrderedLoader):
 
         return class_
 
-    def str_to_relschemaspec(self, schemastr):
+    @staticmethod
+    def str_to_relschemaspec(schemastr):
         schema_pattern = re.compile(
             r'^\s*(?P<left>\S+)'
             r'\s+(?P<cardinality>1:1|1:M|1:MC|M:M)'
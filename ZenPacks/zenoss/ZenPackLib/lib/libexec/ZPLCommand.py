@@ -9,15 +9,15 @@
 import os
 import os.path
 import sys
-import yaml
 import collections
 import logging
+import time
+import transaction
 from optparse import OptionGroup
 
 import Globals
 from Products.ZenUtils.Utils import unused
 
-from Acquisition import aq_base
 from Products.ZenUtils.ZenScriptBase import ZenScriptBase
 
 from ..params.ZenPackSpecParams import ZenPackSpecParams
@@ -26,10 +26,10 @@ from ..params.EventClassSpecParams import EventClassSpecParams
 from ..params.EventClassMappingSpecParams import EventClassMappingSpecParams
 from ..params.ProcessClassOrganizerSpecParams import ProcessClassOrganizerSpecParams
 from ..resources.templates import SETUP_PY
+from ..helpers.ClassGraph import ClassGraph
 from ..helpers.ZenPackLibLog import ZenPackLibLog, DEFAULTLOG
-from ..helpers.loaders import WarningLoader, ZenPackSpecLoader
-from ..helpers.Dumper import Dumper
-from ..helpers.utils import optimize_yaml, load_yaml_single
+from ..helpers.loaders import WarningLoader
+from ..helpers.utils import optimize_yaml, load_yaml, load_yaml_single
 from ZenPacks.zenoss.ZenPackLib import zenpacklib
 unused(Globals)
 
@@ -70,6 +70,9 @@ class ZPLCommand(ZenScriptBase):
                          dest="dump_process_classes",
                          action="store_true",
                          help="export existing process classes to YAML")
+        group.add_option("--output-dir",
+                         dest="output_dir",
+                         help="write exported YAML to one file per device class, event class or process class organizer in this directory")
         self.parser.add_option_group(group)
 
         group = OptionGroup(self.parser, "ZenPack Development")
@@ -89,10 +92,110 @@ class ZPLCommand(ZenScriptBase):
                     dest="diagram",
                     action="store_true",
                     help="print YUML (http://yuml.me/) class diagram source based on zenpack.yaml")
+        group.add_option("--diagram-format",
+                    dest="diagram_format",
+                    type="choice",
+                    choices=["yuml", "dot", "json"],
+                    default="yuml",
+                    help="--diagram output format: yuml, dot (Graphviz) or json (default: %default)")
         group.add_option("-p", "--paths",
                     dest="paths",
                     action="store_true",
                     help="print possible facet paths for a given device and whether currently filtered.")
+        group.add_option("--limit",
+                    dest="limit",
+                    type="int",
+                    default=0,
+                    help="stop --paths after printing this many paths (default: no limit)")
+        group.add_option("--class",
+                    dest="component_class",
+                    help="only list --paths from components of this class (meta_type)")
+        group.add_option("--plan",
+                    dest="plan",
+                    action="store_true",
+                    help="print JSON describing what installing zenpack.yaml would change, with estimated times")
+        group.add_option("--analyze-regex",
+                    dest="analyze_regex",
+                    action="store_true",
+                    help="flag risky process class and event mapping regexes in zenpack.yaml and rank them by cost per match")
+        group.add_option("--process-samples",
+                    dest="process_samples",
+                    help="file of process command lines, one per line, to time --analyze-regex process class regexes against")
+        group.add_option("--event-samples",
+                    dest="event_samples",
+                    help="file of event messages, one per line, to time --analyze-regex event mapping regexes against")
+        group.add_option("--regex-timeout",
+                    dest="regex_timeout",
+                    type="int",
+                    default=10,
+                    help="seconds before --analyze-regex gives up timing a regex (default: %default)")
+        group.add_option("--benchmark",
+                    dest="benchmark",
+                    action="store_true",
+                    help="print JSON timing and peak memory for each stage of loading zenpack.yaml or a directory of YAML files")
+        group.add_option("--repeat",
+                    dest="repeat",
+                    type="int",
+                    default=5,
+                    help="number of times --benchmark runs each stage (default: %default)")
+        group.add_option("--compare",
+                    dest="compare",
+                    help="--benchmark JSON file to compare with, exiting with an error on regressions")
+        group.add_option("--tolerance",
+                    dest="tolerance",
+                    type="float",
+                    default=0.1,
+                    help="fraction a --benchmark stage can grow by before --compare reports a regression (default: %default)")
+
+        self.parser.add_option_group(group)
+
+        group = OptionGroup(self.parser, "ZenPack Maintenance")
+        group.add_option("--repair-counts",
+                    dest="repair_counts",
+                    action="store_true",
+                    help="recompute relationship counters for a given device's components")
+        group.add_option("--check-catalogs",
+                    dest="check_catalogs",
+                    action="store_true",
+                    help="compare a given device's catalog entries with its components")
+        group.add_option("--repair",
+                    dest="repair",
+                    action="store_true",
+                    help="repair problems found by --check-catalogs")
+        group.add_option("--stats",
+                    dest="stats",
+                    action="store_true",
+                    help="report instance counts, relationship fan-out, facets, templates and catalog sizes per class for a given device")
+        group.add_option("--sample",
+                    dest="sample",
+                    type="int",
+                    default=0,
+                    help="with --stats --all, only collect statistics for this many randomly chosen devices (default: all)")
+        group.add_option("--workers",
+                    dest="workers",
+                    type="int",
+                    default=4,
+                    help="number of worker processes for --check-catalogs, --stats and --build-relations (default: %default)")
+        group.add_option("--checkpoint",
+                    dest="checkpoint",
+                    help="file recording completed devices so that --check-catalogs or --build-relations can resume")
+        group.add_option("--reindex-catalogs",
+                    dest="reindex_catalogs",
+                    action="store_true",
+                    help="reindex a given ZenPack's global catalogs in committed batches")
+        group.add_option("--build-relations",
+                    dest="build_relations",
+                    action="store_true",
+                    help="add a given ZenPack's relationships to existing devices in committed batches")
+        group.add_option("--batch-size",
+                    dest="batch_size",
+                    type="int",
+                    default=1000,
+                    help="number of objects per batch (default: %default)")
+        group.add_option("--all",
+                    dest="all_devices",
+                    action="store_true",
+                    help="apply device maintenance to all devices instead of a given device")
 
         self.parser.add_option_group(group)
 
@@ -145,11 +248,13 @@ class ZPLCommand(ZenScriptBase):
         self.options.device = None
         # check that necessary options are supplied
         # requires filename
-        if len(self.args) != 1:
+        if len(self.args) != 1 and not self.options.all_devices:
             self.parser.print_help()
             self.parser.exit(1)
 
-        if self.options.lint or self.options.diagram or self.options.optimize:
+        if self.options.lint or self.options.diagram or self.options.optimize or\
+           self.options.plan or self.options.analyze_regex or\
+           self.options.benchmark:
 
             self.parser.usage = "%prog [options] FILENAME"
             if len(self.args) != 1:
@@ -159,11 +264,13 @@ class ZPLCommand(ZenScriptBase):
             self.options.filename = self.args[0]
             # check validity of file
             is_valid, msg = self.is_valid_file()
-            if not is_valid:
+            if not is_valid and not (
+                    self.options.benchmark and os.path.isdir(self.options.filename)):
                 self.parser.error(msg)
 
         if self.options.dump or self.options.create or\
-           self.options.dump_event_classes or self.options.dump_process_classes:
+           self.options.dump_event_classes or self.options.dump_process_classes or\
+           self.options.reindex_catalogs or self.options.build_relations:
             self.parser.usage = "%prog [options] ZENPACKNAME"
             if len(self.args) != 1:
                 self.parser.error('No ZenPack given')
@@ -176,9 +283,18 @@ class ZPLCommand(ZenScriptBase):
                 self.parser.error('No device given')
             self.options.device = self.args[0]
 
+        if self.options.repair_counts or self.options.check_catalogs or\
+           self.options.stats:
+            self.parser.usage = "%prog [options] DEVICE|--all"
+            if not self.options.all_devices:
+                if len(self.args) != 1:
+                    self.parser.error('No device given')
+                self.options.device = self.args[0]
+
     def run(self):
         """run the specified function"""
-        if self.options.dump:
+        if self.options.dump or self.options.reindex_catalogs or\
+           self.options.build_relations:
             if not self.is_valid_zenpack():
                 self.parser.error('{} was not found'.format(self.options.zenpack))
 
@@ -195,11 +311,35 @@ class ZPLCommand(ZenScriptBase):
             self.optimize(self.options.filename)
 
         elif self.options.diagram:
-            self.class_diagram('yuml', self.options.filename)
+            self.class_diagram(self.options.diagram_format, self.options.filename)
 
         elif self.options.paths:
             self.list_paths()
 
+        elif self.options.plan:
+            self.plan_install(self.options.filename)
+
+        elif self.options.analyze_regex:
+            self.analyze_regex(self.options.filename)
+
+        elif self.options.benchmark:
+            self.benchmark(self.options.filename)
+
+        elif self.options.repair_counts:
+            self.repair_relationship_counts()
+
+        elif self.options.reindex_catalogs:
+            self.reindex_catalogs(self.options.zenpack)
+
+        elif self.options.check_catalogs:
+            self.check_catalogs()
+
+        elif self.options.stats:
+            self.model_stats()
+
+        elif self.options.build_relations:
+            self.build_relations(self.options.zenpack)
+
         elif self.options.dump_event_classes:
             self.dump_event_classes(self.options.zenpack)
 
@@ -334,112 +474,490 @@ class ZPLCommand(ZenScriptBase):
     def dump_templates(self, zenpack_name):
         ''''''
         self.connect()
+        zenpack = self.get_zenpack(zenpack_name)
+        if zenpack is None:
+            return
 
-        templates = self.zenpack_templatespecs(zenpack_name)
-        if templates:
-            zpsp = ZenPackSpecParams(
-                zenpack_name,
-                device_classes={x: {} for x in templates})
+        def specs():
+            for dc_name, templates in self.iter_templatespecs(zenpack):
+                zpsp = ZenPackSpecParams(
+                    zenpack_name, device_classes={dc_name: {}})
+                zpsp.device_classes[dc_name].templates = templates
+                yield dc_name, zpsp.device_classes[dc_name]
 
-            for dc_name in templates:
-                zpsp.device_classes[dc_name].templates = templates[dc_name]
+        self.dump_specs(zenpack_name, 'device_classes', specs())
 
-            print yaml.dump(zpsp, Dumper=Dumper)
+    def dump_specs(self, zenpack_name, section, specs):
+        """Write YAML for specs, one at a time, as they're generated.
+
+        specs is an iterable of (name, spec) for section of the ZenPack.
+        The YAML is printed as one document, or written to one file per
+        spec if --output-dir is given. Nothing is written if there are no
+        specs.
+
+        """
+        from ..helpers.StreamDumper import StreamDumper, dump_split
+
+        if self.options.output_dir:
+            filenames = dump_split(
+                self.options.output_dir, zenpack_name, section, specs)
+            self.LOG.info("Wrote {} files to {}".format(
+                len(filenames), self.options.output_dir))
+            return
+
+        specs = iter(specs)
+        try:
+            first = next(specs)
+        except StopIteration:
+            return
+
+        with StreamDumper(sys.stdout, zenpack_name, section) as dumper:
+            dumper.dump(*first)
+            for name, spec in specs:
+                dumper.dump(name, spec)
+
+    def get_zenpack(self, zenpack_name):
+        """Return installed ZenPack or None if it's not installed."""
+        zenpack = self.dmd.ZenPackManager.packs._getOb(zenpack_name, None)
+        if zenpack is None:
+            self.LOG.error("ZenPack '%s' not found.", zenpack_name)
+
+        return zenpack
 
     def class_diagram(self, diagram_type, filename):
-        ''''''
-        with open(filename, 'r') as stream:
-            CFG = yaml.load(stream, Loader=ZenPackSpecLoader)
+        """Print class diagram of the classes and relationships in filename.
+
+        Only the classes and class_relationships sections are read. See
+        ClassGraph.
+
+        """
+        graph = ClassGraph.load(filename)
 
         if diagram_type == 'yuml':
-            print "# Classes"
-            for cname in sorted(CFG.classes):
-                print "[{}]".format(cname)
-
-            print "\n# Inheritence"
-            for cname in CFG.classes:
-                cspec = CFG.classes[cname]
-                for baseclass in cspec.bases:
-                    if type(baseclass) != str:
-                        baseclass = aq_base(baseclass).__name__
-                    print "[{}]^-[{}]".format(baseclass, cspec.name)
-
-            print "\n# Containing Relationships"
-            for crspec in CFG.class_relationships:
-                if crspec.cardinality == '1:MC':
-                    print "[{}]++{}-{}[{}]".format(
-                        crspec.left_class, crspec.left_relname,
-                        crspec.right_relname, crspec.right_class)
-
-            print "\n# Non-Containing Relationships"
-            for crspec in CFG.class_relationships:
-                if crspec.cardinality == '1:1':
-                    print "[{}]{}-.-{}[{}]".format(
-                        crspec.left_class, crspec.left_relname,
-                        crspec.right_relname, crspec.right_class)
-                if crspec.cardinality == '1:M':
-                    print "[{}]{}-.-{}++[{}]".format(
-                        crspec.left_class, crspec.left_relname,
-                        crspec.right_relname, crspec.right_class)
-                if crspec.cardinality == 'M:M':
-                    print "[{}]++{}-.-{}++[{}]".format(
-                        crspec.left_class, crspec.left_relname,
-                        crspec.right_relname, crspec.right_class)
+            print graph.to_yuml()
+        elif diagram_type == 'dot':
+            print graph.to_dot()
+        elif diagram_type == 'json':
+            import json
+            print json.dumps(graph.to_json(), indent=2)
         else:
             DEFAULTLOG.error("Diagram type '{}' is not supported.".format(diagram_type))
 
+    def plan_install(self, filename):
+        """Print what installing the ZenPack in filename would change.
+
+        Nothing is committed. See ZenPack.plan_install.
+
+        """
+        import json
+
+        cfg = load_yaml(filename)
+        self.connect()
+
+        zenpack = cfg.zenpack_module.schema.ZenPack(cfg.name)
+        plan = zenpack.plan_install(self.dmd.getPhysicalRoot())
+        transaction.abort()
+
+        print json.dumps(plan, indent=2, sort_keys=True)
+
+    def analyze_regex(self, filename):
+        """Print risky regexes in filename, ranked by cost per match.
+
+        Regexes are timed against the bundled samples unless
+        --process-samples or --event-samples give files to use instead.
+
+        """
+        from ..regexcheck import RegexAnalyzer, get_patterns
+
+        def read_samples(samples_filename):
+            if not samples_filename:
+                return None
+            with open(samples_filename) as samples_file:
+                return [x.rstrip('\n') for x in samples_file]
+
+        cfg = load_yaml_single(filename)
+        analyzer = RegexAnalyzer(
+            process_samples=read_samples(self.options.process_samples),
+            event_samples=read_samples(self.options.event_samples),
+            timeout=self.options.regex_timeout)
+
+        results = analyzer.analyze(get_patterns(cfg))
+        if not results:
+            print "No process class or event class mapping patterns found."
+            return
+
+        risky = [x for x in results if x['risks']]
+        print "# Risks ({} of {} patterns)".format(len(risky), len(results))
+        for result in risky:
+            print "{kind} {name} {field}: {pattern}".format(**result)
+            for risk in result['risks']:
+                print "    {}".format(risk)
+
+        print "\n# Cost per match"
+        print "{:>12} {:>9}  {}".format('usec/match', 'matches', 'pattern')
+        for result in results:
+            if result['timed_out']:
+                cost, matches = 'timeout', '-'
+            elif result['seconds'] is None:
+                continue
+            else:
+                cost = '{:.1f}'.format(result['seconds_per_match'] * 1e6)
+                matches = '{}/{}'.format(result['matches'], result['samples'])
+
+            print "{:>12} {:>9}  {kind} {name} {field}: {pattern}".format(
+                cost, matches, **result)
+
+    def benchmark(self, filename):
+        """Print JSON timing each stage of loading filename.
+
+        With --compare, exit with an error if any stage regressed from the
+        given results of an earlier run. See benchmark.Benchmark.
+
+        """
+        import json
+        from ..benchmark import Benchmark, compare
+
+        results = Benchmark(filename, repeat=max(self.options.repeat, 1)).run()
+        print json.dumps(results, indent=2)
+
+        if not self.options.compare:
+            return
+
+        with open(self.options.compare, 'r') as baseline_file:
+            baseline = json.load(baseline_file)
+
+        regressions = compare(results, baseline, self.options.tolerance)
+        for regression in regressions:
+            self.LOG.error(
+                "{stage} {metric} regressed from {baseline} to {current}".format(
+                    **regression))
+
+        if regressions:
+            sys.exit(1)
+
+        self.LOG.info(
+            "No regressions from {} (zenpacklib {})".format(
+                self.options.compare, baseline.get('zenpacklib')))
+
     def list_paths(self):
-        ''''''
+        """Print facet paths from a device's components as they're found.
+
+        Each component is traversed once. Paths are printed the first time
+        they're found from a component of each class, followed by a summary
+        for each component class.
+
+        """
         self.connect()
         device = self.dmd.Devices.findDevice(self.options.device)
         if device is None:
             DEFAULTLOG.error("Device '{}' not found.".format(self.options.device))
             return
 
-        from Acquisition import aq_chain
-        from Products.ZenRelations.RelationshipBase import RelationshipBase
+        from ..base.ComponentBase import ComponentBase
 
-        all_paths = set()
-        included_paths = set()
-        class_summary = collections.defaultdict(set)
+        if self.options.component_class:
+            components = device.getDeviceComponents(
+                type=self.options.component_class)
+        elif hasattr(device, 'getDeviceComponentsNoIndexGen'):
+            components = device.getDeviceComponentsNoIndexGen()
+        else:
+            components = device.getDeviceComponents()
 
-        for component in device.getDeviceComponents():
-            for facet in component.get_facets(recurse_all=True):
-                path = []
-                for obj in aq_chain(facet):
-                    if obj == component:
-                        break
-                    if isinstance(obj, RelationshipBase):
-                        path.insert(0, obj.id)
-                all_paths.add(component.meta_type + ":" + "/".join(path) + ":" + facet.meta_type)
-
-            for facet in component.get_facets():
-                path = []
-                for obj in aq_chain(facet):
-                    if obj == component:
-                        break
-                    if isinstance(obj, RelationshipBase):
-                        path.insert(0, obj.id)
-                all_paths.add(component.meta_type + ":" + "/".join(path) + ":" + facet.meta_type)
-                included_paths.add(component.meta_type + ":" + "/".join(path) + ":" + facet.meta_type)
-                class_summary[component.meta_type].add(facet.meta_type)
+        printed = set()
+        # {component class: Counter of components, visits, paths and seconds}
+        class_stats = collections.defaultdict(collections.Counter)
+        class_summary = collections.defaultdict(set)
 
         print "Paths\n-----\n"
-        for path in sorted(all_paths):
-            if path in included_paths:
-                if "/" not in path:
+        for component in components:
+            if not isinstance(component, ComponentBase):
+                continue
+
+            stats = class_stats[component.meta_type]
+            stats['components'] += 1
+            start = time.time()
+            for relnames, facet, included in component.walk_facets():
+                stats['visits'] += 1
+                if included:
+                    class_summary[component.meta_type].add(facet.meta_type)
+
+                path = "{}:{}:{}".format(
+                    component.meta_type, "/".join(relnames), facet.meta_type)
+                if path in printed:
+                    continue
+
+                printed.add(path)
+                stats['paths'] += 1
+                if not included:
+                    print "EXCLUDE " + path
+                elif len(relnames) == 1:
                     # normally all direct relationships are included
                     print "DIRECT  " + path
                 else:
                     # sometimes extra paths are pulled in due to extra_paths
                     # configuration.
                     print "EXTRA   " + path
-            else:
-                print "EXCLUDE " + path
+
+                if self.options.limit and len(printed) >= self.options.limit:
+                    break
+
+            stats['seconds'] += time.time() - start
+            if self.options.limit and len(printed) >= self.options.limit:
+                print "\nStopped after {} paths.".format(len(printed))
+                break
 
         print "\nClass Summary\n-------------\n"
-        for source_class in sorted(class_summary.keys()):
-            print "{} is reachable from {}".format(source_class, ", ".join(sorted(class_summary[source_class])))
+        for source_class in sorted(class_stats):
+            stats = class_stats[source_class]
+            print "{}: {} components, {} objects visited, {} paths, {:.2f}s".format(
+                source_class, stats['components'], stats['visits'],
+                stats['paths'], stats['seconds'])
+            if class_summary[source_class]:
+                print "    reaches {}".format(
+                    ", ".join(sorted(class_summary[source_class])))
+
+    def get_devices(self):
+        """Return iterable of devices given by DEVICE or --all."""
+        if self.options.all_devices:
+            return self.dmd.Devices.getSubDevicesGen()
+
+        device = self.dmd.Devices.findDevice(self.options.device)
+        if device is None:
+            DEFAULTLOG.error("Device '{}' not found.".format(self.options.device))
+            return []
+
+        return [device]
+
+    def repair_relationship_counts(self):
+        """Recompute maintained relationship counters."""
+        self.connect()
+        from ..base.ComponentBase import ComponentBase
+
+        devices = components = changed = 0
+        for device in self.get_devices():
+            devices += 1
+            for component in device.getDeviceComponents():
+                if not isinstance(component, ComponentBase):
+                    continue
+
+                components += 1
+                if component.update_relationship_counts():
+                    changed += 1
+
+            transaction.commit()
+
+        self.LOG.info(
+            "Repaired relationship counters on {} of {} components "
+            "({} devices)".format(changed, components, devices))
+
+    def run_batches(self, paths, worker_fn, local_fn, batch_size,
+                    initializer=None, initargs=()):
+        """Generate results of processing device paths in batches.
+
+        paths are split into batches of at most batch_size devices from
+        one device class. With more than one --workers, each batch is
+        passed to worker_fn in a pool of worker processes started with
+        initializer(*initargs). Workers open their own connections, so
+        this process's transaction is aborted and its connection closed
+        first. Otherwise each batch is passed to local_fn in this process.
+
+        Results are generated as batches complete.
+
+        """
+        from ..devicerelations import get_batches
+
+        batches = get_batches(paths, max(1, batch_size))
+        workers = max(1, min(self.options.workers, len(batches)))
+        if workers == 1:
+            for batch in batches:
+                yield local_fn(batch)
+
+            return
+
+        import multiprocessing
+
+        transaction.abort()
+        self.db.close()
+
+        pool = multiprocessing.Pool(
+            workers, initializer=initializer, initargs=initargs)
+
+        try:
+            for result in pool.imap_unordered(worker_fn, batches):
+                yield result
+        except BaseException:
+            # Including GeneratorExit if results are abandoned.
+            pool.terminate()
+            raise
+        else:
+            pool.close()
+        finally:
+            pool.join()
+
+    def check_catalogs(self):
+        """Check, and optionally repair, device and global catalogs."""
+        from ..catalogcheck import CatalogChecker, check_paths, init_worker
+        from ..helpers.Checkpoint import Checkpoint
+
+        self.connect()
+        paths = [x.getPrimaryId() for x in self.get_devices()]
+
+        checkpoint = None
+        if self.options.checkpoint:
+            checkpoint = Checkpoint(self.options.checkpoint)
+            if len(checkpoint):
+                self.LOG.info(
+                    "Skipping {} devices completed according to {}".format(
+                        len(checkpoint), self.options.checkpoint))
+                paths = [x for x in paths if x not in checkpoint]
+
+        checker = CatalogChecker(self.dmd, repair=self.options.repair)
+
+        def check_batch(batch):
+            start = time.time()
+            stats = checker.check_paths(batch)
+            return os.getpid(), batch, dict(stats), time.time() - start
+
+        results = self.run_batches(
+            paths, check_paths, check_batch,
+            batch_size=min(self.options.batch_size, 100),
+            initializer=init_worker,
+            initargs=(self.options.repair,))
+
+        totals = collections.Counter()
+        worker_stats = collections.defaultdict(collections.Counter)
+        worker_seconds = collections.defaultdict(float)
+        for pid, batch, stats, seconds in results:
+            totals.update(stats)
+            worker_stats[pid].update(stats)
+            worker_seconds[pid] += seconds
+            if checkpoint:
+                checkpoint.add(batch)
+
+            self.LOG.info("Checked {} of {} devices".format(
+                totals['devices'], len(paths)))
+
+        for pid in sorted(worker_stats):
+            stats, seconds = worker_stats[pid], worker_seconds[pid]
+            self.LOG.info(
+                "Worker {}: {} devices, {} components in {:.1f}s "
+                "({:.1f} components/s)".format(
+                    pid, stats['devices'], stats['components'], seconds,
+                    stats['components'] / seconds if seconds else 0))
+
+        self.LOG.info(
+            "Checked {} components on {} devices: {} missing, {} stale, "
+            "{} extra, {} repaired".format(
+                totals['components'], totals['devices'], totals['missing'],
+                totals['stale'], totals['extra'], totals['repaired']))
+
+    def model_stats(self):
+        """Print model size statistics per class for DEVICE or --all.
+
+        Devices are collected in batches, using worker processes if
+        --workers is greater than 1. See modelstats.ModelStats.
+
+        """
+        import random
+        from ..modelstats import (
+            ModelStats, format_report, init_worker, stats_paths)
+
+        self.connect()
+        start = time.time()
+        paths = [x.getPrimaryId() for x in self.get_devices()]
+        if 0 < self.options.sample < len(paths):
+            paths = random.sample(paths, self.options.sample)
+
+        def stats_batch(batch):
+            start = time.time()
+            stats = ModelStats(self.dmd)
+            stats.add_paths(batch)
+            return os.getpid(), batch, stats, time.time() - start
+
+        totals = ModelStats()
+        for pid, batch, stats, seconds in self.run_batches(
+                paths, stats_paths, stats_batch,
+                batch_size=min(self.options.batch_size, 100),
+                initializer=init_worker):
+            totals.update(stats)
+            self.LOG.info("Collected statistics for {} of {} devices".format(
+                totals.devices, len(paths)))
+
+        self.LOG.info("Collected statistics for {} devices ({:.1f}s)".format(
+            totals.devices, time.time() - start))
+
+        for line in format_report(totals):
+            print line
+
+    def reindex_catalogs(self, zenpack_name):
+        """Create and reindex a ZenPack's global catalogs."""
+        zenpack = self.dmd.ZenPackManager.packs._getOb(zenpack_name)
+        if not hasattr(zenpack, 'update_global_catalogs'):
+            self.LOG.error(
+                "{} does not have zenpacklib catalogs".format(zenpack_name))
+            return
+
+        zenpack.update_global_catalogs(
+            self.dmd.getPhysicalRoot(),
+            batch=self.options.batch_size,
+            commit=True)
+
+    def build_relations(self, zenpack_name):
+        """Build a ZenPack's relationships on existing devices.
+
+        Devices are processed in batches of one device class each, using
+        worker processes if --workers is greater than 1.
+
+        """
+        from ..devicerelations import (
+            build_paths, build_relations, get_device_paths, init_worker)
+        from ..helpers.Checkpoint import Checkpoint
+
+        zenpack = self.dmd.ZenPackManager.packs._getOb(zenpack_name)
+        paths = get_device_paths(
+            self.dmd, getattr(zenpack, 'NEW_RELATIONS', None))
+
+        checkpoint = None
+        if self.options.checkpoint:
+            checkpoint = Checkpoint(self.options.checkpoint)
+            if len(checkpoint):
+                self.LOG.info(
+                    "Skipping {} devices completed according to {}".format(
+                        len(checkpoint), self.options.checkpoint))
+                paths = [x for x in paths if x not in checkpoint]
+
+        def build_batch(batch):
+            start = time.time()
+            count = build_relations(
+                self.dmd, batch, batch=len(batch), commit=True, log=self.LOG)
+            return os.getpid(), batch, count, time.time() - start
+
+        start = time.time()
+        count = 0
+        worker_counts = collections.Counter()
+        worker_seconds = collections.defaultdict(float)
+        for pid, batch, batch_count, seconds in self.run_batches(
+                paths, build_paths, build_batch,
+                batch_size=self.options.batch_size,
+                initializer=init_worker,
+                initargs=(zenpack_name,)):
+            count += batch_count
+            worker_counts[pid] += batch_count
+            worker_seconds[pid] += seconds
+            if checkpoint:
+                checkpoint.add(batch)
+
+            self.LOG.info("Built relationships on {} of {} devices".format(
+                count, len(paths)))
+
+        if len(worker_counts) > 1:
+            for pid in sorted(worker_counts):
+                self.LOG.info("Worker {}: {} devices in {:.1f}s".format(
+                    pid, worker_counts[pid], worker_seconds[pid]))
+
+        self.LOG.info(
+            "Finished building {} relationships on {} devices ({:.1f}s)".format(
+                zenpack_name, len(paths), time.time() - start))
 
     def zenpack_templatespecs(self, zenpack_name):
         """Return dictionary of RRDTemplateSpecParams by device_class.
@@ -458,11 +976,19 @@ class ZPLCommand(ZenScriptBase):
 
         """
         self.connect()
-        zenpack = self.dmd.ZenPackManager.packs._getOb(zenpack_name, None)
+        zenpack = self.get_zenpack(zenpack_name)
         if zenpack is None:
-            DEFAULTLOG.error("ZenPack '{}' not found.".format(zenpack_name))
             return
 
+        return collections.defaultdict(dict, self.iter_templatespecs(zenpack))
+
+    def iter_templatespecs(self, zenpack):
+        """Generate (device class name, {template id: RRDTemplateSpecParams}).
+
+        Specs are only created for one device class at a time, and the
+        ZODB cache is trimmed after each.
+
+        """
         # Find explicitly associated templates, and templates implicitly
         # associated through an explicitly associated device class.
         from Products.ZenModel.DeviceClass import DeviceClass
@@ -478,79 +1004,96 @@ class ZPLCommand(ZenScriptBase):
         # Only create specs for templates that have an associated device
         # class. This prevents locally-overridden templates from being
         # included.
-        specs = collections.defaultdict(dict)
+        by_device_class = collections.defaultdict(list)
         for template in templates:
             deviceClass = template.deviceClass()
             if deviceClass:
-                dc_name = deviceClass.getOrganizerName()
-                spec = RRDTemplateSpecParams.fromObject(template)
-                specs[dc_name][template.id] = spec
+                by_device_class[deviceClass.getOrganizerName()].append(template)
 
-        return specs
+        del templates
+        for dc_name in sorted(by_device_class):
+            yield dc_name, {
+                x.id: RRDTemplateSpecParams.fromObject(x)
+                for x in by_device_class.pop(dc_name)}
+
+            self.dmd._p_jar.cacheGC()
 
     def dump_event_classes(self, zenpack_name):
         self.connect()
-        eventclasses = self.zenpack_eventclassspecs(zenpack_name)
-        if eventclasses:
-            zpsp = ZenPackSpecParams(zenpack_name,
-                                     event_classes={x: {} for x in eventclasses})
-            for ec_name in eventclasses:
-                zpsp.event_classes[ec_name] = eventclasses[ec_name]
-                zpsp.event_classes[ec_name].mappings = eventclasses[ec_name].mappings
+        zenpack = self.get_zenpack(zenpack_name)
+        if zenpack is None:
+            return
+
+        def specs():
+            for ec_name, ec_spec in self.iter_eventclassspecs(zenpack):
+                zpsp = ZenPackSpecParams(
+                    zenpack_name, event_classes={ec_name: {}})
+                zpsp.event_classes[ec_name] = ec_spec
+                yield ec_name, zpsp.event_classes[ec_name]
 
-            print yaml.dump(zpsp, Dumper=Dumper)
+        self.dump_specs(zenpack_name, 'event_classes', specs())
 
     def zenpack_eventclassspecs(self, zenpack_name):
-        zenpack = self.dmd.ZenPackManager.packs._getOb(zenpack_name, None)
+        zenpack = self.get_zenpack(zenpack_name)
         if zenpack is None:
-            self.LOG.error("ZenPack '%s' not found." % zenpack_name)
             return
 
-        eventclasses = collections.defaultdict(dict)
-        for eventclass in [x for x in zenpack.packables() if x.meta_type == 'EventClass']:
+        return collections.defaultdict(dict, self.iter_eventclassspecs(zenpack))
+
+    def iter_eventclassspecs(self, zenpack):
+        """Generate (event class name, EventClassSpecParams) one at a time."""
+        packables = zenpack.packables()
+        seen = set()
+        for eventclass in [x for x in packables if x.meta_type == 'EventClass']:
             ec_name = eventclass.getDmdKey()
-            eventclasses[ec_name] = EventClassSpecParams.fromObject(eventclass, remove=True)
+            seen.add(ec_name)
+            yield ec_name, EventClassSpecParams.fromObject(eventclass, remove=True)
             for subclass in eventclass.getSubEventClasses():
                 # Remove = false because the removing the parent will remove the child # This is a performance optimization
-                eventclasses[ec_name] = EventClassSpecParams.fromObject(subclass, remove=False)
+                seen.add(subclass.getDmdKey())
+                yield subclass.getDmdKey(), EventClassSpecParams.fromObject(subclass, remove=False)
+
+            self.dmd._p_jar.cacheGC()
 
         # get list of instances associated with event classes not already seen
-        instances = [x for x in zenpack.packables() if x.meta_type == 'EventClassInst' and x.eventClass().getDmdKey() not in eventclasses]
+        instances = [x for x in packables if x.meta_type == 'EventClassInst' and x.eventClass().getDmdKey() not in seen]
         # list of unique event classes
         inst_evs = list({x.eventClass() for x in instances})
 
         for ev in inst_evs:
             ec_name = ev.getDmdKey()
             ev_spec = EventClassSpecParams.new(ec_name, remove=False)
-            ev_instances = [x for x in ev.instances() if x in zenpack.packables()]
+            ev_instances = [x for x in ev.instances() if x in packables]
             ev_spec.mappings = { x.id: EventClassMappingSpecParams.fromObject(x, remove=True) for x in ev_instances }
-            eventclasses[ec_name] = ev_spec
-
-        return eventclasses
+            yield ec_name, ev_spec
 
     def dump_process_classes(self, zenpack_name):
         self.connect()
-        processclasses = self.zenpack_processclassspecs(zenpack_name)
-        if processclasses:
-            zpsp = ZenPackSpecParams(zenpack_name,
-                                     process_class_organizers={x: {} for x in processclasses})
-            for pc_name in processclasses:
-                zpsp.process_class_organizers[pc_name].process_classes = processclasses[pc_name].process_classes
+        zenpack = self.get_zenpack(zenpack_name)
+        if zenpack is None:
+            return
 
-            print yaml.dump(zpsp, Dumper=Dumper)
+        def specs():
+            for pc_name, pc_spec in self.iter_processclassspecs(zenpack):
+                zpsp = ZenPackSpecParams(
+                    zenpack_name, process_class_organizers={pc_name: {}})
+                zpsp.process_class_organizers[pc_name].process_classes = pc_spec.process_classes
+                yield pc_name, zpsp.process_class_organizers[pc_name]
+
+        self.dump_specs(zenpack_name, 'process_class_organizers', specs())
 
     def zenpack_processclassspecs(self, zenpack_name):
-        zenpack = self.dmd.ZenPackManager.packs._getOb(zenpack_name, None)
+        zenpack = self.get_zenpack(zenpack_name)
         if zenpack is None:
-            self.LOG.error("ZenPack '%s' not found.", zenpack_name)
             return
 
-        processclasses = collections.defaultdict(dict)
+        return collections.defaultdict(dict, self.iter_processclassspecs(zenpack))
+
+    def iter_processclassspecs(self, zenpack):
+        """Generate (organizer name, ProcessClassOrganizerSpecParams) one at a time."""
         for processclassorg in [x for x in zenpack.packables() if x.meta_type == 'OSProcessOrganizer']:
-            pc_name = processclassorg.getDmdKey()
-            processclasses[pc_name] = ProcessClassOrganizerSpecParams.fromObject(processclassorg)
+            yield processclassorg.getDmdKey(), ProcessClassOrganizerSpecParams.fromObject(processclassorg)
             for subclass in processclassorg.getSubOrganizers():
-                pc_name = subclass.getDmdKey()
-                processclasses[pc_name] = ProcessClassOrganizerSpecParams.fromObject(subclass)
+                yield subclass.getDmdKey(), ProcessClassOrganizerSpecParams.fromObject(subclass)
 
-        return processclasses
+            self.dmd._p_jar.cacheGC()
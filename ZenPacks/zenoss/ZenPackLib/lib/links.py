@@ -8,7 +8,7 @@
 ##############################################################################
 
 import logging
-from .functions import catalog_search
+from .functions import catalog_records, load_objects
 
 log = logging.getLogger('zen.ZenPackLib')
 
@@ -55,15 +55,27 @@ class DeviceLinkProvider(object):
                         scope = self.device.device()
 
                 # use named catalog
-                results = catalog_search(scope, link_provider.catalog, **queries)
+                try:
+                    records = catalog_records(
+                        scope, link_provider.catalog,
+                        fields=('id', 'title'), **queries)
+                except KeyError:
+                    # Catalog has no title metadata. Load the objects.
+                    records = catalog_records(
+                        scope, link_provider.catalog, fields=(), **queries)
+                    titles = (
+                        (obj.getPrimaryUrlPath(), obj.titleOrId())
+                        for _, obj in load_objects(scope, records))
+                else:
+                    titles = (
+                        (x.getPath(), x.title or x.id) for x in records)
 
-                for brain in results:
-                    obj = brain.getObject()
+                for url, title in titles:
                     links.append(
                         '{}: <a href="{}">{}</a>'.format(
                             link_provider.link_title,
-                            obj.getPrimaryUrlPath(),
-                            obj.titleOrId()
+                            url,
+                            title
                         )
                     )
 
@@ -0,0 +1,99 @@
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+import collections
+import time
+
+from Products import Zuul
+from .helpers.ZenPackLibLog import DEFAULTLOG
+from .prefetch import RequestPrefetch
+
+
+class DatapointService(object):
+    """Bulk lookups of datapoint-backed property values.
+
+    Values for every datapoint-backed property of every given component
+    are retrieved with one metric query per distinct set of datapoints.
+    Components of the same class share the same set.
+
+    """
+
+    LOG = DEFAULTLOG
+
+    # Number of seconds to look back for the last value.
+    window = 1800
+
+    def __init__(self, dmd, facade=None):
+        self.dmd = dmd
+        self.facade = facade
+
+    def get_facade(self):
+        """Return metric facade."""
+        if self.facade is None:
+            self.facade = Zuul.getFacade('metric', self.dmd)
+        return self.facade
+
+    def get_values(self, components):
+        """Return {uuid: {datapoint: value}} for components.
+
+        The value for a component is None if its values could not be
+        retrieved.
+
+        """
+        groups = collections.defaultdict(list)
+        for component in components:
+            datapoints = getattr(component, '_datapoint_properties', None)
+            if datapoints:
+                groups[tuple(sorted(set(datapoints.values())))].append(component)
+
+        values = {}
+        for datapoints, group in groups.iteritems():
+            uuids = [x.getUUID() for x in group]
+            try:
+                results = self.get_facade().getMultiValues(
+                    group,
+                    list(datapoints),
+                    start=time.time() - self.window,
+                    returnSet='LAST')
+            except Exception as e:
+                self.LOG.debug("Unable to retrieve datapoint values: %s", e)
+                values.update(dict.fromkeys(uuids))
+                continue
+
+            for uuid in uuids:
+                values[uuid] = {
+                    k: self.last_value(v)
+                    for k, v in (results.get(uuid) or {}).iteritems()}
+
+        return values
+
+    @staticmethod
+    def last_value(value):
+        """Return last value of a series, or value if it's not a series."""
+        if isinstance(value, (list, tuple)):
+            return value[-1] if value else None
+        return value
+
+
+class DatapointPrefetch(RequestPrefetch):
+    """Request-scoped batch of datapoint-backed property values."""
+
+    REQUEST_KEY = '_zpl_datapoint_prefetch'
+
+    def __init__(self, dmd):
+        super(DatapointPrefetch, self).__init__(dmd)
+        self.service = DatapointService(dmd)
+
+    def register(self, obj):
+        """Add obj to the next batch if it has datapoint-backed properties."""
+        if getattr(obj, '_datapoint_properties', None):
+            super(DatapointPrefetch, self).register(obj)
+
+    def fetch(self, components):
+        """Return {uuid: {datapoint: value}} for components."""
+        return self.service.get_values(components)
@@ -0,0 +1,295 @@
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+import collections
+import itertools
+import os
+import time
+
+import transaction
+from Products.ZenRelations.RelSchema import ToMany
+
+from .base.ComponentBase import ComponentBase
+from .base.ModelBase import ModelBase
+from .helpers.ZenPackLibLog import DEFAULTLOG
+
+
+class Distribution(object):
+    """Mergeable histogram of integer values and where the maximum was.
+
+    Values are kept as counts of each value, so distributions from many
+    devices or worker processes can be merged without keeping every value.
+
+    """
+
+    def __init__(self):
+        self.counts = collections.Counter()
+        self.max = None
+        self.max_at = None
+
+    def add(self, value, where=None):
+        self.counts[value] += 1
+        if self.max is None or value > self.max:
+            self.max = value
+            self.max_at = where
+
+    def update(self, other):
+        self.counts.update(other.counts)
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+            self.max_at = other.max_at
+
+    def __len__(self):
+        return sum(self.counts.itervalues())
+
+    def percentile(self, percent):
+        """Return smallest value at or above percent of values."""
+        total = len(self)
+        if not total:
+            return None
+
+        rank = max(1, int(round(total * percent / 100.0)))
+        seen = 0
+        for value in sorted(self.counts):
+            seen += self.counts[value]
+            if seen >= rank:
+                return value
+
+        return self.max
+
+    def summary(self):
+        """Return dict of count, total, mean, p50, p90, p99, max and max_at."""
+        count = len(self)
+        total = sum(k * v for k, v in self.counts.iteritems())
+        return {
+            'count': count,
+            'total': total,
+            'mean': float(total) / count if count else None,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max,
+            'max_at': self.max_at,
+            }
+
+
+class ClassStats(object):
+    """Model size statistics for one zenpacklib class."""
+
+    def __init__(self):
+        # Instances per device.
+        self.instances = Distribution()
+
+        # Related objects per instance by relationship name.
+        self.fanout = collections.defaultdict(Distribution)
+
+        # Distinct objects from get_facets() per instance.
+        self.facets = Distribution()
+
+        # Bound templates per instance.
+        self.templates = Distribution()
+
+        # Device and global catalog ids instances are cataloged in.
+        self.device_catalogs = set()
+        self.global_catalogs = set()
+
+    def update(self, other):
+        self.instances.update(other.instances)
+        for relname, distribution in other.fanout.iteritems():
+            self.fanout[relname].update(distribution)
+
+        self.facets.update(other.facets)
+        self.templates.update(other.templates)
+        self.device_catalogs.update(other.device_catalogs)
+        self.global_catalogs.update(other.global_catalogs)
+
+
+class ModelStats(object):
+    """Collect per-class model statistics for devices.
+
+    For each zenpacklib device and component class this collects instance
+    counts per device, to-many relationship fan-out, get_facets() closure
+    sizes, bound template counts and the catalogs instances are in. Device
+    catalog sizes are collected per device, and global catalog sizes once.
+
+    ModelStats from different devices or processes can be merged with
+    update().
+
+    """
+
+    LOG = DEFAULTLOG
+
+    def __init__(self, dmd=None):
+        self.dmd = dmd
+        self.devices = 0
+        self.classes = collections.defaultdict(ClassStats)
+        self.device_catalogs = collections.defaultdict(Distribution)
+        self.global_catalogs = {}
+
+    def __getstate__(self):
+        # dmd can't be sent between processes.
+        state = self.__dict__.copy()
+        state['dmd'] = None
+        return state
+
+    def update(self, other):
+        self.devices += other.devices
+        for name, class_stats in other.classes.iteritems():
+            self.classes[name].update(class_stats)
+
+        for catalog_id, distribution in other.device_catalogs.iteritems():
+            self.device_catalogs[catalog_id].update(distribution)
+
+        self.global_catalogs.update(other.global_catalogs)
+
+    def add_paths(self, paths):
+        """Add statistics for devices given by path."""
+        self.dmd._p_jar.sync()
+        for path in paths:
+            try:
+                device = self.dmd.unrestrictedTraverse(path)
+            except (KeyError, AttributeError):
+                self.LOG.warning("Device %s no longer exists", path)
+                continue
+
+            self.add_device(device)
+
+            # Statistics don't need the device's objects after this.
+            self.dmd._p_jar.cacheGC()
+
+        transaction.abort()
+
+    def add_device(self, device):
+        """Add statistics for device and its components."""
+        self.devices += 1
+        device_path = device.getPrimaryId()
+        instances = collections.Counter()
+        device_catalogs = {}
+
+        if hasattr(device, 'getDeviceComponentsNoIndexGen'):
+            components = device.getDeviceComponentsNoIndexGen()
+        else:
+            components = device.getDeviceComponents()
+
+        for obj in itertools.chain([device], components):
+            if not isinstance(obj, ModelBase):
+                continue
+
+            class_stats = self.classes[obj.meta_type]
+            instances[obj.meta_type] += 1
+            uid = obj.getPrimaryId()
+
+            for relname, relschema in obj._relations:
+                if not isinstance(relschema, ToMany):
+                    continue
+
+                rel = getattr(obj, relname, None)
+                if rel is None:
+                    continue
+
+                try:
+                    count = rel.countObjects()
+                except Exception:
+                    count = len(rel())
+
+                class_stats.fanout[relname].add(count, uid)
+
+            if isinstance(obj, ComponentBase):
+                class_stats.facets.add(
+                    len(set(x.getPrimaryId() for x in obj.get_facets())), uid)
+
+            try:
+                templates = obj.getRRDTemplates()
+            except Exception:
+                templates = []
+
+            class_stats.templates.add(len(templates), uid)
+
+            for zcatalog in obj.get_device_catalogs(create=False):
+                if zcatalog is not None:
+                    class_stats.device_catalogs.add(zcatalog.id)
+                    device_catalogs[zcatalog.id] = zcatalog
+
+            if self.dmd is not None:
+                for zcatalog in obj.get_object_global_catalogs(self.dmd, create=False):
+                    if zcatalog is not None:
+                        class_stats.global_catalogs.add(zcatalog.id)
+                        if zcatalog.id not in self.global_catalogs:
+                            self.global_catalogs[zcatalog.id] = len(zcatalog)
+
+        for meta_type, count in instances.iteritems():
+            self.classes[meta_type].instances.add(count, device_path)
+
+        for catalog_id, zcatalog in device_catalogs.iteritems():
+            self.device_catalogs[catalog_id].add(len(zcatalog), device_path)
+
+
+def format_report(stats):
+    """Return lines of a text report of ModelStats, largest first."""
+    row = "{:<50} {:>8} {:>8} {:>8} {:>8}  {}"
+    header = row.format('', 'p50', 'p90', 'p99', 'max', 'max at')
+
+    def rows(distributions):
+        summaries = [(name, x.summary()) for name, x in distributions]
+        summaries.sort(key=lambda x: x[1]['max'], reverse=True)
+        for name, summary in summaries:
+            yield row.format(
+                name, summary['p50'], summary['p90'], summary['p99'],
+                summary['max'], summary['max_at'] or '')
+
+    classes = sorted(stats.classes.iteritems())
+    lines = ["# Instances per device ({} devices)".format(stats.devices), header]
+    lines.extend(rows((name, x.instances) for name, x in classes))
+
+    lines.extend(["", "# To-many relationship fan-out", header])
+    lines.extend(rows(
+        ("{}.{}".format(name, relname), distribution)
+        for name, x in classes
+        for relname, distribution in sorted(x.fanout.iteritems())
+        if distribution.max))
+
+    lines.extend(["", "# Facets per component", header])
+    lines.extend(rows((name, x.facets) for name, x in classes if len(x.facets)))
+
+    lines.extend(["", "# Templates per instance", header])
+    lines.extend(rows((name, x.templates) for name, x in classes))
+
+    lines.extend(["", "# Device catalog entries per device", header])
+    lines.extend(rows(sorted(stats.device_catalogs.iteritems())))
+
+    lines.extend(["", "# Global catalog entries"])
+    for catalog_id, size in sorted(
+            stats.global_catalogs.iteritems(), key=lambda x: x[1], reverse=True):
+        lines.append("{:<50} {:>8}  {}".format(
+            catalog_id, size, ", ".join(
+                name for name, x in classes if catalog_id in x.global_catalogs)))
+
+    return lines
+
+
+# dmd for the current worker process.
+_worker_dmd = None
+
+
+def init_worker():
+    """Connect to ZODB in a new worker process."""
+    global _worker_dmd
+    from Products.ZenUtils.ZenScriptBase import ZenScriptBase
+    _worker_dmd = ZenScriptBase(connect=True, noopts=True).dmd
+
+
+def stats_paths(paths):
+    """Collect statistics for devices in a worker process.
+
+    Returns (pid, paths, stats, seconds).
+
+    """
+    start = time.time()
+    stats = ModelStats(_worker_dmd)
+    stats.add_paths(paths)
+    return os.getpid(), paths, stats, time.time() - start
@@ -45,3 +45,35 @@ class GraphDefinitionSpecParams(SpecParams, GraphDefinitionSpec):
 
         return self
 
+    @classmethod
+    def fromSpec(cls, spec, graphdefinition, thresholds=None):
+        """Return params of graphdefinition once it's set from spec
+
+        graphdefinition is a new graph definition held in memory, not one
+        in ZODB. thresholds maps ids of the template's thresholds to their
+        dsnames, from which includeThresholds is worked out.
+        """
+        spec.set_properties(graphdefinition)
+        self = cls.fromObject(graphdefinition)
+
+        if spec.comments:
+            self.comments = list(spec.comments)
+
+        for graphpoint_id, graphpoint_spec in spec.graphpoints.iteritems():
+            self.graphpoints[graphpoint_id] = GraphPointSpecParams.fromSpec(
+                graphpoint_spec, DataPointGraphPoint(graphpoint_id),
+                graphdefinition)
+
+        # Thresholds for the datapoint of each graphpoint that includes
+        # them are added to the graph, as addThresholdsForDataPoint does.
+        included = [
+            dsnames for dsnames in (thresholds or {}).itervalues()
+            if any(x.includeThresholds and x.dpName in dsnames
+                   for x in spec.graphpoints.itervalues())]
+
+        for graphpoint_id, graphpoint_spec in spec.graphpoints.iteritems():
+            self.graphpoints[graphpoint_id].includeThresholds = any(
+                graphpoint_spec.dpName in x for x in included)
+
+        return self
+
@@ -44,3 +44,12 @@ class GraphPointSpecParams(SpecParams, GraphPointSpec):
                         self.includeThresholds = True
 
         return self
+
+    @classmethod
+    def fromSpec(cls, spec, graphpoint, graphdefinition):
+        """Return params of graphpoint once it's set from spec
+
+        graphpoint is a new graphpoint held in memory, not one in ZODB.
+        """
+        spec.set_properties(graphpoint)
+        return cls.fromObject(graphpoint, graphdefinition)
@@ -105,3 +105,14 @@ class RRDDatapointSpecParams(SpecParams, RRDDatapointSpec):
 
         return self
 
+    @classmethod
+    def fromSpec(cls, spec, datapoint):
+        """Return params of datapoint once it's set from spec
+
+        datapoint is a new datapoint held in memory, not one in ZODB.
+        """
+        spec.set_properties(datapoint)
+        self = cls.fromObject(datapoint)
+        self.aliases = dict(spec.aliases)
+        return self
+
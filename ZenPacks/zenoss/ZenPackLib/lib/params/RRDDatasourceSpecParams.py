@@ -7,6 +7,7 @@
 #
 ##############################################################################
 from Acquisition import aq_base
+from Products.ZenModel.RRDDataPoint import RRDDataPoint
 from collections import OrderedDict
 from .SpecParams import SpecParams
 from ..spec.RRDDatasourceSpec import RRDDatasourceSpec
@@ -48,3 +49,27 @@ class RRDDatasourceSpecParams(SpecParams, RRDDatasourceSpec):
         self.datapoints = {x.id: RRDDatapointSpecParams.fromObject(x) for x in datasource.datapoints()}
 
         return self
+
+    @classmethod
+    def fromSpec(cls, spec, datasource, existing=None):
+        """Return params of datasource once it's set from spec
+
+        datasource is a new datasource held in memory, not one in ZODB.
+        Its datapoints are also held in memory. They have the class of the
+        same datapoint in existing if there is one.
+        """
+        datasource.sourcetype = spec.sourcetype
+        spec.set_properties(datasource)
+        self = cls.fromObject(datasource)
+
+        for datapoint_id, datapoint_spec in spec.datapoints.iteritems():
+            datapoint_class = RRDDataPoint
+            if existing is not None:
+                existing_datapoint = existing.datapoints._getOb(datapoint_id, None)
+                if existing_datapoint is not None:
+                    datapoint_class = aq_base(existing_datapoint).__class__
+
+            self.datapoints[datapoint_id] = RRDDatapointSpecParams.fromSpec(
+                datapoint_spec, datapoint_class(datapoint_id))
+
+        return self
@@ -7,6 +7,7 @@
 #
 ##############################################################################
 from Acquisition import aq_base
+from Products.ZenModel.GraphDefinition import GraphDefinition
 from .SpecParams import SpecParams
 from .RRDThresholdSpecParams import RRDThresholdSpecParams
 from .RRDDatasourceSpecParams import RRDDatasourceSpecParams
@@ -51,3 +52,45 @@ class RRDTemplateSpecParams(SpecParams, RRDTemplateSpec):
 
         return self
 
+    @classmethod
+    def fromSpec(cls, spec, template):
+        """Return params template would have if it were created from spec
+
+        Nothing is created or changed in ZODB. The template and its
+        thresholds, datasources, datapoints and graphs are new objects
+        held in memory, of the classes they'd be created with, that are
+        set from spec and read with fromObject. Threshold and datasource
+        classes are looked up from template.
+        """
+        sample_template = aq_base(template).__class__(template.id)
+        spec.set_properties(sample_template)
+        self = cls.fromObject(sample_template)
+
+        # Thresholds and datasources of invalid types are left out. They
+        # fail or are skipped when the template is created.
+        threshold_classes = dict((y, x) for x, y in template.getThresholdClasses())
+        dsnames = {}
+        for threshold_id, threshold_spec in spec.thresholds.iteritems():
+            threshold_class = threshold_classes.get(threshold_spec.type_)
+            if threshold_class:
+                threshold = threshold_class(threshold_id)
+                self.thresholds[threshold_id] = RRDThresholdSpecParams.fromSpec(
+                    threshold_spec, threshold)
+                dsnames[threshold_id] = threshold.dsnames
+
+        datasource_classes = {x.__name__: x for x in template.getDataSourceClasses()}
+        datasource_types = dict(template.getDataSourceOptions())
+        for datasource_id, datasource_spec in spec.datasources.iteritems():
+            type_ = datasource_types.get(datasource_spec.sourcetype)
+            datasource_class = datasource_classes.get((type_ or '').split('.')[0])
+            if datasource_class:
+                self.datasources[datasource_id] = RRDDatasourceSpecParams.fromSpec(
+                    datasource_spec, datasource_class(datasource_id),
+                    template.datasources._getOb(datasource_id, None))
+
+        for graph_id, graph_spec in spec.graphs.iteritems():
+            self.graphs[graph_id] = GraphDefinitionSpecParams.fromSpec(
+                graph_spec, GraphDefinition(graph_id), dsnames)
+
+        return self
+
@@ -38,3 +38,12 @@ class RRDThresholdSpecParams(SpecParams, RRDThresholdSpec):
 
         return self
 
+    @classmethod
+    def fromSpec(cls, spec, threshold):
+        """Return params of threshold once its properties are set from spec
+
+        threshold is a new threshold held in memory, not one in ZODB.
+        """
+        spec.set_properties(threshold)
+        return cls.fromObject(threshold)
+
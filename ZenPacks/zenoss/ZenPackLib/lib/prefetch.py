@@ -0,0 +1,121 @@
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+import abc
+
+from zope.globalrequest import getRequest
+
+
+class RequestPrefetch(object):
+    """Abstract base class for request-scoped batch lookups.
+
+    Objects are registered as their Info objects are created. The first
+    lookup for any object then fetches values for every registered
+    object at once. Subclasses must set REQUEST_KEY and implement fetch.
+
+    """
+
+    __metaclass__ = abc.ABCMeta
+
+    REQUEST_KEY = None
+
+    def __init__(self, dmd):
+        self.dmd = dmd
+        self.pending = {}
+        self.values = {}
+
+    @classmethod
+    def current(cls, dmd):
+        """Return prefetch for the current request, or None."""
+        request = getRequest()
+        if request is None:
+            return None
+
+        prefetch = request.get(cls.REQUEST_KEY, None)
+        if prefetch is None:
+            prefetch = cls(dmd)
+            request.set(cls.REQUEST_KEY, prefetch)
+
+        return prefetch
+
+    def register(self, obj):
+        """Add obj to the next batch."""
+        uuid = obj.getUUID()
+        if uuid not in self.values:
+            self.pending[uuid] = obj
+
+    def get(self, obj):
+        """Return prefetched value for obj."""
+        uuid = obj.getUUID()
+        if uuid not in self.values:
+            self.pending[uuid] = obj
+            self.values.update(self.fetch(self.pending.values()))
+            self.pending.clear()
+
+        return self.values.get(uuid)
+
+    @abc.abstractmethod
+    def fetch(self, objects):
+        """Return {uuid: value} for objects."""
+
+
+class RequestMemo(object):
+    """Request-scoped memo of computed values.
+
+    Used to avoid recomputing generated Info properties and marshaled
+    entities that are read many times while serializing a grid. The memo
+    is cleared once it reaches max_size entries to bound memory use.
+
+    """
+
+    REQUEST_KEY = '_zpl_request_memo'
+
+    # Maximum number of memoized values per request.
+    max_size = 20000
+
+    def __init__(self):
+        self.values = {}
+
+    @classmethod
+    def current(cls):
+        """Return memo for the current request, or None."""
+        request = getRequest()
+        if request is None:
+            return None
+
+        memo = request.get(cls.REQUEST_KEY, None)
+        if memo is None:
+            memo = cls()
+            request.set(cls.REQUEST_KEY, memo)
+
+        return memo
+
+    @classmethod
+    def invalidate(cls):
+        """Forget all values memoized in the current request."""
+        request = getRequest()
+        if request is None:
+            return
+
+        memo = request.get(cls.REQUEST_KEY, None)
+        if memo is not None:
+            memo.values.clear()
+
+    def get(self, key, compute):
+        """Return memoized value for key, calling compute if necessary."""
+        try:
+            return self.values[key]
+        except KeyError:
+            pass
+
+        value = compute()
+        if len(self.values) >= self.max_size:
+            self.values.clear()
+
+        self.values[key] = value
+        return value
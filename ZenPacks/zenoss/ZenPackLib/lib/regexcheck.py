@@ -0,0 +1,355 @@
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+import collections
+import multiprocessing
+import re
+import sre_constants
+import sre_parse
+import time
+
+# Process command lines as matched by process class regexes.
+PROCESS_SAMPLES = [
+    '/sbin/init',
+    '/usr/lib/systemd/systemd-journald',
+    '/usr/sbin/sshd -D',
+    'sshd: zenoss@pts/0',
+    '/usr/sbin/crond -n',
+    '/usr/sbin/rsyslogd -n',
+    '/usr/sbin/httpd -DFOREGROUND',
+    'nginx: worker process',
+    '/usr/bin/python /opt/zenoss/bin/zenhub.py --configfile /opt/zenoss/etc/zenhub.conf',
+    '/usr/bin/java -Xmx4g -Djava.awt.headless=true -cp /opt/app/lib/* org.example.Main --port 8080',
+    '/usr/lib/jvm/java/bin/java -server -XX:+UseG1GC -jar /opt/elasticsearch/lib/elasticsearch.jar',
+    '/usr/sbin/mysqld --basedir=/usr --datadir=/var/lib/mysql --plugin-dir=/usr/lib64/mysql/plugin',
+    'postgres: writer process',
+    'redis-server 127.0.0.1:6379',
+    '/usr/bin/memcached -u memcached -p 11211 -m 64 -c 1024',
+    '/usr/bin/dockerd -H fd://',
+    'bash',
+    'vim /etc/hosts',
+    'tail -f /var/log/messages',
+    'grep -r foo /var/log',
+    'C:\\Windows\\System32\\svchost.exe -k netsvcs',
+    'C:\\Program Files\\Microsoft SQL Server\\MSSQL\\Binn\\sqlservr.exe -sMSSQLSERVER',
+]
+
+# Event messages as matched by event class mapping regexes.
+EVENT_SAMPLES = [
+    'Interface GigabitEthernet0/1, changed state to down',
+    'Line protocol on Interface GigabitEthernet0/1, changed state to up',
+    'threshold of CPU Utilization exceeded: current value 97.00',
+    'Disk /var is 91% full',
+    'snmp agent down',
+    'Connection refused: localhost:8080',
+    'Device is not responding to ping',
+    'authentication failure; logname= uid=0 euid=0 tty=ssh ruser= rhost=10.1.2.3 user=root',
+    'Failed password for invalid user admin from 10.1.2.3 port 51234 ssh2',
+    'kernel: Out of memory: Kill process 1234 (java) score 900 or sacrifice child',
+    'Process not running: httpd',
+    'WMI query failed: timeout waiting for response',
+    'Service MSSQLSERVER entered the stopped state.',
+    '%LINK-3-UPDOWN: Interface FastEthernet0/24, changed state to down',
+    '%SYS-5-CONFIG_I: Configured from console by admin on vty0 (10.1.2.3)',
+    'BGP neighbor 10.0.0.1 Down BGP Notification sent',
+    'Power supply 2 failed',
+    'Temperature sensor 3 reading 82 C exceeds critical threshold 75 C',
+    'aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa!',
+    '',
+]
+
+REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+
+# Regex source of a pattern to analyze.
+Pattern = collections.namedtuple('Pattern', ['kind', 'name', 'field', 'pattern'])
+
+
+def get_patterns(cfg):
+    """Generate Pattern for each regex and rule in a ZenPackSpec.
+
+    Process class regexes are of kind "process". Event class mapping
+    regexes and rules are of kind "event". Empty patterns are skipped.
+
+    """
+    for psname, psspec in sorted(cfg.process_class_organizers.iteritems()):
+        for pcname, pcspec in sorted(psspec.process_classes.iteritems()):
+            for field in ('includeRegex', 'excludeRegex', 'replaceRegex'):
+                pattern = getattr(pcspec, field, None)
+                if pattern:
+                    yield Pattern(
+                        'process', '{}/{}'.format(psname, pcname), field, pattern)
+
+    for ecname, ecspec in sorted(cfg.event_classes.iteritems()):
+        for mapping_id, mapping_spec in sorted(ecspec.mappings.iteritems()):
+            for field in ('regex', 'rule'):
+                pattern = getattr(mapping_spec, field, None)
+                if pattern:
+                    yield Pattern(
+                        'event', '{}/{}'.format(ecname, mapping_id), field, pattern)
+
+
+def get_risks(pattern):
+    """Return sorted list of reasons pattern may be slow or fail.
+
+    Regular expressions are parsed, not run. Nested quantifiers such as
+    (a+)+, alternatives inside a repeat that can match the same text such
+    as (a|ab)*, and adjacent repeats that can match the same characters
+    such as .*.* can backtrack exponentially or polynomially on input that
+    almost matches.
+
+    """
+    try:
+        re.compile(pattern)
+        parsed = sre_parse.parse(pattern)
+    except (re.error, sre_constants.error, OverflowError,
+            RuntimeError, AssertionError) as e:
+        return ['does not compile: {}'.format(e)]
+
+    risks = set()
+    _find_risks(parsed, risks, False)
+    return sorted(risks)
+
+
+def get_rule_risks(rule):
+    """Return sorted list of reasons a mapping rule will fail."""
+    try:
+        compile(rule, '<rule>', 'eval')
+    except SyntaxError as e:
+        return ['rule does not compile: {}'.format(e)]
+
+    return []
+
+
+def _find_risks(subpattern, risks, repeated):
+    """Add risks for parsed subpattern to risks.
+
+    repeated is True if subpattern is inside an unbounded repeat.
+
+    """
+    items = list(subpattern)
+    for i, (op, av) in enumerate(items):
+        if op in REPEATS:
+            min_count, max_count, sub = av
+            unbounded = max_count >= sre_constants.MAXREPEAT
+            if repeated and max_count > 1:
+                risks.add('nested quantifier')
+
+            if unbounded and i + 1 < len(items):
+                next_op, next_av = items[i + 1]
+                if next_op in REPEATS and next_av[1] >= sre_constants.MAXREPEAT:
+                    if _overlap(_first_chars(sub), _first_chars(next_av[2])):
+                        risks.add('adjacent overlapping quantifiers')
+
+            _find_risks(sub, risks, repeated or unbounded)
+
+        elif op == sre_constants.BRANCH:
+            alternatives = av[1]
+            if repeated and _ambiguous(alternatives):
+                risks.add('ambiguous alternation')
+
+            for alternative in alternatives:
+                _find_risks(alternative, risks, repeated)
+
+        elif op == sre_constants.SUBPATTERN:
+            _find_risks(av[-1], risks, repeated)
+
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            _find_risks(av[1], risks, repeated)
+
+
+def _ambiguous(alternatives):
+    """Return True if more than one alternative can match the same text."""
+    firsts = []
+    for alternative in alternatives:
+        if _can_be_empty(alternative):
+            return True
+
+        chars = _first_chars(alternative)
+        for other in firsts:
+            if _overlap(chars, other):
+                return True
+
+        firsts.append(chars)
+
+    return False
+
+
+def _overlap(chars, other):
+    """Return True if first character sets intersect (None is any)."""
+    if chars is None or other is None:
+        return True
+
+    return bool(chars.intersection(other))
+
+
+def _can_be_empty(subpattern):
+    """Return True if subpattern can match an empty string."""
+    for op, av in subpattern:
+        if op in REPEATS:
+            if av[0] > 0 and not _can_be_empty(av[2]):
+                return False
+        elif op == sre_constants.SUBPATTERN:
+            if not _can_be_empty(av[-1]):
+                return False
+        elif op == sre_constants.BRANCH:
+            if not any(_can_be_empty(x) for x in av[1]):
+                return False
+        elif op not in (sre_constants.AT, sre_constants.ASSERT,
+                        sre_constants.ASSERT_NOT):
+            return False
+
+    return True
+
+
+def _first_chars(subpattern):
+    """Return set of character codes subpattern can start with.
+
+    None means any character, or that the set couldn't be determined.
+
+    """
+    for op, av in subpattern:
+        if op == sre_constants.LITERAL:
+            return set([av])
+
+        elif op == sre_constants.IN:
+            chars = set()
+            for in_op, in_av in av:
+                if in_op == sre_constants.LITERAL:
+                    chars.add(in_av)
+                elif in_op == sre_constants.RANGE:
+                    chars.update(xrange(in_av[0], in_av[1] + 1))
+                else:
+                    return None
+            return chars
+
+        elif op in REPEATS:
+            if av[0] == 0:
+                return None
+            return _first_chars(av[2])
+
+        elif op == sre_constants.SUBPATTERN:
+            return _first_chars(av[-1])
+
+        elif op == sre_constants.BRANCH:
+            chars = set()
+            for alternative in av[1]:
+                alternative_chars = _first_chars(alternative)
+                if alternative_chars is None:
+                    return None
+                chars.update(alternative_chars)
+            return chars
+
+        elif op == sre_constants.AT:
+            continue
+
+        return None
+
+    return set()
+
+
+def time_pattern(pattern, samples, repeat=10):
+    """Return (matches, seconds) for searching samples with pattern.
+
+    seconds is the average time to search all samples once.
+
+    """
+    search = re.compile(pattern).search
+    matches = sum(1 for x in samples if search(x))
+
+    start = time.time()
+    for _ in xrange(repeat):
+        for sample in samples:
+            search(sample)
+
+    return matches, (time.time() - start) / repeat
+
+
+class RegexAnalyzer(object):
+    """Find risky patterns and rank patterns by cost per match.
+
+    Each pattern is timed in a worker process that is killed after
+    timeout seconds, since a backtracking regex can't be interrupted.
+
+    """
+
+    def __init__(self, process_samples=None, event_samples=None,
+                 repeat=10, timeout=10):
+        self.samples = {
+            'process': process_samples or PROCESS_SAMPLES,
+            'event': event_samples or EVENT_SAMPLES,
+            }
+        self.repeat = repeat
+        self.timeout = timeout
+        self.pool = None
+
+    def analyze(self, patterns):
+        """Return list of result dicts, most expensive per match first.
+
+        Results have kind, name, field, pattern, risks, matches, samples,
+        seconds, seconds_per_match and timed_out. Timing keys are None for
+        rules, patterns that don't compile, and patterns that timed out.
+        Patterns that timed out are first.
+
+        """
+        results = []
+        try:
+            for pattern in patterns:
+                result = dict(pattern._asdict())
+                result.update(
+                    matches=None, seconds=None, seconds_per_match=None,
+                    timed_out=False, samples=len(self.samples[pattern.kind]))
+
+                if pattern.field == 'rule':
+                    result['risks'] = get_rule_risks(pattern.pattern)
+                    results.append(result)
+                    continue
+
+                result['risks'] = get_risks(pattern.pattern)
+                if not any(x.startswith('does not compile') for x in result['risks']):
+                    self.time(result)
+
+                results.append(result)
+        finally:
+            if self.pool:
+                self.pool.terminate()
+                self.pool = None
+
+        def cost(result):
+            if result['timed_out']:
+                return (2, 0)
+            if result['seconds'] is None:
+                return (0, 0)
+            return (1, result['seconds_per_match'])
+
+        return sorted(results, key=cost, reverse=True)
+
+    def time(self, result):
+        """Add timing to result, or a risk if it times out or fails."""
+        if not self.pool:
+            self.pool = multiprocessing.Pool(1)
+
+        async_result = self.pool.apply_async(
+            time_pattern,
+            (result['pattern'], self.samples[result['kind']], self.repeat))
+
+        try:
+            matches, seconds = async_result.get(self.timeout)
+        except multiprocessing.TimeoutError:
+            self.pool.terminate()
+            self.pool = None
+            result['timed_out'] = True
+            result['risks'].append(
+                'timed out after {}s'.format(self.timeout))
+            return
+        except Exception as e:
+            result['risks'].append('failed: {}'.format(e))
+            return
+
+        result['matches'] = matches
+        result['seconds'] = seconds
+        result['seconds_per_match'] = seconds / max(matches, 1)
@@ -40,6 +40,7 @@ class ClassPropertySpec(Spec):
             datapoint_default=None,
             datapoint_cached=True,
             index_scope='device',
+            index_metadata=False,
             _source_location=None,
             zplog=None,
             ):
@@ -97,6 +98,10 @@ class ClassPropertySpec(Spec):
             :type datapoint_cached: bool
             :param index_scope: TODO (enum)
             :type index_scope: str
+            :param index_metadata: Store the property's value as metadata in
+                   the catalogs given by index_scope so that searches can
+                   return it without loading objects.
+            :type index_metadata: bool
 
         """
         super(ClassPropertySpec, self).__init__(_source_location=_source_location)
@@ -110,6 +115,7 @@ class ClassPropertySpec(Spec):
         self.short_label = short_label or self.label
         self.index_type = index_type
         self.index_scope = index_scope
+        self.index_metadata = bool(index_metadata)
         self.label_width = label_width
         self.content_width = content_width or label_width
         self.display = display
@@ -189,6 +195,14 @@ class ClassPropertySpec(Spec):
                         'scope': self.index_scope},
             }
 
+    @property
+    def catalog_columns(self):
+        """Return catalog metadata columns dictionary."""
+        if not self.index_metadata:
+            return {}
+
+        return {self.name: self.index_scope}
+
     @property
     def iinfo_schemas(self):
         """Return IInfo attribute schema dict.
@@ -31,8 +31,9 @@ from ..functions import pluralize, get_symbol_name, relname_from_classname, \
 from ..base.Component import Component, HWComponent, Service
 from ..base.Device import Device
 from ..zuul import schema_map
+from ..metrics import DatapointPrefetch
 
-from .Spec import Spec, DeviceInfoStatusProperty, \
+from .Spec import Spec, DeviceInfoStatusProperty, InfoInit, \
     RelationshipInfoProperty, RelationshipGetter, RelationshipSetter
 from .ClassPropertySpec import ClassPropertySpec
 from .ClassRelationshipSpec import ClassRelationshipSpec
@@ -142,6 +143,7 @@ class ClassSpec(Spec):
             dynamicview_weight=None,
             dynamicview_relations=None,
             extra_paths=None,
+            global_catalog_shards=0,
             _source_location=None,
             zplog=None
             ):
@@ -211,6 +213,10 @@ class ClassSpec(Spec):
             :type dynamicview_relations: dict
             :param extra_paths: TODO
             :type extra_paths: list(ExtraPath)
+            :param global_catalog_shards: Number of catalogs to split this
+                   class's global catalog into, by device id. 0 for a single
+                   catalog. Reduces write conflicts on very large systems.
+            :type global_catalog_shards: int
 
         """
         super(ClassSpec, self).__init__(_source_location=_source_location)
@@ -359,6 +365,8 @@ class ClassSpec(Spec):
         else:
             self.extra_paths = []
 
+        self.global_catalog_shards = int(global_catalog_shards or 0)
+
     @property
     def scaled_order(self):
         return self.scale_order(scale=1, offset=5)
@@ -682,7 +690,11 @@ class ClassSpec(Spec):
         relations = []
         templates = []
         device_catalogs = {}
+        device_catalog_columns = {}
         global_catalogs = {}
+        global_catalog_columns = {}
+        global_catalog_shards = {}
+        datapoint_properties = {}
 
         # First inherit from bases.
         for base in self.resolved_bases:
@@ -692,8 +704,16 @@ class ClassSpec(Spec):
                 templates.extend(base._templates)
             if hasattr(base, '_device_catalogs'):
                 device_catalogs.update(base._device_catalogs)
+            if hasattr(base, '_device_catalog_columns'):
+                device_catalog_columns.update(base._device_catalog_columns)
             if hasattr(base, '_global_catalogs'):
                 global_catalogs.update(base._global_catalogs)
+            if hasattr(base, '_global_catalog_columns'):
+                global_catalog_columns.update(base._global_catalog_columns)
+            if hasattr(base, '_global_catalog_shards'):
+                global_catalog_shards.update(base._global_catalog_shards)
+            if hasattr(base, '_datapoint_properties'):
+                datapoint_properties.update(base._datapoint_properties)
 
         # Add local properties and catalog indexes.
         for name, spec in self.properties.iteritems():
@@ -704,7 +724,13 @@ class ClassSpec(Spec):
             elif spec.datapoint:
                 # Provide a method to look up the datapoint and get the value from rrd
                 def datapoint_method(self, default=spec.datapoint_default, cached=spec.datapoint_cached, datapoint=spec.datapoint):
-                    if cached:
+                    # Use values fetched in bulk for the current request.
+                    prefetch = DatapointPrefetch.current(self.dmd) if HAS_METRICFACADE else None
+                    values = prefetch.get(self) if prefetch is not None else None
+
+                    if values is not None:
+                        r = values.get(datapoint)
+                    elif cached:
                         r = self.cacheRRDValue(datapoint, default=default)
                     else:
                         if HAS_METRICFACADE:
@@ -718,6 +744,7 @@ class ClassSpec(Spec):
                     return default
 
                 attributes[name] = datapoint_method
+                datapoint_properties[name] = spec.datapoint
 
             else:
                 # api backendtype is 'method', and it is assumed that this
@@ -748,6 +775,21 @@ class ClassSpec(Spec):
                     else:
                         global_catalogs[self.name] = {index_name: index_type}
 
+            # Add catalog metadata columns. Catalogs are created for them
+            # even if the class has no indexes in that scope.
+            for column_name, column_scope in spec.catalog_columns.iteritems():
+                if column_scope in ('both', 'device'):
+                    device_catalogs.setdefault(self.name, {})
+                    device_catalog_columns[self.name] = tuple(sorted(
+                        set(device_catalog_columns.get(self.name, ())) |
+                        set([column_name])))
+
+                if column_scope in ('both', 'global'):
+                    global_catalogs.setdefault(self.name, {})
+                    global_catalog_columns[self.name] = tuple(sorted(
+                        set(global_catalog_columns.get(self.name, ())) |
+                        set([column_name])))
+
         # Add local relations.
         for name, spec in self.relationships.iteritems():
             relations.append(spec.zenrelations_tuple)
@@ -765,7 +807,15 @@ class ClassSpec(Spec):
         attributes['_v_local_relations'] = tuple(relations)
         attributes['_templates'] = tuple(templates)
         attributes['_device_catalogs'] = device_catalogs
+        attributes['_device_catalog_columns'] = device_catalog_columns
         attributes['_global_catalogs'] = global_catalogs
+        attributes['_global_catalog_columns'] = global_catalog_columns
+
+        if self.global_catalog_shards and self.name in global_catalogs:
+            global_catalog_shards[self.name] = self.global_catalog_shards
+
+        attributes['_global_catalog_shards'] = global_catalog_shards
+        attributes['_datapoint_properties'] = datapoint_properties
 
         # Add Impact stuff.
         attributes['impacts'] = self.impacts
@@ -877,6 +927,7 @@ class ClassSpec(Spec):
 
         if not bases:
             bases = [self.get_info_base()]
+            attributes["__init__"] = InfoInit(bases[0])
             if self.is_device:
                 # Override how status is determined for devices.
                 attributes["status"] = DeviceInfoStatusProperty()
@@ -7,6 +7,8 @@
 #
 ##############################################################################
 
+from Acquisition import aq_base
+
 from .Spec import Spec
 
 
@@ -63,15 +65,56 @@ class EventClassMappingSpec(Spec):
         if zplog:
             self.LOG = zplog
 
-    def create(self, eventclass):
+    # Mapping properties set from the spec.
+    _properties = ['eventClassKey', 'sequence', 'rule', 'regex',
+                   'example', 'explanation', 'resolution', 'transform']
+
+    def matches(self, mapping):
+        """Return True if mapping is managed and has this spec's properties."""
+        if not getattr(aq_base(mapping), 'zpl_managed', False):
+            return False
+
+        for x in self._properties:
+            if getattr(mapping, x, None) != getattr(self, x, None):
+                return False
+
+        return True
+
+    def create(self, eventclass, index=True):
+        """Create or update this mapping in eventclass.
+
+        Returns (mapping, action) where action is 'created', 'updated' or
+        'unchanged'. Mappings that already match this spec aren't modified
+        or reindexed. If index is False the caller is responsible for
+        indexing created and updated mappings.
+
+        """
         mapping = eventclass.instances._getOb(eventclass.prepId(self.name), False)
         if not mapping:
             mapping = eventclass.createInstance(self.name)
-        _properties = ['eventClassKey', 'sequence', 'rule', 'regex',
-                       'example', 'explanation', 'resolution', 'transform']
-        for x in _properties:
+            action = 'created'
+        elif self.matches(mapping):
+            return mapping, 'unchanged'
+        else:
+            action = 'updated'
+
+        for x in self._properties:
             if getattr(mapping, x) != getattr(self, x):
                 setattr(mapping, x, getattr(self, x, None))
 
         mapping.zpl_managed = True
-        mapping.index_object()
+        if index:
+            mapping.index_object()
+
+        return mapping, action
+
+    def plan(self, eventclass):
+        """Return 'create', 'update' or 'unchanged' for what create would do."""
+        mapping = eventclass.instances._getOb(eventclass.prepId(self.name), None)
+        if not mapping:
+            return 'create'
+
+        if self.matches(mapping):
+            return 'unchanged'
+
+        return 'update'
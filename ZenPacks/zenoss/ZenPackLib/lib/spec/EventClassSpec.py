@@ -7,6 +7,8 @@
 #
 ##############################################################################
 
+import collections
+
 from .OrganizerSpec import OrganizerSpec
 from .EventClassMappingSpec import EventClassMappingSpec
 
@@ -73,8 +75,45 @@ class EventClassSpec(OrganizerSpec):
                                                        self.transform))
                 ecObject.transform = self.transform
 
+        # Created mappings were cataloged when they were added, and only
+        # their spec properties have changed since, so created and updated
+        # mappings are recataloged once at the end for just those indexes.
+        actions = collections.Counter()
+        changed = []
         for mapping_id, mapping_spec in self.mappings.items():
-            mapping_spec.create(ecObject)
+            mapping, action = mapping_spec.create(ecObject, index=False)
+            actions[action] += 1
+            if action != 'unchanged':
+                changed.append(mapping)
+
+        if changed:
+            self.index_mappings(changed)
+
+        if self.mappings:
+            self.LOG.info(
+                'Event Class {}: {} mappings created, {} updated, {} '
+                'unchanged'.format(
+                    self.path, actions['created'], actions['updated'],
+                    actions['unchanged']))
+
+    def index_mappings(self, mappings):
+        """Recatalog spec properties of mappings in their catalog."""
+        catalog_id = getattr(mappings[0], 'default_catalog', None)
+        catalog = getattr(mappings[0], catalog_id, None) if catalog_id else None
+        if catalog is None:
+            for mapping in mappings:
+                mapping.index_object()
+            return
+
+        idxs = [
+            x for x in catalog.indexes()
+            if x in EventClassMappingSpec._properties]
+
+        if not idxs:
+            return
+
+        for mapping in mappings:
+            catalog.catalog_object(mapping, mapping.getPrimaryId(), idxs=idxs)
 
     def get_root(self, dmd):
         """Return the root object for this organizer."""
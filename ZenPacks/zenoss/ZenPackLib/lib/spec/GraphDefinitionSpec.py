@@ -83,6 +83,26 @@ class GraphDefinitionSpec(Spec):
         graph = template.manage_addGraphDefinition(self.name)
         self.speclog.debug("adding graph")
 
+        self.set_properties(graph, sequence)
+
+        graphpoint_sequence = 0
+        if self.comments:
+            self.speclog.debug("adding {} comments".format(len(self.comments)))
+            for comment_text in self.comments:
+                graphpoint_sequence += 1
+                comment = graph.createGraphPoint(
+                    CommentGraphPoint,
+                    'comment-{}'.format(graphpoint_sequence))
+
+                comment.text = comment_text
+
+        self.speclog.debug("adding {} graphpoints".format(len(self.graphpoints)))
+        for graphpoint_id, graphpoint_spec in self.graphpoints.items():
+            graphpoint_sequence += 1
+            graphpoint_spec.create(self, graph, sequence=graphpoint_sequence)
+
+    def set_properties(self, graph, sequence=None):
+        """Set properties of graph, but not its graphpoints, from this spec"""
         if sequence:
             graph.sequence = sequence
         if self.height is not None:
@@ -103,19 +123,3 @@ class GraphDefinitionSpec(Spec):
             graph.custom = self.custom
         if self.hasSummary is not None:
             graph.hasSummary = self.hasSummary
-
-        graphpoint_sequence = 0
-        if self.comments:
-            self.speclog.debug("adding {} comments".format(len(self.comments)))
-            for comment_text in self.comments:
-                graphpoint_sequence += 1
-                comment = graph.createGraphPoint(
-                    CommentGraphPoint,
-                    'comment-{}'.format(graphpoint_sequence))
-
-                comment.text = comment_text
-
-        self.speclog.debug("adding {} graphpoints".format(len(self.graphpoints)))
-        for graphpoint_id, graphpoint_spec in self.graphpoints.items():
-            graphpoint_sequence += 1
-            graphpoint_spec.create(self, graph, sequence=graphpoint_sequence)
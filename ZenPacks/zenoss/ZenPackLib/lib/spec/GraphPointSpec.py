@@ -141,6 +141,27 @@ class GraphPointSpec(Spec):
         graphpoint = graph.createGraphPoint(DataPointGraphPoint, self.name)
         self.speclog.debug("adding graphpoint")
 
+        self.set_properties(graphpoint, sequence)
+
+        if self.includeThresholds:
+            self.add_thresholds(graph)
+
+    def add_thresholds(self, graph):
+        """Add graphpoints to graph for thresholds of this datapoint"""
+        thresh_gps = graph.addThresholdsForDataPoint(self.dpName)
+        for thresh_gp in thresh_gps:
+            entry = self.thresholdLegends.get(thresh_gp.id)
+            if not entry:
+                continue
+            legend = entry.get('legend')
+            color = entry.get('color')
+            if legend:
+                thresh_gp.legend = legend
+            if color:
+                thresh_gp.color = str(color)
+
+    def set_properties(self, graphpoint, sequence=None):
+        """Set properties of graphpoint, but not its thresholds, from this spec"""
         graphpoint.dpName = self.dpName
 
         if sequence:
@@ -163,16 +184,3 @@ class GraphPointSpec(Spec):
             graphpoint.cFunc = self.cFunc
         if self.color is not None:
             graphpoint.color = str(self.color)
-
-        if self.includeThresholds:
-            thresh_gps = graph.addThresholdsForDataPoint(self.dpName)
-            for thresh_gp in thresh_gps:
-                entry = self.thresholdLegends.get(thresh_gp.id)
-                if not entry:
-                    continue
-                legend = entry.get('legend')
-                color = entry.get('color')
-                if legend:
-                    thresh_gp.legend = legend
-                if color:
-                    thresh_gp.color = str(color)
@@ -57,8 +57,10 @@ class ProcessClassOrganizerSpec(OrganizerSpec):
         if porg.description != self.description:
             porg.description = self.description
 
+        # Look up existing process classes by id once for the organizer.
+        process_classes = {x.id: x for x in porg.osProcessClasses()}
         for process_class_id, process_class_spec in self.process_classes.items():
-            process_class_spec.create(dmd, porg)
+            process_class_spec.create(dmd, porg, process_classes)
 
     def get_root(self, dmd):
         """Return the root object for this organizer."""
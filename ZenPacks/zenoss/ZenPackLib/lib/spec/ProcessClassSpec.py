@@ -8,6 +8,9 @@
 ##############################################################################
 
 import re
+
+from Acquisition import aq_base
+
 from .Spec import Spec
 from ..base.types import Severity
 
@@ -91,66 +94,86 @@ class ProcessClassSpec(Spec):
         self.modeler_lock = modeler_lock
         self.send_event_when_blocked = send_event_when_blocked
 
-    def create(self, dmd, porg):
-        # get existing process class
-        process_class = None
-        for pc in porg.osProcessClasses():
-            if pc.id == self.name:
-                process_class = pc
-                break
+    # Process class properties and the spec attributes they're set from.
+    _properties = [('includeRegex', 'includeRegex'),
+                   ('excludeRegex', 'excludeRegex'),
+                   ('replaceRegex', 'replaceRegex'),
+                   ('replacement', 'replacement'),
+                   ('description', 'description'),
+                   ('zMonitor', 'monitor'),
+                   ('zAlertOnRestart', 'alert_on_restart'),
+                   ('zFailSeverity', 'fail_severity'),
+                   ('zModelerLock', 'modeler_lock'),
+                   ('zSendEventWhenBlockedFlag', 'send_event_when_blocked')]
+
+    def get_changes(self, process_class):
+        """Return (attributes, zproperties) dicts of values that differ.
+
+        zProperties are compared with process_class's local values, since
+        create sets them locally even if the acquired value is the same.
+
+        """
+        attributes = {}
+        zproperties = {}
+        for propname, attr in self._properties:
+            value = getattr(self, attr)
+            if propname.startswith('z'):
+                if value is None:
+                    continue
+                if propname == 'zFailSeverity':
+                    value = int(value)
+                if process_class.hasProperty(propname) and \
+                        process_class.getProperty(propname) == value:
+                    continue
+                zproperties[propname] = value
+            elif getattr(process_class, propname) != value:
+                attributes[propname] = value
+
+        return attributes, zproperties
+
+    def plan(self, porg):
+        """Return 'create', 'update' or 'unchanged' for what create would do."""
+        process_class = porg.osProcessClasses._getOb(self.name, None)
+        if not process_class:
+            return 'create'
+
+        if any(self.get_changes(process_class)):
+            return 'update'
+
+        return 'unchanged'
+
+    def create(self, dmd, porg, process_classes=None):
+        """Create or update this process class in porg.
+
+        process_classes is an optional dict of porg's existing process
+        classes by id, built once by the caller for large organizers.
+        Only attributes and zProperties that differ are set, and process
+        classes that are already identical aren't modified.
+
+        """
+        if process_classes is None:
+            process_class = porg.osProcessClasses._getOb(self.name, None)
+        else:
+            process_class = process_classes.get(self.name)
 
         if not process_class:
             process_class = porg.manage_addOSProcessClass(self.name)
+            if process_classes is not None:
+                process_classes[self.name] = process_class
+
+        attributes, zproperties = self.get_changes(process_class)
+        if attributes:
+            # manage_editOSProcessClass sets all of them at once.
+            values = {
+                x: getattr(process_class, x)
+                for x, _ in self._properties if not x.startswith('z')}
+            values.update(attributes)
+            process_class.manage_editOSProcessClass(**values)
 
-        bChanged = False
-        includeRegex = process_class.includeRegex
-        if process_class.includeRegex != self.includeRegex:
-            bChanged = True
-            includeRegex = self.includeRegex
-
-        excludeRegex = process_class.excludeRegex
-        if process_class.excludeRegex != self.excludeRegex:
-            bChanged = True
-            excludeRegex = self.excludeRegex
-
-        replaceRegex = process_class.replaceRegex
-        if process_class.replaceRegex != self.replaceRegex:
-            bChanged = True
-            replaceRegex = self.replaceRegex
-
-        replacement = process_class.replacement
-        if process_class.replacement != self.replacement:
-            bChanged = True
-            replacement = self.replacement
-
-        description = process_class.description
-        if process_class.description != self.description:
-            bChanged = True
-            description = self.description
-
-        if bChanged:
-            # If something changed, then update the class
-            process_class.manage_editOSProcessClass(
-                includeRegex=includeRegex,
-                excludeRegex=excludeRegex,
-                replaceRegex=replaceRegex,
-                replacement=replacement,
-                description=description)
-        if self.monitor is not None:
-            process_class.setZenProperty('zMonitor', self.monitor)
-
-        if self.alert_on_restart is not None:
-            process_class.setZenProperty('zAlertOnRestart', self.alert_on_restart)
-
-        if self.fail_severity is not None:
-            process_class.setZenProperty('zFailSeverity', int(self.fail_severity))
-
-        if self.modeler_lock is not None:
-            process_class.setZenProperty('zModelerLock', self.modeler_lock)
-
-        if self.send_event_when_blocked is not None:
-            process_class.setZenProperty('zSendEventWhenBlockedFlag', self.send_event_when_blocked)
+        for propname, value in sorted(zproperties.iteritems()):
+            process_class.setZenProperty(propname, value)
 
         # Flag this as a ZPL managed object, that is, one that should not be
         # exported to objects.xml  (contained objects will also be excluded)
-        process_class.zpl_managed = True
+        if not getattr(aq_base(process_class), 'zpl_managed', False):
+            process_class.zpl_managed = True
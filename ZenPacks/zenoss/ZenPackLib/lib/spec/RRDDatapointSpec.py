@@ -215,6 +215,16 @@ class RRDDatapointSpec(Spec):
         type_ = datapoint.__class__.__name__
         self.speclog.debug("adding datapoint of type {}".format(type_))
 
+        self.set_properties(datapoint)
+
+        self.speclog.debug("adding {} aliases".format(len(self.aliases)))
+        for alias_id, formula in self.aliases.items():
+            datapoint.addAlias(alias_id, formula)
+            self.speclog.debug("adding alias".format(alias_id))
+            self.speclog.debug("formula = {}".format(formula))
+
+    def set_properties(self, datapoint):
+        """Set properties of datapoint, but not its aliases, from this spec"""
         if self.rrdtype is not None:
             datapoint.rrdtype = self.rrdtype
         if self.createCmd is not None:
@@ -232,10 +242,4 @@ class RRDDatapointSpec(Spec):
                 if param in [x['id'] for x in datapoint._properties]:
                     setattr(datapoint, param, value)
                 else:
-                    raise ValueError("%s is not a valid property for datapoint of type %s" % (param, type_))
-
-        self.speclog.debug("adding {} aliases".format(len(self.aliases)))
-        for alias_id, formula in self.aliases.items():
-            datapoint.addAlias(alias_id, formula)
-            self.speclog.debug("adding alias".format(alias_id))
-            self.speclog.debug("formula = {}".format(formula))
+                    raise ValueError("%s is not a valid property for datapoint of type %s" % (param, datapoint.__class__.__name__))
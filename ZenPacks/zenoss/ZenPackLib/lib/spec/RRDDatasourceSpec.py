@@ -89,6 +89,15 @@ class RRDDatasourceSpec(Spec):
 
         datasource = template.manage_addRRDDataSource(self.name, type_)
         self.speclog.debug("adding datasource")
+        self.set_properties(datasource)
+
+        self.speclog.debug("adding {} datapoints".format(len(self.datapoints)))
+        for datapoint_id, datapoint_spec in self.datapoints.items():
+            datapoint_spec.create(self, datasource)
+
+    def set_properties(self, datasource):
+        """Set properties of datasource, but not its datapoints, from this spec"""
+        type_ = '{}.{}'.format(datasource.__class__.__name__, datasource.sourcetype)
 
         if self.enabled is not None:
             datasource.enabled = self.enabled
@@ -114,7 +123,3 @@ class RRDDatasourceSpec(Spec):
                         setattr(datasource, param, value)
                 else:
                     raise ValueError("%s is not a valid property for datasource of type %s" % (param, type_))
-
-        self.speclog.debug("adding {} datapoints".format(len(self.datapoints)))
-        for datapoint_id, datapoint_spec in self.datapoints.items():
-            datapoint_spec.create(self, datasource)
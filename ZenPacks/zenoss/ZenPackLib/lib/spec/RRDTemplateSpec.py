@@ -6,6 +6,15 @@
 # License.zenoss under the directory where your Zenoss product is installed.
 #
 ##############################################################################
+import collections
+
+import yaml
+from Acquisition import aq_base
+from Products.ZenModel.CommentGraphPoint import CommentGraphPoint
+from Products.ZenModel.DataPointGraphPoint import DataPointGraphPoint
+from Products.ZenModel.ThresholdGraphPoint import ThresholdGraphPoint
+
+from ..helpers.Dumper import Dumper
 from .Spec import Spec
 from .RRDThresholdSpec import RRDThresholdSpec
 from .RRDDatasourceSpec import RRDDatasourceSpec
@@ -140,10 +149,7 @@ class RRDTemplateSpec(Spec):
         if not existing_template:
             self.speclog.debug("adding template")
 
-        if self.targetPythonClass is not None:
-            template.targetPythonClass = self.targetPythonClass
-        if self.description is not None:
-            template.description = self.description
+        self.set_properties(template)
 
         self.speclog.debug("adding {} thresholds".format(len(self.thresholds)))
         for threshold_id, threshold_spec in self.thresholds.items():
@@ -160,6 +166,136 @@ class RRDTemplateSpec(Spec):
         if not addToZenPack:
             return template
 
+    def set_properties(self, template):
+        """Set properties of template, but not its contents, from this spec"""
+        if self.targetPythonClass is not None:
+            template.targetPythonClass = self.targetPythonClass
+        if self.description is not None:
+            template.description = self.description
+
+    def reconcile(self, dmd, template, backup_id=None):
+        """Change template to match this spec and return objects touched.
+
+        Each threshold, datapoint and graph is compared with this spec in
+        memory using fromObject and fromSpec. Properties of objects that
+        differ, and of the template and datasources, are set only where
+        they differ. Objects are added or removed as they are in the spec,
+        and only replaced if their class changes.
+
+        If backup_id is given, each threshold, datasource and graph is
+        copied to a template of that id before it's changed or removed.
+        """
+        from ..params.RRDThresholdSpecParams import RRDThresholdSpecParams
+        from ..params.RRDDatapointSpecParams import RRDDatapointSpecParams
+        from ..params.GraphDefinitionSpecParams import GraphDefinitionSpecParams
+
+        backup = Backup(template, backup_id)
+
+        # The template and datasources are compared by their properties,
+        # as fromObject would read every object in them.
+        touched = 0
+        sample_template = aq_base(template).__class__(template.id)
+        self.set_properties(sample_template)
+        if changed_properties(template, sample_template):
+            backup.create()
+            copy_properties(template, sample_template)
+            touched += 1
+
+        threshold_classes = dict((y, x) for x, y in template.getThresholdClasses())
+        touched += remove_objects(template.thresholds, self.thresholds, backup)
+        for threshold_id, threshold_spec in self.thresholds.iteritems():
+            threshold = template.thresholds._getOb(threshold_id, None)
+            threshold_class = threshold_classes.get(threshold_spec.type_)
+            if threshold is None or aq_base(threshold).__class__ is not threshold_class:
+                backup.copy(threshold)
+                replace_object(template.thresholds, threshold_id,
+                               lambda: threshold_spec.create(self, template))
+                touched += 1
+                continue
+
+            sample = threshold_class(threshold_id)
+            if params_differ(
+                    RRDThresholdSpecParams.fromObject(threshold),
+                    RRDThresholdSpecParams.fromSpec(threshold_spec, sample)):
+                backup.copy(threshold)
+                copy_properties(threshold, sample)
+                touched += 1
+
+        datasource_classes = {x.__name__: x for x in template.getDataSourceClasses()}
+        datasource_types = dict(template.getDataSourceOptions())
+        touched += remove_objects(template.datasources, self.datasources, backup)
+        for datasource_id, datasource_spec in self.datasources.iteritems():
+            datasource = template.datasources._getOb(datasource_id, None)
+            type_ = datasource_types.get(datasource_spec.sourcetype)
+            datasource_class = datasource_classes.get((type_ or '').split('.')[0])
+            if datasource is None or \
+                    aq_base(datasource).__class__ is not datasource_class or \
+                    datasource.sourcetype != datasource_spec.sourcetype:
+                backup.copy(datasource)
+                replace_object(template.datasources, datasource_id,
+                               lambda: datasource_spec.create(self, template))
+                touched += 1
+                continue
+
+            sample = datasource_class(datasource_id)
+            sample.sourcetype = datasource_spec.sourcetype
+            datasource_spec.set_properties(sample)
+            if changed_properties(datasource, sample):
+                backup.copy(datasource)
+                copy_properties(datasource, sample)
+                touched += 1
+
+            touched += remove_objects(
+                datasource.datapoints, datasource_spec.datapoints, backup, datasource)
+            for datapoint_id, datapoint_spec in datasource_spec.datapoints.iteritems():
+                datapoint = datasource.datapoints._getOb(datapoint_id, None)
+                if datapoint is None:
+                    datapoint_spec.create(datasource_spec, datasource)
+                    touched += 1
+                    continue
+
+                sample = aq_base(datapoint).__class__(datapoint_id)
+                if params_differ(
+                        RRDDatapointSpecParams.fromObject(datapoint),
+                        RRDDatapointSpecParams.fromSpec(datapoint_spec, sample)):
+                    backup.copy(datasource)
+                    copy_properties(datapoint, sample)
+                    set_aliases(datapoint, datapoint_spec.aliases)
+                    touched += 1
+
+        # Graphpoints of thresholds that were removed are removed too.
+        dsnames = {x.id: x.dsnames for x in template.thresholds()}
+        for graph in template.graphDefs():
+            orphans = [
+                x.id for x in graph.graphPoints()
+                if isinstance(x, ThresholdGraphPoint) and x.threshId not in dsnames]
+
+            if orphans:
+                backup.copy(graph)
+                for graphpoint_id in orphans:
+                    graph.graphPoints._delObject(graphpoint_id)
+                touched += 1
+
+        touched += remove_objects(template.graphDefs, self.graphs, backup)
+        for i, (graph_id, graph_spec) in enumerate(self.graphs.iteritems()):
+            graph = template.graphDefs._getOb(graph_id, None)
+            if graph is None:
+                graph_spec.create(self, template, sequence=i)
+                touched += 1
+                continue
+
+            sample = aq_base(graph).__class__(graph_id)
+            if params_differ(
+                    GraphDefinitionSpecParams.fromObject(graph),
+                    GraphDefinitionSpecParams.fromSpec(graph_spec, sample, dsnames)):
+                backup.copy(graph)
+                graph_spec.set_properties(sample, sequence=i)
+                copy_properties(graph, sample)
+                reconcile_graphpoints(graph_spec, graph, dsnames)
+                touched += 1
+
+        return touched
+
     def remove(self, dmd, id=None):
         device_class = self.deviceclass_spec.get_organizer(dmd)
         if not device_class:
@@ -170,3 +306,153 @@ class RRDTemplateSpec(Spec):
         existing_template = device_class.rrdTemplates._getOb(t_id, None)
         if existing_template:
             device_class.rrdTemplates._delObject(t_id)
+
+
+class Backup(object):
+    """Copies of objects in a template, made before they're changed.
+
+    The backup template is only created when it's first needed. It has
+    the properties of the template, but only the objects that were copied.
+    """
+
+    def __init__(self, template, backup_id=None):
+        self.template = template
+        self.backup_id = backup_id
+        self.backup = None
+        self.copied = set()
+
+    def create(self):
+        """Create the backup template if it doesn't exist yet."""
+        if self.backup_id is None or self.backup is not None:
+            return
+
+        rel = self.template.getPrimaryParent()
+        if rel._getOb(self.backup_id, None) is not None:
+            rel._delObject(self.backup_id)
+
+        backup = aq_base(self.template).__class__(self.backup_id)
+        copy_properties(backup, self.template)
+        backup.zpl_managed = getattr(aq_base(self.template), 'zpl_managed', False)
+        rel._setObject(self.backup_id, backup)
+        self.backup = rel._getOb(self.backup_id)
+
+    def copy(self, obj):
+        """Copy obj, a child of the template, to the backup template."""
+        if self.backup_id is None or obj is None:
+            return
+
+        if obj.getPrimaryId() in self.copied:
+            return
+
+        self.create()
+        self.copied.add(obj.getPrimaryId())
+        rel = getattr(self.backup, obj.getPrimaryParent().id)
+        copy = obj._getCopy(rel)
+        rel._setObject(copy.id, copy)
+
+
+def params_differ(existing, expected):
+    """Return True if params differ in YAML."""
+    return yaml.dump(existing, Dumper=Dumper) != yaml.dump(expected, Dumper=Dumper)
+
+
+def changed_properties(obj, sample):
+    """Return ids of properties of obj that differ from sample."""
+    return [
+        x['id'] for x in sample._properties
+        if getattr(aq_base(obj), x['id'], None) != getattr(sample, x['id'], None)]
+
+
+def copy_properties(obj, sample):
+    """Set properties of obj that differ from sample and return their ids."""
+    changed = changed_properties(obj, sample)
+    for propname in changed:
+        setattr(obj, propname, getattr(sample, propname, None))
+
+    return changed
+
+
+def remove_objects(rel, specs, backup, container=None):
+    """Remove objects in rel that aren't in specs and return how many.
+
+    Each is copied to backup first, or its container if one is given.
+    """
+    removed = 0
+    for obj_id in list(rel.objectIds()):
+        if obj_id not in specs:
+            backup.copy(container if container is not None else rel._getOb(obj_id))
+            rel._delObject(obj_id)
+            removed += 1
+
+    return removed
+
+
+def replace_object(rel, obj_id, create):
+    """Remove obj_id from rel if it exists, then call create."""
+    if rel._getOb(obj_id, None) is not None:
+        rel._delObject(obj_id)
+
+    create()
+
+
+def set_aliases(datapoint, aliases):
+    """Make aliases of datapoint match aliases, a dict of id to formula."""
+    for alias in datapoint.aliases():
+        if alias.id not in aliases:
+            datapoint.removeAlias(alias.id)
+
+    for alias_id, formula in aliases.iteritems():
+        alias = datapoint.aliases._getOb(alias_id, None)
+        if alias is None:
+            datapoint.addAlias(alias_id, formula)
+        elif alias.formula != formula:
+            alias.formula = formula
+
+
+def reconcile_graphpoints(graph_spec, graph, dsnames):
+    """Make graphpoints of graph match graph_spec.
+
+    dsnames maps ids of the template's thresholds to their dsnames.
+    """
+    comments = collections.OrderedDict(
+        ('comment-{}'.format(i), x) for i, x in enumerate(graph_spec.comments or [], 1))
+
+    # Thresholds for the datapoints of graphpoints that include them.
+    thresholds = set(
+        threshold_id for threshold_id, threshold_dsnames in dsnames.iteritems()
+        if any(x.includeThresholds and x.dpName in threshold_dsnames
+               for x in graph_spec.graphpoints.itervalues()))
+
+    for graphpoint in graph.graphPoints():
+        if isinstance(graphpoint, CommentGraphPoint):
+            keep = graphpoint.id in comments
+        elif isinstance(graphpoint, ThresholdGraphPoint):
+            keep = graphpoint.threshId in thresholds
+        elif isinstance(graphpoint, DataPointGraphPoint):
+            keep = graphpoint.id in graph_spec.graphpoints
+        else:
+            keep = True
+
+        if not keep:
+            graph.graphPoints._delObject(graphpoint.id)
+
+    for comment_id, comment_text in comments.iteritems():
+        comment = graph.graphPoints._getOb(comment_id, None)
+        if comment is None:
+            comment = graph.createGraphPoint(CommentGraphPoint, comment_id)
+        if comment.text != comment_text:
+            comment.text = comment_text
+
+    for i, (graphpoint_id, graphpoint_spec) in enumerate(
+            graph_spec.graphpoints.iteritems(), len(comments) + 1):
+        graphpoint = graph.graphPoints._getOb(graphpoint_id, None)
+        if not isinstance(graphpoint, DataPointGraphPoint):
+            replace_object(graph.graphPoints, graphpoint_id, lambda: graphpoint_spec.create(
+                graph_spec, graph, sequence=i))
+            continue
+
+        sample = aq_base(graphpoint).__class__(graphpoint_id)
+        graphpoint_spec.set_properties(sample, sequence=i)
+        copy_properties(graphpoint, sample)
+        if graphpoint_spec.includeThresholds:
+            graphpoint_spec.add_thresholds(graph)
@@ -88,9 +88,13 @@ class RRDThresholdSpec(Spec):
 
         threshold = template.manage_addRRDThreshold(self.name, self.type_)
         self.speclog.debug("adding threshold")
+        self.set_properties(threshold)
 
+    def set_properties(self, threshold):
+        """Set properties of threshold from this spec"""
         if self.dsnames is not None:
-            threshold.dsnames = self.dsnames
+            threshold.dsnames = [
+                x if '_' in x else '_'.join((x, x)) for x in self.dsnames]
         if self.eventClass is not None:
             threshold.eventClass = self.eventClass
         if self.severity is not None:
@@ -102,5 +106,4 @@ class RRDThresholdSpec(Spec):
                 if param in [x['id'] for x in threshold._properties]:
                     setattr(threshold, param, value)
                 else:
-                    raise ValueError("%s is not a valid property for threshold of type %s" % (param, type_))
-
+                    raise ValueError("%s is not a valid property for threshold of type %s" % (param, self.type_))
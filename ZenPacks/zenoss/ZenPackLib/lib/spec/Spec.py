@@ -13,6 +13,7 @@ import itertools
 import operator
 from collections import OrderedDict
 
+from Acquisition import aq_base
 from Products import Zuul
 from Products.Zuul import marshal
 from Products.Zuul.infos import ProxyProperty
@@ -23,6 +24,49 @@ from Products.Zuul.interfaces import IInfo
 from ..functions import fix_kwargs, create_module
 from ..helpers.ZenPackLibLog import DEFAULTLOG
 from ..base.ClassProperty import ClassProperty
+from ..base.DeviceBase import DeviceBase
+from ..status import DeviceStatusPrefetch
+from ..metrics import DatapointPrefetch
+from ..prefetch import RequestMemo
+
+# Fields needed by the UI renderer for creating links.
+ENTITY_KEYS = ('name', 'meta_type', 'class_label', 'uid')
+
+
+def marshal_entity(obj):
+    """Return link fields for obj, shared within the current request."""
+    get_uid = getattr(obj, 'getPrimaryId', None)
+    memo = RequestMemo.current()
+    if memo is None or get_uid is None:
+        return marshal(Zuul.info(obj), keys=ENTITY_KEYS)
+
+    return dict(memo.get(
+        ('entity', get_uid()),
+        lambda: marshal(Zuul.info(obj), keys=ENTITY_KEYS)))
+
+def marshal_entities(result):
+    """Return link fields for object or list of objects."""
+    if isinstance(result, (list, tuple)):
+        return [marshal_entity(x) for x in result]
+    return marshal_entity(result)
+
+def request_memoized(name, getter):
+    """Return Info property getter memoized within the current request.
+
+    Objects modified in the current transaction are not memoized. Changing
+    a relationship modifies the relationship rather than the object, so ZPL
+    relationship setters invalidate the memo instead.
+    """
+    def memoized_getter(self):
+        memo = RequestMemo.current()
+        if memo is None or getattr(self._object, '_p_changed', False):
+            return getter(self)
+
+        return memo.get(
+            (self._object.getPrimaryId(), name),
+            lambda: getter(self))
+
+    return memoized_getter
 
 
 def MethodInfoProperty(method_name, entity=False, enum=None):
@@ -33,17 +77,16 @@ def MethodInfoProperty(method_name, entity=False, enum=None):
     """
     def getter(self):
         try:
-            result = Zuul.info(getattr(self._object, method_name)())
+            result = getattr(self._object, method_name)()
         except TypeError:
             # If not callable avoid the traceback and send the property
-            result = Zuul.info(getattr(self._object, method_name))
+            result = getattr(self._object, method_name)
         if entity:
             # rather than returning entire object(s), return just
             # the fields needed by the UI renderer for creating links.
-            return marshal(
-                result,
-                keys=('name', 'meta_type', 'class_label', 'uid'))
+            return marshal_entities(result)
         else:
+            result = Zuul.info(result)
             if enum and isinstance(enum, dict):
                 try:
                     return enum.get(int(result), 'Unknown')
@@ -52,7 +95,7 @@ def MethodInfoProperty(method_name, entity=False, enum=None):
             else:
                 return result
 
-    return property(getter)
+    return property(request_memoized(method_name, getter))
 
 def EnumInfoProperty(data, enum):
     """Return a property filtered via an enum."""
@@ -67,16 +110,48 @@ def EnumInfoProperty(data, enum):
             except Exception:
                 return Zuul.info(data)
 
-    return property(lambda x: getter(x, data, enum))
+    return property(request_memoized(data, lambda x: getter(x, data, enum)))
 
 def DeviceInfoStatusProperty():
-    """Return property for DeviceBaseInfo.status."""
+    """Return property for DeviceBaseInfo.status.
+
+    Within a request, status is read from a prefetch shared by all
+    device Info objects created during that request.
+    """
     def getter(self):
-        status = self._object.getStatus()
+        prefetch = DeviceStatusPrefetch.current(self._object.dmd)
+        if prefetch is None:
+            status = self._object.getStatus()
+        else:
+            status = prefetch.get(self._object)
         return None if status is None else status < 1
 
     return property(getter)
 
+def InfoInit(base):
+    """Return Info __init__ that registers the object for prefetching.
+
+    Devices are registered for status prefetch, and objects with
+    datapoint-backed properties for datapoint prefetch.
+    """
+    base_init = base.__init__
+
+    def __init__(self, _object):
+        base_init(self, _object)
+
+        prefetch_classes = []
+        if isinstance(_object, DeviceBase):
+            prefetch_classes.append(DeviceStatusPrefetch)
+        if getattr(_object, '_datapoint_properties', None):
+            prefetch_classes.append(DatapointPrefetch)
+
+        for prefetch_class in prefetch_classes:
+            prefetch = prefetch_class.current(_object.dmd)
+            if prefetch is not None:
+                prefetch.register(_object)
+
+    return __init__
+
 def RelationshipGetter(relationship_name):
     """Return getter for id or ids in relationship_name."""
     def getter(self):
@@ -121,16 +196,25 @@ def RelationshipInfoProperty(relationship_name):
     def getter(self):
         # rather than returning entire object(s), return just the fields
         # required by the UI renderer for creating links.
-        return marshal(
-            Zuul.info(getattr(self._object, relationship_name)()),
-            keys=('name', 'meta_type', 'class_label', 'uid'))
+        return marshal_entities(getattr(self._object, relationship_name)())
 
-    return property(getter)
+    return property(request_memoized(relationship_name, getter))
 
 def RelationshipLengthProperty(relationship_name):
-    """Return a property representing number of objects in relationship."""
+    """Return a property representing number of objects in relationship.
+
+    The maintained relationship counter is only used while the relationship
+    is a ghost. Once loaded, as it is when changed directly rather than
+    through a ZPL setter, counting it is cheap and can't be stale.
+    """
     def getter(self):
         relationship = getattr(self._object, relationship_name)
+        get_count = getattr(self._object, 'get_relationship_count', None)
+        if get_count and getattr(aq_base(relationship), '_p_changed', False) is None:
+            count = get_count(relationship_name)
+            if count is not None:
+                return count
+
         try:
             return relationship.countObjects()
         except Exception:
@@ -581,6 +581,7 @@ class ZenPackSpec(Spec):
         for class_ in global_catalog_classes:
             catalog = ".".join([self.name, class_]).replace(".", "_")
             attributes['GLOBAL_CATALOGS'].append('{}Search'.format(catalog))
+        attributes['GLOBAL_CATALOG_CLASSES'] = sorted(global_catalog_classes)
 
         cls = self.create_class(get_symbol_name(self.name),
                             get_symbol_name(self.name, 'schema'),
@@ -0,0 +1,182 @@
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+import threading
+import time
+
+from Products import Zuul
+from zenoss.protocols.protobufs.zep_pb2 import (
+    STATUS_NEW, STATUS_ACKNOWLEDGED,
+    SEVERITY_CRITICAL,
+    )
+from .helpers.ZenPackLibLog import DEFAULTLOG
+from .prefetch import RequestPrefetch
+
+
+class DeviceStatusService(object):
+    """Batched device status lookups.
+
+    Status for any number of devices is retrieved using a single
+    tag-filtered ZEP event summary query. Results are cached per-process
+    for ttl seconds, and shared by all of Zope's request threads.
+
+    The status number has the same meaning as DeviceBase.getStatus: the
+    number of new or acknowledged critical events in statusclass tagged
+    with the device's UUID, excluding component events.
+
+    """
+
+    LOG = DEFAULTLOG
+
+    # Number of seconds to cache device status.
+    ttl = 15
+
+    # Number of event summaries to request per ZEP call.
+    limit = 1000
+
+    # Maximum number of cached statuses before expired entries are pruned.
+    max_cache_size = 10000
+
+    # {(statusclass, uuid): (expires, status)}
+    _cache = {}
+
+    # Guards _cache. Zope serves requests from several threads.
+    _cache_lock = threading.Lock()
+
+    def __init__(self, dmd, ttl=None, zep=None):
+        self.dmd = dmd
+        self.zep = zep
+        if ttl is not None:
+            self.ttl = ttl
+
+    def get_zep(self):
+        """Return ZEP facade."""
+        if self.zep is None:
+            self.zep = Zuul.getFacade("zep", self.dmd)
+        return self.zep
+
+    def get_status(self, device, statusclass="/Status/*"):
+        """Return status number for a single device."""
+        return self.get_statuses([device], statusclass).get(device.getUUID())
+
+    def get_statuses(self, devices, statusclass="/Status/*"):
+        """Return {uuid: status} for devices.
+
+        Status is None for devices that aren't monitored, or if there
+        was an error retrieving events.
+
+        """
+        now = time.time()
+        statuses = {}
+        to_fetch = []
+        uuids = []
+
+        for device in devices:
+            uuid = device.getUUID()
+            if uuid in statuses:
+                continue
+
+            if not device.monitorDevice():
+                statuses[uuid] = None
+                continue
+
+            statuses[uuid] = None
+            uuids.append(uuid)
+
+        with self._cache_lock:
+            for uuid in uuids:
+                cached = self._cache.get((statusclass, uuid))
+                if cached and cached[0] > now:
+                    statuses[uuid] = cached[1]
+                else:
+                    to_fetch.append(uuid)
+
+        if not to_fetch:
+            return statuses
+
+        try:
+            fetched = self.fetch(to_fetch, statusclass)
+        except Exception as e:
+            self.LOG.debug("Unable to retrieve device status: %s", e)
+            statuses.update(dict.fromkeys(to_fetch))
+            return statuses
+
+        expires = now + self.ttl
+        with self._cache_lock:
+            self.prune(now)
+            for uuid, status in fetched.iteritems():
+                self._cache[(statusclass, uuid)] = (expires, status)
+
+        statuses.update(fetched)
+        return statuses
+
+    def fetch(self, uuids, statusclass="/Status/*"):
+        """Return {uuid: status} for uuids, bypassing the cache."""
+        zep = self.get_zep()
+        event_filter = zep.createEventFilter(
+            tags=list(uuids),
+            element_sub_identifier=[""],
+            severity=[SEVERITY_CRITICAL],
+            status=[STATUS_NEW, STATUS_ACKNOWLEDGED],
+            event_class=filter(None, [statusclass]))
+
+        statuses = dict.fromkeys(uuids, 0)
+        offset = 0
+        while True:
+            result = zep.getEventSummaries(
+                offset, filter=event_filter, limit=self.limit)
+
+            events = list(result['events'])
+            for event in events:
+                actor = event['occurrence'][0]['actor']
+                uuid = actor.get('element_uuid')
+                if uuid in statuses:
+                    statuses[uuid] += 1
+
+            offset += len(events)
+            if not events or offset >= int(result['total']):
+                break
+
+        return statuses
+
+    def prune(self, now):
+        """Remove expired entries if the cache has grown too large.
+
+        Callers must hold _cache_lock.
+
+        """
+        if len(self._cache) < self.max_cache_size:
+            return
+
+        for key, (expires, _) in self._cache.items():
+            if expires <= now:
+                del self._cache[key]
+
+        # Everything is still fresh. Start over rather than growing.
+        if len(self._cache) >= self.max_cache_size:
+            self._cache.clear()
+
+    @classmethod
+    def clear_cache(cls):
+        """Remove all cached statuses."""
+        with cls._cache_lock:
+            cls._cache.clear()
+
+
+class DeviceStatusPrefetch(RequestPrefetch):
+    """Request-scoped batch of device statuses."""
+
+    REQUEST_KEY = '_zpl_device_status_prefetch'
+
+    def __init__(self, dmd):
+        super(DeviceStatusPrefetch, self).__init__(dmd)
+        self.service = DeviceStatusService(dmd)
+
+    def fetch(self, devices):
+        """Return {uuid: status} for devices."""
+        return self.service.get_statuses(devices)
@@ -227,3 +227,10 @@ class LogCapture(object):
         cfg = yaml.load(yaml_doc, Loader=WarningLoader)
         logs = self.stop_capture()
         return str(logs)
+
+
+class FakeRequest(dict):
+    """Minimal request supporting get and set."""
+
+    def set(self, key, value):
+        self[key] = value
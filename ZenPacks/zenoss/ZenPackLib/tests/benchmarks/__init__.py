@@ -0,0 +1,38 @@
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Benchmarks that are run by hand rather than with the unit tests.
+
+Modules here don't match the test runner's test_*.py pattern, so they're
+never collected with the unit tests. Run one directly with an optional
+count of objects, for example:
+
+    python bench_catalog_cache.py 50000
+
+"""
+
+import sys
+
+
+def main(benchmark_class):
+    """Run bench_* methods of a BaseTestCase class and print results.
+
+    The first command line argument, if given, replaces the class's count.
+
+    """
+    if len(sys.argv) > 1:
+        benchmark_class.count = int(sys.argv[1])
+
+    from unittest import makeSuite
+    from zope.testrunner.runner import Runner
+    runner = Runner(
+        args=sys.argv[:1],
+        found_suites=[makeSuite(benchmark_class, 'bench')])
+
+    runner.run()
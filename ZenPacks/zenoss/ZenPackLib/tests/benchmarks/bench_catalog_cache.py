@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Benchmark index_object with and without the catalog handle cache.
+
+    python bench_catalog_cache.py [components]
+
+"""
+
+import time
+
+# Zenoss Imports
+import Globals  # noqa
+from Products.ZenUtils.Utils import unused
+unused(Globals)
+
+from Products.ZenTestCase.BaseTestCase import BaseTestCase
+
+# zenpacklib Imports
+from ZenPacks.zenoss.ZenPackLib.lib.base.CatalogBase import CatalogBase
+from ZenPacks.zenoss.ZenPackLib.tests.benchmarks import main
+from ZenPacks.zenoss.ZenPackLib.tests.test_catalog_cache import ZP
+
+
+class BenchmarkCatalogCache(BaseTestCase):
+    """Compare cached and uncached index_object for Disk components."""
+
+    count = 50000
+
+    def afterSetUp(self):
+        super(BenchmarkCatalogCache, self).afterSetUp()
+
+        self.dmd.REQUEST = None
+        self.dmd.Devices.createOrganizer('/CatalogCacheTest')
+        self.dmd.Devices.CatalogCacheTest._setProperty(
+            'zPythonClass', 'ZenPacks.zenoss.CatalogCacheTest.CacheDevice')
+
+        self.CFG = ZP.cfg
+        self.device = self.dmd.Devices.CatalogCacheTest.createInstance(
+            'testdevice')
+
+        from ZenPacks.zenoss.CatalogCacheTest.Disk import Disk
+        self.disks = []
+        for i in xrange(self.count):
+            disk_id = 'disk{}'.format(i)
+            self.device.disks._setObject(disk_id, Disk(disk_id))
+            self.disks.append(self.device.disks._getOb(disk_id))
+
+    def beforeTearDown(self):
+        CatalogBase.catalog_cache = True
+        super(BenchmarkCatalogCache, self).beforeTearDown()
+
+    def index_all(self, cache):
+        """Return seconds to index every disk with the cache on or off."""
+        CatalogBase.catalog_cache = cache
+        CatalogBase.clear_catalog_cache(self.device)
+        CatalogBase.clear_catalog_cache(self.dmd.Devices)
+
+        start = time.time()
+        for disk in self.disks:
+            disk.index_object()
+
+        return time.time() - start
+
+    def bench_index_object(self):
+        # Catalog every disk first so both runs only reindex.
+        self.index_all(True)
+
+        uncached = self.index_all(False)
+        cached = self.index_all(True)
+
+        print "\nindex_object for {} Disk components: {:.2f}s uncached, " \
+            "{:.2f}s cached ({:.1f}x)".format(
+                self.count, uncached, cached, uncached / max(cached, 1e-6))
+
+
+if __name__ == "__main__":
+    main(BenchmarkCatalogCache)
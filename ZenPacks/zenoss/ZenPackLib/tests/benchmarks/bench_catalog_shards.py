@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Count write conflicts indexing into one catalog and sharded catalogs.
+
+Concurrent writers each catalog their own devices' components into an
+in-memory ZODB, retrying on ConflictError, once with a single catalog and
+once with the components hashed by device id into shards.
+
+    python bench_catalog_shards.py [components] [writers] [shards]
+
+"""
+
+import sys
+import threading
+import time
+
+# Zenoss Imports
+import Globals  # noqa
+from Products.ZenUtils.Utils import unused
+unused(Globals)
+
+import transaction
+
+# zenpacklib Imports
+from ZenPacks.zenoss.ZenPackLib.lib.base.CatalogBase import global_catalog_shard
+
+
+class Record(object):
+    """Object to catalog."""
+
+    def __init__(self, id, device_id):
+        self.id = id
+        self.device_id = device_id
+
+
+def count_conflicts(shards, writers, writes):
+    """Return (conflicts, seconds) for concurrent writers."""
+    from ZODB import DB
+    from ZODB.MappingStorage import MappingStorage
+    from ZODB.POSException import ConflictError
+    from Products.ZCatalog.ZCatalog import ZCatalog
+    from Products.ZenUtils.Search import makeFieldIndex
+
+    db = DB(MappingStorage())
+    tm = transaction.TransactionManager()
+    root = db.open(transaction_manager=tm).root()
+    for shard in xrange(shards):
+        zcatalog = ZCatalog('shard{}'.format(shard))
+        for index_name in ('id', 'device_id'):
+            zcatalog._catalog.addIndex(index_name, makeFieldIndex(index_name))
+            zcatalog._catalog.addColumn(index_name)
+        root[zcatalog.id] = zcatalog
+    tm.commit()
+
+    conflicts = []
+
+    def writer(number):
+        tm = transaction.TransactionManager()
+        root = db.open(transaction_manager=tm).root()
+        for i in xrange(writes):
+            device_id = 'device{}-{}'.format(number, i)
+            shard = global_catalog_shard(device_id, shards)
+            uid = '/{}/disk'.format(device_id)
+            while True:
+                root['shard{}'.format(shard)].catalog_object(
+                    Record('disk', device_id), uid)
+                try:
+                    tm.commit()
+                except ConflictError:
+                    tm.abort()
+                    conflicts.append(uid)
+                else:
+                    break
+
+    threads = [
+        threading.Thread(target=writer, args=(x,)) for x in xrange(writers)]
+
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.time() - start
+    db.close()
+    return len(conflicts), elapsed
+
+
+def main(components=2000, writers=4, shards=16):
+    for shard_count in (1, shards):
+        conflicts, elapsed = count_conflicts(
+            shard_count, writers, components // writers)
+
+        print "{} shards, {} writers, {} components: {} conflicts in " \
+            "{:.2f}s".format(
+                shard_count, writers, components, conflicts, elapsed)
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:4]])
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Benchmark a numeric range query against filtering objects in Python.
+
+    python bench_index_types.py [components]
+
+"""
+
+import time
+
+# Zenoss Imports
+import Globals  # noqa
+from Products.ZenUtils.Utils import unused
+unused(Globals)
+
+from Products.ZenTestCase.BaseTestCase import BaseTestCase
+
+# zenpacklib Imports
+from ZenPacks.zenoss.ZenPackLib.lib.functions import (
+    catalog_records, load_objects, range_query)
+from ZenPacks.zenoss.ZenPackLib.tests.benchmarks import main
+from ZenPacks.zenoss.ZenPackLib.tests.test_index_types import ZP
+
+
+class BenchmarkIndexTypes(BaseTestCase):
+    """Compare finding Volumes with capacity > X in the catalog and Python.
+
+    The test database keeps every object in memory, so the Python filter
+    doesn't pay for the ZODB loads it would cause on a real install.
+
+    """
+
+    count = 50000
+
+    def afterSetUp(self):
+        super(BenchmarkIndexTypes, self).afterSetUp()
+
+        self.dmd.REQUEST = None
+        self.dmd.Devices.createOrganizer('/IndexTypeTest')
+        self.dmd.Devices.IndexTypeTest._setProperty(
+            'zPythonClass', 'ZenPacks.zenoss.IndexTypeTest.IndexDevice')
+
+        self.CFG = ZP.cfg
+        self.device = self.dmd.Devices.IndexTypeTest.createInstance(
+            'testdevice')
+
+        from ZenPacks.zenoss.IndexTypeTest.Volume import Volume
+        for i in xrange(self.count):
+            volume_id = 'volume{}'.format(i)
+            volume = Volume(volume_id)
+            volume.capacity = i
+            self.device.volumes._setObject(volume_id, volume)
+            self.device.volumes._getOb(volume_id).index_object()
+
+    def bench_capacity_range(self):
+        # Select the largest tenth of the volumes.
+        threshold = self.count * 9 // 10
+
+        start = time.time()
+        python_ids = [
+            obj.id
+            for _, obj in load_objects(self.device, [
+                x.getPath() for x in catalog_records(
+                    self.device, 'Volume', fields=())])
+            if obj.capacity > threshold]
+        python_time = time.time() - start
+
+        start = time.time()
+        catalog_ids = [
+            x.id for x in catalog_records(
+                self.device, 'Volume',
+                range_query('capacity', low=threshold, exclusive=True),
+                fields=('id',))]
+        catalog_time = time.time() - start
+
+        self.assertEquals(sorted(python_ids), sorted(catalog_ids))
+
+        print "\ncapacity > {} of {} Volume components: {:.3f}s Python " \
+            "filter, {:.3f}s catalog range query ({} matches)".format(
+                threshold, self.count, python_time, catalog_time,
+                len(catalog_ids))
+
+
+if __name__ == "__main__":
+    main(BenchmarkIndexTypes)
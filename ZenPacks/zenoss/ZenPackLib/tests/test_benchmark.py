@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""zenpacklib --benchmark tests."""
+
+import copy
+import json
+import os
+import shutil
+import tempfile
+
+# Zenoss Imports
+import Globals  # noqa
+from Products.ZenUtils.Utils import unused
+unused(Globals)
+
+from Products.ZenTestCase.BaseTestCase import BaseTestCase
+
+# zenpacklib Imports
+from ZenPacks.zenoss.ZenPackLib.lib.benchmark import (
+    STAGES, Benchmark, compare, summarize)
+
+
+YAML_DOC = """
+name: ZenPacks.zenoss.BenchmarkTest
+
+classes:
+  BenchmarkDevice:
+    base: [zenpacklib.Device]
+
+  BenchmarkComponent:
+    base: [zenpacklib.Component]
+    properties:
+      status:
+        label: Status
+
+class_relationships:
+  - BenchmarkDevice 1:MC BenchmarkComponent
+
+device_classes:
+  /BenchmarkTest:
+    templates:
+      Device:
+        datasources:
+          sysUpTime:
+            type: SNMP
+            oid: 1.3.6.1.2.1.25.1.1.0
+            datapoints:
+              sysUpTime: GAUGE
+"""
+
+
+class TestBenchmark(BaseTestCase):
+    """Test Benchmark and compare."""
+
+    def afterSetUp(self):
+        super(TestBenchmark, self).afterSetUp()
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'zenpack.yaml')
+        with open(self.filename, 'w') as yaml_file:
+            yaml_file.write(YAML_DOC)
+
+    def beforeTearDown(self):
+        shutil.rmtree(self.directory)
+        super(TestBenchmark, self).beforeTearDown()
+
+    def test_summarize(self):
+        summary = summarize([3, 1, 2, 4])
+        self.assertEquals(1, summary['min'])
+        self.assertEquals(4, summary['max'])
+        self.assertEquals(2.5, summary['mean'])
+        self.assertEquals(2.5, summary['median'])
+        self.assertAlmostEquals(1.291, summary['stdev'], places=3)
+
+    def test_run(self):
+        results = Benchmark(self.directory, repeat=2).run()
+        json.dumps(results)
+
+        self.assertEquals('ZenPacks.zenoss.BenchmarkTest', results['name'])
+        self.assertEquals(2, results['counts']['classes'])
+        self.assertEquals(1, results['counts']['templates'])
+        self.assertEquals(list(STAGES), results['stages'].keys())
+        for stage in results['stages'].itervalues():
+            self.assertTrue(stage['min'] <= stage['median'] <= stage['max'])
+            self.assertTrue(stage['peak_kb'] >= 0)
+
+    def test_compare(self):
+        baseline = Benchmark(self.filename, repeat=1).run()
+        self.assertEquals([], compare(baseline, baseline))
+
+        results = copy.deepcopy(baseline)
+        results['stages']['construct']['median'] = (
+            baseline['stages']['construct']['median'] * 2 + 1)
+
+        regressions = compare(results, baseline, tolerance=0.5)
+        self.assertEquals(
+            [('construct', 'median')],
+            [(x['stage'], x['metric']) for x in regressions])
+
+
+def test_suite():
+    """Return test suite for this module."""
+    from unittest import TestSuite, makeSuite
+    suite = TestSuite()
+    suite.addTest(makeSuite(TestBenchmark))
+    return suite
+
+
+if __name__ == "__main__":
+    from zope.testrunner.runner import Runner
+    runner = Runner(found_suites=[test_suite()])
+    runner.run()
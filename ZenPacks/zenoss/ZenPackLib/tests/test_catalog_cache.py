@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Catalog handle cache tests."""
+
+# Zenoss Imports
+import Globals  # noqa
+from Products.ZenUtils.Utils import unused
+unused(Globals)
+
+from Products.ZenTestCase.BaseTestCase import BaseTestCase
+
+# zenpacklib Imports
+from ZenPacks.zenoss.ZenPackLib.lib.base.CatalogBase import CatalogBase
+from ZenPacks.zenoss.ZenPackLib.tests.ZPLTestHarness import ZPLTestHarness
+
+
+YAML_DOC = """
+name: ZenPacks.zenoss.CatalogCacheTest
+
+class_relationships:
+  - CacheDevice 1:MC Disk
+
+classes:
+  CacheDevice:
+    base: [zenpacklib.Device]
+
+  Disk:
+    base: [zenpacklib.Component]
+    properties:
+      device_idx:
+        index_type: field
+        index_scope: device
+      global_idx:
+        index_type: field
+        index_scope: global
+"""
+
+ZP = ZPLTestHarness(YAML_DOC)
+
+GLOBAL_CATALOG = 'ZenPacks_zenoss_CatalogCacheTest_DiskSearch'
+
+
+class TestCatalogCache(BaseTestCase):
+    """Test caching of resolved catalogs."""
+
+    def afterSetUp(self):
+        super(TestCatalogCache, self).afterSetUp()
+
+        self.dmd.REQUEST = None
+        self.dmd.Devices.createOrganizer('/CatalogCacheTest')
+        self.dmd.Devices.CatalogCacheTest._setProperty(
+            'zPythonClass', 'ZenPacks.zenoss.CatalogCacheTest.CacheDevice')
+
+        self.CFG = ZP.cfg
+        self.device = self.dmd.Devices.CatalogCacheTest.createInstance(
+            'testdevice')
+
+        from ZenPacks.zenoss.CatalogCacheTest.Disk import Disk
+        self.Disk = Disk
+
+    def beforeTearDown(self):
+        CatalogBase.catalog_cache = True
+        super(TestCatalogCache, self).beforeTearDown()
+
+    def add_disks(self, count):
+        disks = []
+        for i in range(count):
+            disk_id = 'disk{}'.format(i)
+            self.device.disks._setObject(disk_id, self.Disk(disk_id))
+            disks.append(self.device.disks._getOb(disk_id))
+
+        return disks
+
+    def test_catalogs_cached(self):
+        disk = self.add_disks(1)[0]
+        disk.index_object()
+
+        self.assertEquals(
+            set(['DiskSearch']),
+            set(self.device._v_zpl_catalogs))
+
+        self.assertIn(GLOBAL_CATALOG, self.dmd.Devices._v_zpl_catalogs)
+
+    def test_cached_catalog_wrapped(self):
+        disk = self.add_disks(1)[0]
+        disk.index_object()
+
+        catalog = disk.get_device_catalog('Disk')
+        self.assertEquals(
+            self.device.getPrimaryId(),
+            catalog.aq_parent.getPrimaryId())
+
+        self.assertEquals(1, len(disk.device_search('Disk', id='disk0')))
+
+    def test_delete_invalidates(self):
+        disk = self.add_disks(1)[0]
+        disk.index_object()
+
+        self.dmd.Devices._delObject(GLOBAL_CATALOG)
+        CatalogBase.clear_catalog_cache(self.dmd.Devices)
+
+        # The catalog is created again rather than served from the cache.
+        disk.index_object()
+        self.assertIsNotNone(getattr(self.dmd.Devices, GLOBAL_CATALOG, None))
+        self.assertEquals(
+            1, len(self.Disk.get_global_catalog(self.dmd, 'Disk')()))
+
+
+def test_suite():
+    """Return test suite for this module."""
+    from unittest import TestSuite, makeSuite
+    suite = TestSuite()
+    suite.addTest(makeSuite(TestCatalogCache))
+    return suite
+
+
+if __name__ == "__main__":
+    from zope.testrunner.runner import Runner
+    runner = Runner(found_suites=[test_suite()])
+    runner.run()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Catalog consistency checker tests."""
+
+import os
+import tempfile
+
+# Zenoss Imports
+import Globals  # noqa
+from Products.ZenUtils.Utils import unused
+unused(Globals)
+
+from Products.ZenTestCase.BaseTestCase import BaseTestCase
+
+# zenpacklib Imports
+from ZenPacks.zenoss.ZenPackLib.lib.base.CatalogBase import CatalogBase
+from ZenPacks.zenoss.ZenPackLib.lib.catalogcheck import CatalogChecker
+from ZenPacks.zenoss.ZenPackLib.lib.helpers.Checkpoint import Checkpoint
+from ZenPacks.zenoss.ZenPackLib.tests.ZPLTestHarness import ZPLTestHarness
+
+
+YAML_DOC = """
+name: ZenPacks.zenoss.CheckTest
+
+class_relationships:
+  - CheckDevice 1:MC Disk
+
+classes:
+  CheckDevice:
+    base: [zenpacklib.Device]
+
+  Disk:
+    base: [zenpacklib.Component]
+    properties:
+      serial:
+        index_type: field
+        index_scope: both
+"""
+
+ZP = ZPLTestHarness(YAML_DOC)
+
+
+class TestCatalogCheck(BaseTestCase):
+    """Test CatalogChecker."""
+
+    def afterSetUp(self):
+        super(TestCatalogCheck, self).afterSetUp()
+
+        self.dmd.REQUEST = None
+        self.dmd.Devices.createOrganizer('/CheckTest')
+        self.dmd.Devices.CheckTest._setProperty(
+            'zPythonClass', 'ZenPacks.zenoss.CheckTest.CheckDevice')
+
+        self.CFG = ZP.cfg
+        self.device = self.dmd.Devices.CheckTest.createInstance('testdevice')
+
+        from ZenPacks.zenoss.CheckTest.Disk import Disk
+
+        self.disks = []
+        for i in range(3):
+            disk_id = 'disk{}'.format(i)
+            disk = Disk(disk_id)
+            disk.serial = 'SN{}'.format(i)
+            self.device.disks._setObject(disk_id, disk)
+            disk = self.device.disks._getOb(disk_id)
+            disk.index_object()
+            self.disks.append(disk)
+
+    def check(self, repair=False):
+        checker = CatalogChecker(self.dmd, repair=repair)
+        return checker.check_device(self.device)
+
+    def test_consistent(self):
+        stats = self.check()
+        self.assertEquals(3, stats['components'])
+        self.assertEquals(0, stats['missing'] + stats['stale'] + stats['extra'])
+
+    def test_problems(self):
+        # Missing from the device catalog.
+        self.device.DiskSearch.uncatalog_object(self.disks[0].getPrimaryId())
+
+        # Stale in every catalog.
+        self.disks[1].serial = 'changed'
+
+        # Extra in the device catalog.
+        self.device.DiskSearch.catalog_object(
+            self.disks[2], '{}-gone'.format(self.disks[2].getPrimaryId()))
+
+        stats = self.check()
+        self.assertEquals(1, stats['missing'])
+        self.assertEquals(2, stats['stale'])
+        self.assertEquals(1, stats['extra'])
+        self.assertEquals(0, stats['repaired'])
+
+        stats = self.check(repair=True)
+        self.assertEquals(4, stats['repaired'])
+
+        stats = self.check()
+        self.assertEquals(0, stats['missing'] + stats['stale'] + stats['extra'])
+
+    def test_missing_catalog(self):
+        self.device._delObject('DiskSearch')
+        CatalogBase.clear_catalog_cache(self.device)
+
+        stats = self.check()
+        self.assertEquals(3, stats['missing'])
+        self.assertIsNone(getattr(self.device, 'DiskSearch', None))
+
+        stats = self.check(repair=True)
+        self.assertEquals(3, stats['repaired'])
+
+        stats = self.check()
+        self.assertEquals(0, stats['missing'] + stats['stale'] + stats['extra'])
+
+    def test_checkpoint(self):
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            checkpoint = Checkpoint(filename)
+            checkpoint.add(['/a', '/b'])
+
+            checkpoint = Checkpoint(filename)
+            self.assertIn('/a', checkpoint)
+            self.assertNotIn('/c', checkpoint)
+            self.assertEquals(2, len(checkpoint))
+        finally:
+            os.unlink(filename)
+
+
+def test_suite():
+    """Return test suite for this module."""
+    from unittest import TestSuite, makeSuite
+    suite = TestSuite()
+    suite.addTest(makeSuite(TestCatalogCheck))
+    return suite
+
+
+if __name__ == "__main__":
+    from zope.testrunner.runner import Runner
+    runner = Runner(found_suites=[test_suite()])
+    runner.run()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Metadata-only catalog search and batched object loading tests."""
+
+# Zenoss Imports
+import Globals  # noqa
+from Products.ZenUtils.Utils import unused
+unused(Globals)
+
+from Products.ZenTestCase.BaseTestCase import BaseTestCase
+
+# zenpacklib Imports
+from ZenPacks.zenoss.ZenPackLib.lib.functions import load_objects
+from ZenPacks.zenoss.ZenPackLib.tests.ZPLTestHarness import ZPLTestHarness
+
+
+YAML_DOC = """
+name: ZenPacks.zenoss.RecordTest
+
+class_relationships:
+  - RecordDevice 1:MC Disk
+  - RecordDevice 1:MC Pool
+  - Pool 1:M Disk
+
+classes:
+  RecordDevice:
+    base: [zenpacklib.Device]
+
+  Pool:
+    base: [zenpacklib.Component]
+
+  Disk:
+    base: [zenpacklib.Component]
+    properties:
+      size:
+        type: int
+        index_type: field
+        index_scope: both
+        index_metadata: true
+      serial:
+        index_metadata: true
+"""
+
+ZP = ZPLTestHarness(YAML_DOC)
+
+
+class TestCatalogRecords(BaseTestCase):
+    """Test searches that return catalog metadata records."""
+
+    def afterSetUp(self):
+        super(TestCatalogRecords, self).afterSetUp()
+
+        self.dmd.REQUEST = None
+        self.dmd.Devices.createOrganizer('/RecordTest')
+        self.dmd.Devices.RecordTest._setProperty(
+            'zPythonClass', 'ZenPacks.zenoss.RecordTest.RecordDevice')
+
+        self.CFG = ZP.cfg
+        self.device = self.dmd.Devices.RecordTest.createInstance('testdevice')
+
+        from ZenPacks.zenoss.RecordTest.Disk import Disk
+        from ZenPacks.zenoss.RecordTest.Pool import Pool
+
+        self.device.pools._setObject('pool1', Pool('pool1'))
+        self.pool = self.device.pools._getOb('pool1')
+
+        for i in range(5):
+            disk_id = 'disk{}'.format(i)
+            disk = Disk(disk_id)
+            disk.title = 'Disk {}'.format(i)
+            disk.size = i * 10
+            disk.serial = 'SN{}'.format(i)
+            self.device.disks._setObject(disk_id, disk)
+            self.device.disks._getOb(disk_id).index_object()
+
+    def test_catalog_columns(self):
+        Disk = self.CFG.classes['Disk'].model_class
+        self.assertEquals(
+            ('serial', 'size'), Disk._device_catalog_columns['Disk'])
+        self.assertEquals(('size',), Disk._global_catalog_columns['Disk'])
+
+    def test_device_records(self):
+        records = self.pool.device_records(
+            'Disk', fields=('id', 'title', 'serial'),
+            sort_on='size', sort_order='descending', limit=2)
+
+        self.assertEquals(
+            [{'id': 'disk4', 'title': 'Disk 4', 'serial': 'SN4'},
+             {'id': 'disk3', 'title': 'Disk 3', 'serial': 'SN3'}],
+            records)
+
+        self.assertEquals(
+            self.device.disks._getOb('disk4').getPrimaryId(),
+            records[0].getPath())
+
+        self.assertEquals('SN4', records[0].serial)
+
+    def test_unknown_field(self):
+        self.assertRaises(
+            KeyError,
+            self.pool.device_records, 'Disk', fields=('nonexistent',))
+
+    def test_load_objects(self):
+        records = self.pool.device_records('Disk', fields=())
+        paths = [x.getPath() for x in records] + ['/zport/dmd/nonexistent']
+
+        objects = list(load_objects(self.device, paths, batch=2))
+
+        self.assertEquals(5, len(objects))
+        self.assertEquals(
+            sorted(x.getPath() for x in records),
+            [x[0] for x in objects])
+
+        self.assertEquals(
+            [x[0] for x in objects],
+            [x[1].getPrimaryId() for x in objects])
+
+    def test_set_ids_in_relationship(self):
+        self.pool.set_disks(['disk1', 'disk2'])
+        self.assertEquals(
+            ['disk1', 'disk2'],
+            sorted(self.pool.get_disks()))
+
+        self.device.disks._getOb('disk3').set_pool('pool1')
+        self.assertEquals(
+            ['disk1', 'disk2', 'disk3'],
+            sorted(self.pool.get_disks()))
+
+
+def test_suite():
+    """Return test suite for this module."""
+    from unittest import TestSuite, makeSuite
+    suite = TestSuite()
+    suite.addTest(makeSuite(TestCatalogRecords))
+    return suite
+
+
+if __name__ == "__main__":
+    from zope.testrunner.runner import Runner
+    runner = Runner(found_suites=[test_suite()])
+    runner.run()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Targeted, batched catalog reindex tests."""
+
+# Zenoss Imports
+import Globals  # noqa
+from Products.ZenUtils.Utils import unused
+unused(Globals)
+
+from Products.ZenTestCase.BaseTestCase import BaseTestCase
+
+# zenpacklib Imports
+from ZenPacks.zenoss.ZenPackLib.lib.base.CatalogBase import CatalogBase
+from ZenPacks.zenoss.ZenPackLib.tests.ZPLTestHarness import ZPLTestHarness
+
+
+YAML_DOC = """
+name: ZenPacks.zenoss.ReindexTest
+
+class_relationships:
+  - ReindexDevice 1:MC Disk
+
+classes:
+  ReindexDevice:
+    base: [zenpacklib.Device]
+
+  Disk:
+    base: [zenpacklib.Component]
+    properties:
+      global_idx:
+        index_type: field
+        index_scope: global
+"""
+
+ZP = ZPLTestHarness(YAML_DOC)
+
+GLOBAL_CATALOG = 'ZenPacks_zenoss_ReindexTest_DiskSearch'
+CLASSNAME = 'ZenPacks.zenoss.ReindexTest.Disk.Disk'
+
+
+class TestCatalogReindex(BaseTestCase):
+    """Test deferred, targeted and resumable catalog reindexing."""
+
+    def afterSetUp(self):
+        super(TestCatalogReindex, self).afterSetUp()
+
+        self.dmd.REQUEST = None
+        self.dmd.Devices.createOrganizer('/ReindexTest')
+        self.dmd.Devices.ReindexTest._setProperty(
+            'zPythonClass', 'ZenPacks.zenoss.ReindexTest.ReindexDevice')
+
+        self.CFG = ZP.cfg
+        self.device = self.dmd.Devices.ReindexTest.createInstance(
+            'testdevice')
+
+        from ZenPacks.zenoss.ReindexTest.Disk import Disk
+        self.Disk = Disk
+
+        for i in range(5):
+            disk_id = 'disk{}'.format(i)
+            self.device.disks._setObject(disk_id, Disk(disk_id))
+
+        # Start each test without the global catalog.
+        if getattr(self.dmd.Devices, GLOBAL_CATALOG, None) is not None:
+            self.dmd.Devices._delObject(GLOBAL_CATALOG)
+        CatalogBase.clear_catalog_cache(self.dmd.Devices)
+
+    def test_create_defers_reindex(self):
+        zcatalog = self.Disk.create_global_catalog(self.dmd, 'Disk')
+
+        self.assertEquals(0, len(zcatalog()))
+        self.assertEquals(
+            {'classname': CLASSNAME, 'idxs': [], 'last': None},
+            CatalogBase.get_pending_reindex(zcatalog))
+
+    def test_reindex_batches(self):
+        zcatalog = self.Disk.create_global_catalog(self.dmd, 'Disk')
+
+        count = CatalogBase.reindex_catalog(
+            self.dmd.Devices, zcatalog, batch=2)
+
+        self.assertEquals(5, count)
+        self.assertEquals(5, len(zcatalog()))
+        self.assertIsNone(CatalogBase.get_pending_reindex(zcatalog))
+
+    def test_reindex_over_limit_pending(self):
+        self.assertIsNone(self.Disk.update_global_catalog(
+            self.dmd, 'Disk', limit=4))
+
+        zcatalog = getattr(self.dmd.Devices, GLOBAL_CATALOG)
+        self.assertEquals(0, len(zcatalog()))
+        self.assertIsNotNone(CatalogBase.get_pending_reindex(zcatalog))
+
+        self.assertEquals(5, self.Disk.update_global_catalog(
+            self.dmd, 'Disk', limit=5))
+        self.assertEquals(5, len(zcatalog()))
+
+    def test_reindex_resumes(self):
+        zcatalog = self.Disk.create_global_catalog(self.dmd, 'Disk')
+        pending = CatalogBase.get_pending_reindex(zcatalog)
+        last = self.device.disks._getOb('disk1').getPrimaryId()
+        zcatalog._zpl_reindex = dict(pending, last=last)
+
+        count = CatalogBase.reindex_catalog(self.dmd.Devices, zcatalog)
+
+        self.assertEquals(3, count)
+        self.assertEquals(
+            ['disk2', 'disk3', 'disk4'],
+            sorted(x.id for x in zcatalog()))
+
+    def test_added_index_only(self):
+        zcatalog = self.Disk.create_global_catalog(self.dmd, 'Disk')
+        CatalogBase.reindex_catalog(self.dmd.Devices, zcatalog)
+
+        added = CatalogBase.create_catalog_indexes(
+            zcatalog, {'global_idx': 'field', 'new_idx': 'field'})
+        CatalogBase.mark_reindex(zcatalog, CLASSNAME, added)
+
+        self.assertEquals(['new_idx'], added)
+        self.assertEquals(
+            ['new_idx'],
+            CatalogBase.get_pending_reindex(zcatalog)['idxs'])
+
+    def test_default_columns_only_when_created(self):
+        zcatalog = self.Disk.create_global_catalog(self.dmd, 'Disk')
+        CatalogBase.reindex_catalog(self.dmd.Devices, zcatalog)
+        self.assertIn('title', zcatalog._catalog.names)
+
+        # Catalogs from before title was a default column keep working
+        # without it rather than being reindexed.
+        zcatalog._catalog.delColumn('title')
+        self.Disk.create_global_catalog(self.dmd, 'Disk')
+        self.assertNotIn('title', zcatalog._catalog.names)
+        self.assertIsNone(CatalogBase.get_pending_reindex(zcatalog))
+
+    def test_mark_reindex_merges(self):
+        zcatalog = self.Disk.create_global_catalog(self.dmd, 'Disk')
+        CatalogBase.reindex_catalog(self.dmd.Devices, zcatalog)
+
+        CatalogBase.mark_reindex(zcatalog, CLASSNAME, ['a'])
+        CatalogBase.mark_reindex(zcatalog, CLASSNAME, ['b'])
+        self.assertEquals(
+            ['a', 'b'],
+            CatalogBase.get_pending_reindex(zcatalog)['idxs'])
+
+        CatalogBase.mark_reindex(zcatalog, CLASSNAME, [])
+        self.assertEquals(
+            [], CatalogBase.get_pending_reindex(zcatalog)['idxs'])
+
+
+def test_suite():
+    """Return test suite for this module."""
+    from unittest import TestSuite, makeSuite
+    suite = TestSuite()
+    suite.addTest(makeSuite(TestCatalogReindex))
+    return suite
+
+
+if __name__ == "__main__":
+    from zope.testrunner.runner import Runner
+    runner = Runner(found_suites=[test_suite()])
+    runner.run()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Sharded global catalog tests."""
+
+# Zenoss Imports
+import Globals  # noqa
+from Products.ZenUtils.Utils import unused
+unused(Globals)
+
+from Products.ZenTestCase.BaseTestCase import BaseTestCase
+
+# zenpacklib Imports
+from ZenPacks.zenoss.ZenPackLib.lib.base.CatalogBase import (
+    CatalogBase, global_catalog_shard)
+from ZenPacks.zenoss.ZenPackLib.tests.ZPLTestHarness import ZPLTestHarness
+
+
+YAML_DOC = """
+name: ZenPacks.zenoss.ShardTest
+
+class_relationships:
+  - ShardDevice 1:MC Disk
+
+classes:
+  ShardDevice:
+    base: [zenpacklib.Device]
+
+  Disk:
+    base: [zenpacklib.Component]
+    global_catalog_shards: 4
+    properties:
+      size:
+        type: int
+        index_type: numeric
+        index_scope: global
+"""
+
+ZP = ZPLTestHarness(YAML_DOC)
+
+CATALOG = 'ZenPacks_zenoss_ShardTest_DiskSearch'
+
+
+class TestCatalogShards(BaseTestCase):
+    """Test sharded global catalogs."""
+
+    def afterSetUp(self):
+        super(TestCatalogShards, self).afterSetUp()
+
+        self.dmd.REQUEST = None
+        self.dmd.Devices.createOrganizer('/ShardTest')
+        self.dmd.Devices.ShardTest._setProperty(
+            'zPythonClass', 'ZenPacks.zenoss.ShardTest.ShardDevice')
+
+        self.CFG = ZP.cfg
+
+        from ZenPacks.zenoss.ShardTest.Disk import Disk
+        self.Disk = Disk
+
+        self.devices = []
+        for i in range(8):
+            device = self.dmd.Devices.ShardTest.createInstance(
+                'device{}'.format(i))
+
+            for j in range(2):
+                disk_id = 'disk{}'.format(j)
+                disk = Disk(disk_id)
+                disk.size = i * 10 + j
+                device.disks._setObject(disk_id, disk)
+                device.disks._getOb(disk_id).index_object()
+
+            self.devices.append(device)
+
+    def beforeTearDown(self):
+        if '_global_catalog_shards' in self.Disk.__dict__:
+            self.Disk._global_catalog_shards = {'Disk': 4}
+        super(TestCatalogShards, self).beforeTearDown()
+
+    def test_shard_assignment(self):
+        for device in self.devices:
+            shard = global_catalog_shard(device.id, 4)
+            zcatalog = getattr(
+                self.dmd.Devices, '{}_shard{}Search'.format(CATALOG[:-6], shard))
+
+            self.assertEquals(
+                2, len(zcatalog(device_id=device.id)),
+                "{} not in shard {}".format(device.id, shard))
+
+        self.assertIsNone(getattr(self.dmd.Devices, CATALOG, None))
+
+    def test_global_search(self):
+        self.assertEquals(16, len(self.Disk.global_search(self.dmd, 'Disk')))
+
+        brains = self.Disk.global_search(
+            self.dmd, 'Disk',
+            sort_on='size', sort_order='descending', sort_limit=3)
+
+        self.assertEquals([71, 70, 61], [x.size for x in brains])
+
+    def test_global_records(self):
+        records = self.Disk.global_records(
+            self.dmd, 'Disk', fields=('id',), sort_on='size', limit=2)
+
+        self.assertEquals([0, 1], [x.size for x in records])
+
+    def test_migrate_to_shards(self):
+        for name in CatalogBase.get_global_shard_ids(self.dmd.Devices, CATALOG):
+            self.dmd.Devices._delObject(name)
+        CatalogBase.clear_catalog_cache(self.dmd.Devices)
+
+        # Index into an unsharded catalog first.
+        self.Disk._global_catalog_shards = {}
+        for device in self.devices:
+            for disk in device.disks():
+                disk.index_object()
+
+        self.assertEquals(16, len(getattr(self.dmd.Devices, CATALOG)()))
+
+        self.Disk._global_catalog_shards = {'Disk': 4}
+        self.Disk.update_global_catalog(self.dmd, 'Disk')
+
+        self.assertIsNone(getattr(self.dmd.Devices, CATALOG, None))
+        self.assertEquals(
+            4, len(CatalogBase.get_global_shard_ids(self.dmd.Devices, CATALOG)))
+        self.assertEquals(16, len(self.Disk.global_search(self.dmd, 'Disk')))
+
+
+def test_suite():
+    """Return test suite for this module."""
+    from unittest import TestSuite, makeSuite
+    suite = TestSuite()
+    suite.addTest(makeSuite(TestCatalogShards))
+    return suite
+
+
+if __name__ == "__main__":
+    from zope.testrunner.runner import Runner
+    runner = Runner(found_suites=[test_suite()])
+    runner.run()
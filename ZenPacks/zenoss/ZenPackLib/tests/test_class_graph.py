@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Graph-only class diagram loader tests."""
+
+import json
+
+# Zenoss Imports
+import Globals  # noqa
+from Products.ZenUtils.Utils import unused
+unused(Globals)
+
+from Products.ZenTestCase.BaseTestCase import BaseTestCase
+
+# zenpacklib Imports
+from ZenPacks.zenoss.ZenPackLib.lib.helpers.ClassGraph import (
+    ClassGraph, short_name)
+from ZenPacks.zenoss.ZenPackLib.tests.ZPLTestHarness import ZPLTestHarness
+
+
+YAML_DOC = """
+name: ZenPacks.zenoss.GraphTest
+
+classes:
+  DEFAULTS:
+    base: [zenpacklib.Component]
+
+  GraphDevice:
+    base: [zenpacklib.Device]
+
+  Pool:
+    label: Pool
+
+  Disk:
+    base: [Pool]
+
+class_relationships:
+  - GraphDevice 1:MC Pool
+  - Pool(disks) 1:M (pool)Disk
+  - Disk(peers) M:M (peerOf)Pool
+
+device_classes:
+  /GraphTest:
+    templates:
+      Device:
+        datasources:
+          sysUpTime:
+            type: SNMP
+            oid: 1.3.6.1.2.1.25.1.1.0
+            datapoints:
+              sysUpTime: GAUGE
+"""
+
+
+class TestClassGraph(BaseTestCase):
+    """Test ClassGraph."""
+
+    def afterSetUp(self):
+        super(TestClassGraph, self).afterSetUp()
+        self.graph = ClassGraph.load(YAML_DOC)
+
+    def test_same_as_specs(self):
+        cfg = ZPLTestHarness(YAML_DOC).cfg
+
+        self.assertEquals('ZenPacks.zenoss.GraphTest', self.graph.name)
+        self.assertEquals(
+            {x.name: [b if isinstance(b, str) else b.__name__ for b in x.bases]
+             for x in cfg.classes.values()},
+            {k: [short_name(b) for b in v]
+             for k, v in self.graph.classes.items()})
+
+        self.assertEquals(
+            [(x.left_class, x.left_relname, x.cardinality,
+              x.right_relname, x.right_class)
+             for x in cfg.class_relationships],
+            [(x.left_class, x.left_relname, x.cardinality,
+              x.right_relname, x.right_class)
+             for x in self.graph.relationships])
+
+    def test_yuml(self):
+        yuml = self.graph.to_yuml().splitlines()
+        self.assertIn("[Device]^-[GraphDevice]", yuml)
+        self.assertIn("[Component]^-[Pool]", yuml)
+        self.assertIn("[Pool]^-[Disk]", yuml)
+        self.assertIn("[GraphDevice]++pools-graphDevice[Pool]", yuml)
+        self.assertIn("[Pool]disks-.-pool++[Disk]", yuml)
+        self.assertIn("[Disk]++peers-.-peerOf++[Pool]", yuml)
+
+    def test_dot(self):
+        dot = self.graph.to_dot()
+        self.assertTrue(dot.startswith('digraph "ZenPacks.zenoss.GraphTest" {'))
+        self.assertIn('"Disk" -> "Pool" [arrowhead=empty];', dot)
+        self.assertIn(
+            '"GraphDevice" -> "Pool" [dir=both, arrowtail=diamond, '
+            'arrowhead=crow, taillabel="pools", headlabel="graphDevice"];',
+            dot)
+
+    def test_json(self):
+        adjacency = json.loads(json.dumps(self.graph.to_json()))['classes']
+        self.assertEquals(['zenpacklib.Device'], adjacency['GraphDevice']['bases'])
+        self.assertEquals(
+            [('graphDevice', 'ToOne', 'GraphDevice'),
+             ('disks', 'ToMany', 'Disk'),
+             ('peerOf', 'ToMany', 'Disk')],
+            [(x['relname'], x['type'], x['remote_class'])
+             for x in adjacency['Pool']['relationships']])
+
+
+def test_suite():
+    """Return test suite for this module."""
+    from unittest import TestSuite, makeSuite
+    suite = TestSuite()
+    suite.addTest(makeSuite(TestClassGraph))
+    return suite
+
+
+if __name__ == "__main__":
+    from zope.testrunner.runner import Runner
+    runner = Runner(found_suites=[test_suite()])
+    runner.run()
@@ -50,6 +50,15 @@ class TestCommands(ZPLTestCommand):
     def test_smoke_class_diagram(self):
         self._zenpacklib_cmd("--diagram", self.yaml_path)
 
+    def test_class_diagram_formats(self):
+        output = self._zenpacklib_cmd(
+            "--diagram", "--diagram-format=dot", self.yaml_path)
+        self.assertTrue(output.startswith("digraph"))
+
+        output = self._zenpacklib_cmd(
+            "--diagram", "--diagram-format=json", self.yaml_path)
+        self.assertIn('"classes"', output)
+
     def test_create(self):
         zenpack_name = "ZenPacks.test.ZPLTestCreate"
 
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Bulk component removal tests."""
+
+# Zenoss Imports
+import Globals  # noqa
+from Products.ZenUtils.Utils import unused
+unused(Globals)
+
+from Acquisition import aq_base
+from Products.ZenTestCase.BaseTestCase import BaseTestCase
+
+# zenpacklib Imports
+from ZenPacks.zenoss.ZenPackLib.lib.base.ZenPack import get_device_path
+from ZenPacks.zenoss.ZenPackLib.tests.ZPLTestHarness import ZPLTestHarness
+
+
+DEVICE_YAML = """
+name: ZenPacks.zenoss.RemoveTestDevice
+
+classes:
+  RemoveDevice:
+    base: [zenpacklib.Device]
+"""
+
+COMPONENT_YAML = """
+name: ZenPacks.zenoss.RemoveTest
+
+class_relationships:
+  - ZenPacks.zenoss.RemoveTestDevice.RemoveDevice.RemoveDevice 1:MC Disk
+  - Disk 1:MC Partition
+
+classes:
+  Disk:
+    base: [zenpacklib.Component]
+    properties:
+      serial:
+        index_type: field
+
+  Partition:
+    base: [zenpacklib.Component]
+"""
+
+DEVICE_ZP = ZPLTestHarness(DEVICE_YAML)
+ZP = ZPLTestHarness(COMPONENT_YAML)
+
+
+class TestComponentRemoval(BaseTestCase):
+    """Test ZenPack.remove_components."""
+
+    def afterSetUp(self):
+        super(TestComponentRemoval, self).afterSetUp()
+
+        self.dmd.REQUEST = None
+        self.dmd.Devices.createOrganizer('/RemoveTest')
+        self.dmd.Devices.RemoveTest._setProperty(
+            'zPythonClass',
+            'ZenPacks.zenoss.RemoveTestDevice.RemoveDevice')
+
+        from ZenPacks.zenoss.RemoveTest.Disk import Disk
+        from ZenPacks.zenoss.RemoveTest.Partition import Partition
+
+        self.devices = []
+        for i in range(3):
+            device = self.dmd.Devices.RemoveTest.createInstance(
+                'device{}'.format(i))
+
+            for j in range(2):
+                disk_id = 'disk{}'.format(j)
+                device.disks._setObject(disk_id, Disk(disk_id))
+                disk = device.disks._getOb(disk_id)
+                disk.serial = 'SN{}'.format(j)
+                disk.index_object()
+
+                disk.partitions._setObject('part1', Partition('part1'))
+
+            self.devices.append(device)
+
+        self.zenpack = ZP.zp.schema.ZenPack(self.dmd)
+
+    def test_get_device_path(self):
+        self.assertEquals(
+            '/zport/dmd/Devices/Server/devices/dev1',
+            get_device_path(
+                '/zport/dmd/Devices/Server/devices/dev1/disks/disk1/partitions/p1'))
+
+        self.assertIsNone(get_device_path('/zport/dmd/Networks/10.0.0.0'))
+
+    def test_remove_components(self):
+        removed = self.zenpack.remove_components(self.app, batch=2)
+
+        self.assertEquals(12, removed)
+        for device in self.devices:
+            self.assertIsNone(getattr(aq_base(device), 'disks', None))
+            self.assertIsNone(getattr(aq_base(device), 'DiskSearch', None))
+
+    def test_resume(self):
+        self.devices[0]._delObject('disks')
+
+        removed = self.zenpack.remove_components(self.app)
+
+        self.assertEquals(8, removed)
+        self.assertEquals(0, self.zenpack.remove_components(self.app))
+
+
+def test_suite():
+    """Return test suite for this module."""
+    from unittest import TestSuite, makeSuite
+    suite = TestSuite()
+    suite.addTest(makeSuite(TestComponentRemoval))
+    return suite
+
+
+if __name__ == "__main__":
+    from zope.testrunner.runner import Runner
+    runner = Runner(found_suites=[test_suite()])
+    runner.run()
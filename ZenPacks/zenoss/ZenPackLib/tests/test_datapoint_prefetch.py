@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Batched datapoint-backed property tests."""
+
+import sys
+from zope.globalrequest import setRequest, clearRequest
+from ZenPacks.zenoss.ZenPackLib.tests.ZPLTestBase import ZPLTestBase, FakeRequest
+from ZenPacks.zenoss.ZenPackLib.lib.metrics import DatapointPrefetch
+from ZenPacks.zenoss.ZenPackLib.lib.prefetch import RequestPrefetch
+
+
+YAML_DOC = '''
+name: ZenPacks.zenoss.ZPL.Test
+
+class_relationships:
+  - TestDevice 1:MC TestComponent
+
+classes:
+  TestDevice:
+    base: [zenpacklib.Device]
+  TestComponent:
+    base: [zenpacklib.Component]
+    properties:
+      cpu:
+        datapoint: stats_cpu
+        datapoint_cached: false
+      memory:
+        datapoint: stats_memory
+      missing:
+        datapoint: stats_missing
+        datapoint_default: 42
+'''
+
+CLASSSPEC_MODULE = 'ZenPacks.zenoss.ZenPackLib.lib.spec.ClassSpec'
+
+
+class FakeMetricFacade(object):
+    """Metric facade returning canned values and counting calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def getMultiValues(self, contexts, metrics, start=None, returnSet=None):
+        self.calls += 1
+        values = {}
+        for i, context in enumerate(contexts):
+            values[context.getUUID()] = {
+                'stats_cpu': float(i),
+                'stats_memory': [1.0, float(i * 10)],
+                }
+        return values
+
+
+class TestDatapointPrefetch(ZPLTestBase):
+    """Test datapoint-backed properties served from a request prefetch."""
+
+    yaml_doc = YAML_DOC
+
+    def afterSetUp(self):
+        super(TestDatapointPrefetch, self).afterSetUp()
+        self.classspec_module = sys.modules[CLASSSPEC_MODULE]
+        self.has_metricfacade = self.classspec_module.HAS_METRICFACADE
+        self.classspec_module.HAS_METRICFACADE = True
+
+        self.facade = FakeMetricFacade()
+        setRequest(FakeRequest())
+        DatapointPrefetch.current(self.dmd).service.facade = self.facade
+
+    def beforeTearDown(self):
+        clearRequest()
+        self.classspec_module.HAS_METRICFACADE = self.has_metricfacade
+        super(TestDatapointPrefetch, self).beforeTearDown()
+
+    def get_components(self, count):
+        components = []
+        for i in range(count):
+            component = self.z.zp.TestComponent.TestComponent(
+                'test_component_{}'.format(i))
+            component.getUUID = lambda i=i: 'uuid-{}'.format(i)
+            component.dmd = self.dmd
+            components.append(component)
+        return components
+
+    def test_datapoint_properties(self):
+        self.assertEquals(
+            {'cpu': 'stats_cpu',
+             'memory': 'stats_memory',
+             'missing': 'stats_missing'},
+            self.z.zp.TestComponent.TestComponent._datapoint_properties)
+
+    def test_grid_prefetch(self):
+        info_class = self.z.cfg.classes['TestComponent'].info_class
+        infos = [info_class(x) for x in self.get_components(200)]
+
+        rows = [(x.cpu, x.memory, x.missing) for x in infos]
+
+        self.assertEquals(1, self.facade.calls)
+        self.assertEquals((5.0, 50.0, '42'), rows[5])
+        self.assertEquals((199.0, 1990.0, '42'), rows[199])
+
+    def test_abstract_prefetch(self):
+        self.assertRaises(TypeError, RequestPrefetch, self.dmd)
+
+
+def test_suite():
+    """Return test suite for this module."""
+    from unittest import TestSuite, makeSuite
+    suite = TestSuite()
+    suite.addTest(makeSuite(TestDatapointPrefetch))
+    return suite
+
+
+if __name__ == "__main__":
+    from zope.testrunner.runner import Runner
+    runner = Runner(found_suites=[test_suite()])
+    runner.run()
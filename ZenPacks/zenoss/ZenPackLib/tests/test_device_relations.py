@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Targeted and batched device relationship building tests."""
+
+import os
+import tempfile
+
+# Zenoss Imports
+import Globals  # noqa
+from Products.ZenUtils.Utils import unused
+unused(Globals)
+
+from Acquisition import aq_base
+from Products.ZenTestCase.BaseTestCase import BaseTestCase
+
+# zenpacklib Imports
+from ZenPacks.zenoss.ZenPackLib.lib.devicerelations import (
+    build_relations, get_batches, get_device_paths)
+from ZenPacks.zenoss.ZenPackLib.lib.helpers.Checkpoint import Checkpoint
+from ZenPacks.zenoss.ZenPackLib.tests.ZPLTestHarness import ZPLTestHarness
+
+
+DEVICE_YAML = """
+name: ZenPacks.zenoss.RelationTestDevice
+
+classes:
+  RelationDevice:
+    base: [zenpacklib.Device]
+"""
+
+COMPONENT_YAML = """
+name: ZenPacks.zenoss.RelationTest
+
+class_relationships:
+  - ZenPacks.zenoss.RelationTestDevice.RelationDevice.RelationDevice 1:MC Disk
+
+classes:
+  Disk:
+    base: [zenpacklib.Component]
+"""
+
+DEVICE_ZP = ZPLTestHarness(DEVICE_YAML)
+ZP = ZPLTestHarness(COMPONENT_YAML)
+
+
+class TestDeviceRelations(BaseTestCase):
+    """Test building relationships on existing devices."""
+
+    def afterSetUp(self):
+        super(TestDeviceRelations, self).afterSetUp()
+
+        self.dmd.REQUEST = None
+        self.dmd.Devices.createOrganizer('/RelationTest')
+        self.dmd.Devices.RelationTest._setProperty(
+            'zPythonClass',
+            'ZenPacks.zenoss.RelationTestDevice.RelationDevice')
+
+        self.devices = [
+            self.dmd.Devices.RelationTest.createInstance('device{}'.format(i))
+            for i in range(3)]
+
+        self.other = self.dmd.Devices.createInstance('other')
+
+        # Simulate devices that existed before the ZenPack was installed.
+        for device in self.devices:
+            device._delObject('disks')
+
+        self.zenpack = ZP.zp.schema.ZenPack(self.dmd)
+
+    def test_get_batches(self):
+        paths = [
+            '/zport/dmd/Devices/A/devices/a1',
+            '/zport/dmd/Devices/B/devices/b1',
+            '/zport/dmd/Devices/A/devices/a2',
+            '/zport/dmd/Devices/A/devices/a3',
+        ]
+
+        self.assertEquals(
+            [['/zport/dmd/Devices/A/devices/a1',
+              '/zport/dmd/Devices/A/devices/a2'],
+             ['/zport/dmd/Devices/A/devices/a3'],
+             ['/zport/dmd/Devices/B/devices/b1']],
+            get_batches(paths, 2))
+
+    def test_get_device_paths(self):
+        self.assertEquals(
+            [x.getPrimaryId() for x in self.devices],
+            get_device_paths(self.dmd, self.zenpack.NEW_RELATIONS))
+
+    def test_build_device_relations(self):
+        self.zenpack._buildDeviceRelations(self.app, batch=2)
+
+        for device in self.devices:
+            self.assertIsNotNone(getattr(aq_base(device), 'disks', None))
+
+    def test_checkpoint(self):
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            checkpoint = Checkpoint(filename)
+            checkpoint.add([self.devices[0].getPrimaryId()])
+
+            paths = get_device_paths(self.dmd, self.zenpack.NEW_RELATIONS)
+            count = build_relations(self.dmd, paths, checkpoint=checkpoint)
+
+            self.assertEquals(2, count)
+            self.assertIsNone(getattr(aq_base(self.devices[0]), 'disks', None))
+        finally:
+            os.unlink(filename)
+
+
+def test_suite():
+    """Return test suite for this module."""
+    from unittest import TestSuite, makeSuite
+    suite = TestSuite()
+    suite.addTest(makeSuite(TestDeviceRelations))
+    return suite
+
+
+if __name__ == "__main__":
+    from zope.testrunner.runner import Runner
+    runner = Runner(found_suites=[test_suite()])
+    runner.run()
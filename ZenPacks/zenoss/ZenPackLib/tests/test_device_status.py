@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Batched device status tests."""
+
+from zope.globalrequest import setRequest, clearRequest
+from ZenPacks.zenoss.ZenPackLib.tests.ZPLTestBase import ZPLTestBase, FakeRequest
+from ZenPacks.zenoss.ZenPackLib.lib.status import (
+    DeviceStatusService, DeviceStatusPrefetch,
+    )
+
+
+YAML_DOC = '''
+name: ZenPacks.zenoss.ZPL.Test
+
+classes:
+  TestDevice:
+    base: [zenpacklib.Device]
+'''
+
+
+class FakeZepFacade(object):
+    """ZEP facade returning canned event summaries."""
+
+    def __init__(self, events):
+        # {uuid: number of critical events}
+        self.events = events
+        self.calls = 0
+
+    def createEventFilter(self, **kwargs):
+        return kwargs
+
+    def getEventSummaries(self, offset, filter=None, limit=None):
+        self.calls += 1
+        summaries = []
+        for uuid in filter['tags']:
+            for i in range(self.events.get(uuid, 0)):
+                summaries.append(
+                    {'occurrence': [{'actor': {'element_uuid': uuid}}]})
+
+        return {
+            'total': len(summaries),
+            'events': summaries[offset:offset + limit],
+            }
+
+
+class TestDeviceStatus(ZPLTestBase):
+    """Test DeviceStatusService and DeviceInfoStatusProperty."""
+
+    yaml_doc = YAML_DOC
+
+    def afterSetUp(self):
+        super(TestDeviceStatus, self).afterSetUp()
+        DeviceStatusService.clear_cache()
+        self.zep = FakeZepFacade({'uuid-1': 2, 'uuid-3': 1})
+
+    def beforeTearDown(self):
+        clearRequest()
+        DeviceStatusService.clear_cache()
+        super(TestDeviceStatus, self).beforeTearDown()
+
+    def get_devices(self, count=3):
+        devices = []
+        for i in range(1, count + 1):
+            device = self.z.zp.TestDevice.TestDevice('test_device_{}'.format(i))
+            device.getUUID = lambda i=i: 'uuid-{}'.format(i)
+            device.monitorDevice = lambda: True
+            device.dmd = self.dmd
+            devices.append(device)
+        return devices
+
+    def test_single_query(self):
+        service = DeviceStatusService(self.dmd, zep=self.zep)
+        statuses = service.get_statuses(self.get_devices())
+
+        self.assertEquals(
+            {'uuid-1': 2, 'uuid-2': 0, 'uuid-3': 1}, statuses)
+        self.assertEquals(1, self.zep.calls)
+
+    def test_paging(self):
+        service = DeviceStatusService(self.dmd, zep=self.zep)
+        service.limit = 1
+        statuses = service.get_statuses(self.get_devices())
+
+        self.assertEquals(
+            {'uuid-1': 2, 'uuid-2': 0, 'uuid-3': 1}, statuses)
+        self.assertEquals(3, self.zep.calls)
+
+    def test_ttl(self):
+        devices = self.get_devices()
+        service = DeviceStatusService(self.dmd, zep=self.zep)
+        service.get_statuses(devices)
+        service.get_statuses(devices)
+        self.assertEquals(1, self.zep.calls)
+
+        service = DeviceStatusService(self.dmd, ttl=0, zep=self.zep)
+        service.get_statuses(devices)
+        self.assertEquals(2, self.zep.calls)
+
+    def test_unmonitored(self):
+        devices = self.get_devices()
+        devices[0].monitorDevice = lambda: False
+        service = DeviceStatusService(self.dmd, zep=self.zep)
+
+        self.assertIsNone(service.get_statuses(devices)['uuid-1'])
+
+    def test_info_prefetch(self):
+        request = FakeRequest()
+        setRequest(request)
+
+        prefetch = DeviceStatusPrefetch.current(self.dmd)
+        prefetch.service.zep = self.zep
+
+        info_class = self.z.cfg.classes['TestDevice'].info_class
+        infos = [info_class(x) for x in self.get_devices()]
+
+        self.assertEquals(
+            [False, True, False],
+            [x.status for x in infos])
+        self.assertEquals(1, self.zep.calls)
+
+
+def test_suite():
+    """Return test suite for this module."""
+    from unittest import TestSuite, makeSuite
+    suite = TestSuite()
+    suite.addTest(makeSuite(TestDeviceStatus))
+    return suite
+
+
+if __name__ == "__main__":
+    from zope.testrunner.runner import Runner
+    runner = Runner(found_suites=[test_suite()])
+    runner.run()
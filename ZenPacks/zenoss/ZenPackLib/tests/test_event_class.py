@@ -53,6 +53,22 @@ class TestEventClass(ZPLTestBase):
         self.assertEquals(self.z.yaml['event_classes']['/Status/Test']['mappings']['TestMapping']['sequence'],
                           self.z.cfg.event_classes['/Status/Test'].mappings['TestMapping'].sequence)
 
+    def test_instantiate(self):
+        ecspec = self.z.cfg.event_classes['/Status/Test']
+        mspec = ecspec.mappings['TestMapping']
+        ecspec.instantiate(self.dmd, addToZenPack=False)
+
+        eventclass = ecspec.get_organizer(self.dmd)
+        mapping = eventclass.instances._getOb('TestMapping')
+        self.assertEquals(mspec.regex, mapping.regex)
+        self.assertEquals(
+            'unchanged', mspec.create(eventclass, index=False)[1])
+
+        mapping.regex = 'changed'
+        self.assertEquals('update', mspec.plan(eventclass))
+        self.assertEquals('updated', mspec.create(eventclass)[1])
+        self.assertEquals(mspec.regex, mapping.regex)
+
 
 def test_suite():
     """Return test suite for this module."""
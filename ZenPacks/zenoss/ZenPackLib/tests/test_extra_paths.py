@@ -236,6 +236,21 @@ class TestExtraPaths(BaseTestCase):
         for id_ in ['ResourcePool-Top']:
             self.assertIn(id_, rp_facet_ids)
 
+    def testWalkFacets(self):
+        # One traversal classifies the same objects as both get_facets modes.
+        for component in (self.vm1, self.vm2, self.vm2.resourcePool()):
+            facet_paths = list(component.walk_facets())
+            self.assertEquals(
+                set(x.id for x in component.get_facets(recurse_all=True)),
+                set(x.id for _, x, _ in facet_paths))
+            self.assertEquals(
+                set(x.id for x in component.get_facets()),
+                set(x.id for _, x, included in facet_paths if included))
+
+        relnames = [
+            x for x, facet, _ in self.vm1.walk_facets() if facet.id == 'Cluster']
+        self.assertIn(('resourcePool', 'owner'), relnames)
+
 
 def test_suite():
     """Return test suite for this module."""
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Test removal of zpl_managed objects from exported objects.xml."""
+
+import os
+import tempfile
+
+# Zenoss Imports
+import Globals  # noqa
+from Products.ZenUtils.Utils import unused
+unused(Globals)
+
+from Products.ZenTestCase.BaseTestCase import BaseTestCase
+
+# zenpacklib Imports
+from ZenPacks.zenoss.ZenPackLib.lib.base.ZenPack import ZenPack
+
+
+OBJECTS_XML = """<?xml version="1.0"?>
+<objects>
+<!-- ('', 'zport', 'dmd', 'Events', 'Status', 'Test') -->
+<object id='/zport/dmd/Events/Status/Test' module='Products.ZenEvents.EventClass' class='EventClass'>
+<tomanycont id='instances'>
+<!-- ('', 'zport', 'dmd', 'Events', 'Status', 'Test', 'instances', 'managed') -->
+<object id='managed' module='Products.ZenEvents.EventClassInst' class='EventClassInst'>
+<property type="string" id="eventClassKey" mode="w" >managed</property>
+</object>
+<object id='custom' module='Products.ZenEvents.EventClassInst' class='EventClassInst'>
+<property type="string" id="eventClassKey" mode="w" >custom</property>
+</object>
+</tomanycont>
+</object>
+<!-- ('', 'zport', 'dmd', 'Devices', 'Server', 'rrdTemplates', 'Device') -->
+<object id='/zport/dmd/Devices/Server/rrdTemplates/Device' module='Products.ZenModel.RRDTemplate' class='RRDTemplate'>
+<tomanycont id='datasources'>
+<object id='ds1' module='Products.ZenModel.BasicDataSource' class='BasicDataSource'>
+</object>
+</tomanycont>
+</object>
+</objects>
+"""
+
+EVENT_CLASS = '/zport/dmd/Events/Status/Test'
+MAPPING = '/zport/dmd/Events/Status/Test/instances/managed'
+TEMPLATE = '/zport/dmd/Devices/Server/rrdTemplates/Device'
+
+
+class TestFilterXML(BaseTestCase):
+    """Test ZenPack.filter_xml."""
+
+    def afterSetUp(self):
+        super(TestFilterXML, self).afterSetUp()
+        fd, self.filename = tempfile.mkstemp(suffix='.xml')
+        with os.fdopen(fd, 'w') as f:
+            f.write(OBJECTS_XML)
+
+        self.zenpack = ZenPack(self.app)
+
+    def beforeTearDown(self):
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+        super(TestFilterXML, self).beforeTearDown()
+
+    def filtered(self, managed):
+        self.zenpack.filter_xml(self.filename, managed=set(managed))
+        if not os.path.exists(self.filename):
+            return None
+        with open(self.filename) as f:
+            return f.read()
+
+    def test_unchanged(self):
+        self.assertEquals(OBJECTS_XML, self.filtered([]))
+
+    def test_prune(self):
+        xml = self.filtered([MAPPING, TEMPLATE])
+
+        self.assertIn("id='custom'", xml.replace('"', "'"))
+        self.assertNotIn("'instances', 'managed'", xml)
+        self.assertNotIn("id='managed'", xml.replace('"', "'"))
+        self.assertNotIn('rrdTemplates', xml)
+        self.assertIn("'Status', 'Test')", xml)
+
+    def test_prune_contained(self):
+        xml = self.filtered(['/zport/dmd/Devices/Server/rrdTemplates'])
+        self.assertNotIn('rrdTemplates', xml)
+        self.assertIn("id='custom'", xml.replace('"', "'"))
+
+    def test_remove_empty(self):
+        self.assertIsNone(self.filtered([EVENT_CLASS, TEMPLATE]))
+
+
+def test_suite():
+    """Return test suite for this module."""
+    from unittest import TestSuite, makeSuite
+    suite = TestSuite()
+    suite.addTest(makeSuite(TestFilterXML))
+    return suite
+
+
+if __name__ == "__main__":
+    from zope.testrunner.runner import Runner
+    runner = Runner(found_suites=[test_suite()])
+    runner.run()
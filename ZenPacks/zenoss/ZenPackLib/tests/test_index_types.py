@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Numeric, boolean and path index type tests."""
+
+# Zenoss Imports
+import Globals  # noqa
+from Products.ZenUtils.Utils import unused
+unused(Globals)
+
+from Products.ZenTestCase.BaseTestCase import BaseTestCase
+
+# zenpacklib Imports
+from ZenPacks.zenoss.ZenPackLib.lib.functions import (
+    catalog_records, range_query, prefix_query)
+from ZenPacks.zenoss.ZenPackLib.tests.ZPLTestHarness import ZPLTestHarness
+
+
+YAML_DOC = """
+name: ZenPacks.zenoss.IndexTypeTest
+
+class_relationships:
+  - IndexDevice 1:MC Volume
+
+classes:
+  IndexDevice:
+    base: [zenpacklib.Device]
+
+  Volume:
+    base: [zenpacklib.Component]
+    properties:
+      capacity:
+        type: int
+        index_type: numeric
+      thin:
+        type: boolean
+        index_type: boolean
+      mount:
+        index_type: path
+"""
+
+ZP = ZPLTestHarness(YAML_DOC)
+
+
+class TestIndexTypes(BaseTestCase):
+    """Test additional catalog index types and query helpers."""
+
+    def afterSetUp(self):
+        super(TestIndexTypes, self).afterSetUp()
+
+        self.dmd.REQUEST = None
+        self.dmd.Devices.createOrganizer('/IndexTypeTest')
+        self.dmd.Devices.IndexTypeTest._setProperty(
+            'zPythonClass', 'ZenPacks.zenoss.IndexTypeTest.IndexDevice')
+
+        self.CFG = ZP.cfg
+        self.device = self.dmd.Devices.IndexTypeTest.createInstance(
+            'testdevice')
+
+        from ZenPacks.zenoss.IndexTypeTest.Volume import Volume
+        self.Volume = Volume
+
+    def add_volumes(self, count):
+        for i in range(count):
+            volume_id = 'volume{}'.format(i)
+            volume = self.Volume(volume_id)
+            volume.capacity = i
+            volume.thin = bool(i % 2)
+            volume.mount = '/export/{}/vol{}'.format(
+                'even' if i % 2 == 0 else 'odd', i)
+
+            self.device.volumes._setObject(volume_id, volume)
+            self.device.volumes._getOb(volume_id).index_object()
+
+    def search_ids(self, *args, **kwargs):
+        return [
+            x.id for x in catalog_records(
+                self.device, 'Volume', fields=('id',), *args, **kwargs)]
+
+    def test_numeric_range(self):
+        self.add_volumes(10)
+
+        self.assertEquals(
+            ['volume7', 'volume8', 'volume9'],
+            self.search_ids(range_query('capacity', low=7), sort_on='capacity'))
+
+        self.assertEquals(
+            ['volume3', 'volume4'],
+            self.search_ids(
+                range_query('capacity', low=2, high=5, exclusive=True),
+                sort_on='capacity'))
+
+    def test_numeric_sort_limit(self):
+        self.add_volumes(10)
+
+        self.assertEquals(
+            ['volume9', 'volume8'],
+            self.search_ids(
+                sort_on='capacity', sort_order='descending', limit=2))
+
+    def test_boolean(self):
+        self.add_volumes(4)
+        self.assertEquals(
+            ['volume1', 'volume3'],
+            sorted(self.search_ids(thin=True)))
+
+    def test_path_prefix(self):
+        self.add_volumes(4)
+        self.assertEquals(
+            ['volume1', 'volume3'],
+            sorted(self.search_ids(prefix_query('mount', '/export/odd'))))
+
+    def test_range_requires_bound(self):
+        self.assertRaises(ValueError, range_query, 'capacity')
+
+
+def test_suite():
+    """Return test suite for this module."""
+    from unittest import TestSuite, makeSuite
+    suite = TestSuite()
+    suite.addTest(makeSuite(TestIndexTypes))
+    return suite
+
+
+if __name__ == "__main__":
+    from zope.testrunner.runner import Runner
+    runner = Runner(found_suites=[test_suite()])
+    runner.run()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Request-scoped Info property memoization tests."""
+
+import sys
+
+# Zenoss Imports
+import Globals  # noqa
+from Products.ZenUtils.Utils import unused
+unused(Globals)
+
+from zope.globalrequest import setRequest, clearRequest
+from Products.ZenTestCase.BaseTestCase import BaseTestCase
+
+# zenpacklib Imports
+from ZenPacks.zenoss.ZenPackLib.tests.ZPLTestHarness import ZPLTestHarness
+from ZenPacks.zenoss.ZenPackLib.tests.ZPLTestBase import FakeRequest
+
+
+YAML_DOC = """
+name: ZenPacks.zenoss.MemoTest
+
+class_relationships:
+  - MemoDevice 1:MC Pool
+  - MemoDevice 1:MC Disk
+  - Pool 1:M Disk
+
+classes:
+  MemoDevice:
+    base: [zenpacklib.Device]
+
+  Pool:
+    base: [zenpacklib.Component]
+
+  Disk:
+    base: [zenpacklib.Component]
+    properties:
+      computed:
+        api_only: true
+        api_backendtype: method
+"""
+
+ZP = ZPLTestHarness(YAML_DOC)
+
+SPEC_MODULE = 'ZenPacks.zenoss.ZenPackLib.lib.spec.Spec'
+
+
+class TestInfoMemo(BaseTestCase):
+    """Test memoization of generated Info properties."""
+
+    def afterSetUp(self):
+        super(TestInfoMemo, self).afterSetUp()
+
+        self.dmd.REQUEST = None
+        self.dmd.Devices.createOrganizer('/MemoTest')
+        self.dmd.Devices.MemoTest._setProperty(
+            'zPythonClass', 'ZenPacks.zenoss.MemoTest.MemoDevice')
+
+        self.CFG = ZP.cfg
+        self.device = self.dmd.Devices.MemoTest.createInstance('testdevice')
+
+        from ZenPacks.zenoss.MemoTest.Pool import Pool
+        from ZenPacks.zenoss.MemoTest.Disk import Disk
+
+        self.device.pools._setObject('pool1', Pool('pool1'))
+        pool = self.device.pools._getOb('pool1')
+
+        self.calls = []
+        self.disks = []
+        for i in range(3):
+            disk_id = 'disk{}'.format(i)
+            self.device.disks._setObject(disk_id, Disk(disk_id))
+            disk = self.device.disks._getOb(disk_id)
+            disk.pool.addRelation(pool)
+            disk.computed = lambda i=i: self.calls.append(i) or i
+
+            # Modified objects aren't memoized. Treat setup as committed.
+            disk._p_changed = False
+            self.disks.append(disk)
+
+        # Count marshal calls made by generated Info properties.
+        self.spec_module = sys.modules[SPEC_MODULE]
+        self.marshal = self.spec_module.marshal
+        self.marshal_calls = []
+
+        def counting_marshal(*args, **kwargs):
+            self.marshal_calls.append(args)
+            return self.marshal(*args, **kwargs)
+
+        self.spec_module.marshal = counting_marshal
+
+    def beforeTearDown(self):
+        clearRequest()
+        self.spec_module.marshal = self.marshal
+        super(TestInfoMemo, self).beforeTearDown()
+
+    def get_infos(self):
+        info_class = self.CFG.classes['Disk'].info_class
+        return [info_class(x) for x in self.disks]
+
+    def read_infos(self, infos):
+        return [(x.computed, x.pool) for x in infos for i in range(3)]
+
+    def test_identical_results(self):
+        expected = self.read_infos(self.get_infos())
+
+        setRequest(FakeRequest())
+        self.assertEquals(expected, self.read_infos(self.get_infos()))
+
+    def test_method_memoized(self):
+        setRequest(FakeRequest())
+        infos = self.get_infos()
+        self.read_infos(infos)
+        self.read_infos(infos)
+        self.assertEquals([0, 1, 2], self.calls)
+
+    def test_entity_shared(self):
+        setRequest(FakeRequest())
+        self.read_infos(self.get_infos())
+
+        # All three disks link to the same pool.
+        self.assertEquals(1, len(self.marshal_calls))
+
+    def test_setter_invalidates(self):
+        setRequest(FakeRequest())
+        info = self.get_infos()[0]
+        self.assertIsNotNone(info.pool)
+
+        # Only the relationship is modified, not the disk.
+        self.disks[0].set_pool(None)
+        self.disks[0]._p_changed = False
+        self.assertIsNone(info.pool)
+
+    def test_without_request(self):
+        infos = self.get_infos()
+        self.read_infos(infos)
+        self.assertEquals([0, 0, 0, 1, 1, 1, 2, 2, 2], self.calls)
+
+
+def test_suite():
+    """Return test suite for this module."""
+    from unittest import TestSuite, makeSuite
+    suite = TestSuite()
+    suite.addTest(makeSuite(TestInfoMemo))
+    return suite
+
+
+if __name__ == "__main__":
+    from zope.testrunner.runner import Runner
+    runner = Runner(found_suites=[test_suite()])
+    runner.run()
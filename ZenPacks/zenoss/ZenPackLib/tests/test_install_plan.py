@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Install dry-run planner tests."""
+
+import json
+
+# Zenoss Imports
+import Globals  # noqa
+from Products.ZenUtils.Utils import unused
+unused(Globals)
+
+from Products.ZenTestCase.BaseTestCase import BaseTestCase
+
+# zenpacklib Imports
+from ZenPacks.zenoss.ZenPackLib.tests.ZPLTestHarness import ZPLTestHarness
+
+
+YAML_DOC = """
+name: ZenPacks.zenoss.PlanTest
+
+zProperties:
+  zPlanTestInterval:
+    type: int
+    default: 300
+
+device_classes:
+  /PlanTest:
+    templates:
+      Device:
+        datasources:
+          sysUpTime:
+            type: SNMP
+            oid: 1.3.6.1.2.1.25.1.1.0
+            datapoints:
+              sysUpTime: GAUGE
+
+event_classes:
+  /Status/PlanTest:
+    remove: true
+    mappings:
+      PlanMapping:
+        eventClassKey: PlanMapping
+        sequence: 10
+
+process_class_organizers:
+  PlanTest:
+    process_classes:
+      foo:
+        includeRegex: sbin\\/foo
+"""
+
+ZP = ZPLTestHarness(YAML_DOC)
+
+
+class TestInstallPlan(BaseTestCase):
+    """Test ZenPack.plan_install."""
+
+    def afterSetUp(self):
+        super(TestInstallPlan, self).afterSetUp()
+        self.dmd.REQUEST = None
+        self.zenpack = ZP.zp.schema.ZenPack('ZenPacks.zenoss.PlanTest')
+
+    def install(self):
+        dmd = self.dmd
+        self.zenpack.createZProperties(self.app)
+        self.zenpack.create_device_classes(self.app)
+        for dcspec in self.zenpack.device_classes.itervalues():
+            for mtspec in dcspec.templates.itervalues():
+                mtspec.create(dmd)
+
+        for ecspec in self.zenpack.event_classes.itervalues():
+            ecspec.instantiate(dmd)
+
+        for psspec in self.zenpack.process_class_organizers.itervalues():
+            psspec.create(dmd)
+
+    def test_new(self):
+        plan = self.zenpack.plan_install(self.app)
+
+        self.assertEquals('create', plan['zproperties']['zPlanTestInterval'])
+        self.assertEquals('create', plan['device_classes']['/PlanTest'])
+        self.assertEquals('create', plan['templates']['/PlanTest/Device'])
+        self.assertEquals('create', plan['event_classes']['/Status/PlanTest'])
+        self.assertEquals(
+            'create',
+            plan['event_class_mappings']['/Status/PlanTest/PlanMapping'])
+        self.assertEquals('create', plan['process_class_organizers']['PlanTest'])
+        self.assertEquals('create', plan['process_classes']['PlanTest/foo'])
+        self.assertTrue(plan['estimated_seconds']['total'] > 0)
+
+        # Nothing was changed, and the plan is serializable.
+        self.assertIsNone(
+            self.zenpack.device_classes['/PlanTest'].get_organizer(self.dmd))
+        json.dumps(plan)
+
+    def test_installed(self):
+        self.install()
+        plan = self.zenpack.plan_install(self.app)
+
+        self.assertEquals('exists', plan['device_classes']['/PlanTest'])
+        self.assertEquals('unchanged', plan['templates']['/PlanTest/Device'])
+        self.assertEquals(
+            'unchanged',
+            plan['event_class_mappings']['/Status/PlanTest/PlanMapping'])
+        self.assertEquals('unchanged', plan['process_classes']['PlanTest/foo'])
+
+        mapping = self.dmd.Events.Status.PlanTest.instances.PlanMapping
+        mapping.sequence = 20
+        template = self.dmd.Devices.PlanTest.rrdTemplates.Device
+        template.description = 'changed'
+
+        plan = self.zenpack.plan_install(self.app)
+        self.assertEquals(
+            'update',
+            plan['event_class_mappings']['/Status/PlanTest/PlanMapping'])
+        self.assertEquals('reconcile', plan['templates']['/PlanTest/Device'])
+
+        # No prototype was created for comparison.
+        self.assertNotIn(
+            'Device-new', self.dmd.Devices.PlanTest.rrdTemplates.objectIds())
+
+
+def test_suite():
+    """Return test suite for this module."""
+    from unittest import TestSuite, makeSuite
+    suite = TestSuite()
+    suite.addTest(makeSuite(TestInstallPlan))
+    return suite
+
+
+if __name__ == "__main__":
+    from zope.testrunner.runner import Runner
+    runner = Runner(found_suites=[test_suite()])
+    runner.run()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Model statistics tests."""
+
+import pickle
+
+# Zenoss Imports
+import Globals  # noqa
+from Products.ZenUtils.Utils import unused
+unused(Globals)
+
+from Products.ZenTestCase.BaseTestCase import BaseTestCase
+
+# zenpacklib Imports
+from ZenPacks.zenoss.ZenPackLib.lib.modelstats import (
+    Distribution, ModelStats, format_report)
+from ZenPacks.zenoss.ZenPackLib.tests.ZPLTestHarness import ZPLTestHarness
+
+
+YAML_DOC = """
+name: ZenPacks.zenoss.StatsTest
+
+class_relationships:
+  - StatsDevice 1:MC Pool
+  - StatsDevice 1:MC Disk
+  - Pool 1:M Disk
+
+classes:
+  StatsDevice:
+    base: [zenpacklib.Device]
+
+  Pool:
+    base: [zenpacklib.Component]
+
+  Disk:
+    base: [zenpacklib.Component]
+    properties:
+      serial:
+        index_type: field
+        index_scope: both
+"""
+
+ZP = ZPLTestHarness(YAML_DOC)
+
+
+class TestModelStats(BaseTestCase):
+    """Test ModelStats."""
+
+    def afterSetUp(self):
+        super(TestModelStats, self).afterSetUp()
+
+        self.dmd.REQUEST = None
+        self.dmd.Devices.createOrganizer('/StatsTest')
+        self.dmd.Devices.StatsTest._setProperty(
+            'zPythonClass', 'ZenPacks.zenoss.StatsTest.StatsDevice')
+
+        self.CFG = ZP.cfg
+        self.device = self.dmd.Devices.StatsTest.createInstance('testdevice')
+
+        from ZenPacks.zenoss.StatsTest.Disk import Disk
+        from ZenPacks.zenoss.StatsTest.Pool import Pool
+
+        pools = []
+        for i in range(2):
+            pool_id = 'pool{}'.format(i)
+            self.device.pools._setObject(pool_id, Pool(pool_id))
+            pools.append(self.device.pools._getOb(pool_id))
+
+        for i in range(3):
+            disk_id = 'disk{}'.format(i)
+            disk = Disk(disk_id)
+            disk.serial = 'SN{}'.format(i)
+            self.device.disks._setObject(disk_id, disk)
+            disk = self.device.disks._getOb(disk_id)
+            pools[0].disks.addRelation(disk)
+            disk.index_object()
+
+        self.pool = pools[0]
+
+    def test_distribution(self):
+        distribution = Distribution()
+        for i in range(1, 101):
+            distribution.add(i, 'at{}'.format(i))
+
+        summary = distribution.summary()
+        self.assertEquals(100, summary['count'])
+        self.assertEquals(50, summary['p50'])
+        self.assertEquals(90, summary['p90'])
+        self.assertEquals(99, summary['p99'])
+        self.assertEquals(100, summary['max'])
+        self.assertEquals('at100', summary['max_at'])
+
+    def test_add_device(self):
+        stats = ModelStats(self.dmd)
+        stats.add_device(self.device)
+
+        self.assertEquals(1, stats.devices)
+        self.assertEquals(3, stats.classes['Disk'].instances.max)
+        self.assertEquals(2, stats.classes['Pool'].instances.max)
+        self.assertEquals(1, stats.classes['StatsDevice'].instances.max)
+
+        fanout = stats.classes['Pool'].fanout['disks']
+        self.assertEquals(3, fanout.max)
+        self.assertEquals(self.pool.getPrimaryId(), fanout.max_at)
+        self.assertEquals(3, stats.classes['StatsDevice'].fanout['disks'].max)
+
+        # Each disk facets to its pool.
+        self.assertEquals(1, stats.classes['Disk'].facets.max)
+
+        self.assertIn('DiskSearch', stats.device_catalogs)
+        self.assertEquals(3, stats.device_catalogs['DiskSearch'].max)
+        self.assertTrue(stats.classes['Disk'].global_catalogs)
+        for catalog_id in stats.classes['Disk'].global_catalogs:
+            self.assertTrue(stats.global_catalogs[catalog_id] >= 3)
+
+    def test_merge(self):
+        stats = ModelStats(self.dmd)
+        stats.add_device(self.device)
+
+        # Statistics are sent from worker processes pickled.
+        copy = pickle.loads(pickle.dumps(stats))
+        self.assertIsNone(copy.dmd)
+
+        totals = ModelStats()
+        totals.update(copy)
+        totals.update(copy)
+        self.assertEquals(2, totals.devices)
+        self.assertEquals(2, len(totals.classes['Disk'].instances))
+        self.assertEquals(4, len(totals.classes['Pool'].fanout['disks']))
+
+        report = "\n".join(format_report(totals))
+        self.assertIn("Pool.disks", report)
+        self.assertIn(self.pool.getPrimaryId(), report)
+
+
+def test_suite():
+    """Return test suite for this module."""
+    from unittest import TestSuite, makeSuite
+    suite = TestSuite()
+    suite.addTest(makeSuite(TestModelStats))
+    return suite
+
+
+if __name__ == "__main__":
+    from zope.testrunner.runner import Runner
+    runner = Runner(found_suites=[test_suite()])
+    runner.run()
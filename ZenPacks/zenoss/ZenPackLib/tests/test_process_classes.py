@@ -71,6 +71,27 @@ class TestProcessClass(ZPLTestBase):
         self.assertEquals(cfg_process_classes['bar'].fail_severity, 3)
         self.assertEquals(cfg_process_classes['bar'].modeler_lock, 0)
 
+    def test_create(self):
+        porg_spec = self.z.cfg.process_class_organizers['Test']
+        porg_spec.create(self.dmd, addToZenPack=False)
+
+        porg = porg_spec.get_organizer(self.dmd)
+        bar_spec = porg_spec.process_classes['bar']
+        bar = porg.osProcessClasses._getOb('bar')
+        self.assertEquals(3, bar.getProperty('zFailSeverity'))
+        self.assertEquals(({}, {}), bar_spec.get_changes(bar))
+        self.assertEquals('unchanged', bar_spec.plan(porg))
+
+        bar.includeRegex = 'changed'
+        bar.setZenProperty('zFailSeverity', 5)
+        self.assertEquals(
+            ({'includeRegex': bar_spec.includeRegex}, {'zFailSeverity': 3}),
+            bar_spec.get_changes(bar))
+
+        porg_spec.create(self.dmd, addToZenPack=False)
+        self.assertEquals(bar_spec.includeRegex, bar.includeRegex)
+        self.assertEquals(3, bar.getProperty('zFailSeverity'))
+
 
 def test_suite():
     """Return test suite for this module."""
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Process class and event mapping regex analyzer tests."""
+
+# Zenoss Imports
+import Globals  # noqa
+from Products.ZenUtils.Utils import unused
+unused(Globals)
+
+from Products.ZenTestCase.BaseTestCase import BaseTestCase
+
+# zenpacklib Imports
+from ZenPacks.zenoss.ZenPackLib.lib.regexcheck import (
+    RegexAnalyzer, get_patterns, get_risks, get_rule_risks)
+from ZenPacks.zenoss.ZenPackLib.tests.ZPLTestHarness import ZPLTestHarness
+
+
+YAML_DOC = """
+name: ZenPacks.zenoss.RegexTest
+
+process_class_organizers:
+  RegexTest:
+    process_classes:
+      sshd:
+        includeRegex: sshd
+      nested:
+        includeRegex: ^(\\w+\\s?)*$
+
+event_classes:
+  /Status/RegexTest:
+    mappings:
+      LinkDown:
+        regex: Interface (?P<interface>\\S+), changed state to down
+        rule: "evt.severity > 2"
+"""
+
+ZP = ZPLTestHarness(YAML_DOC)
+
+
+class TestRegexAnalyzer(BaseTestCase):
+    """Test regexcheck."""
+
+    def test_risks(self):
+        self.assertEquals(['nested quantifier'], get_risks('(a+)+b'))
+        self.assertEquals(['ambiguous alternation'], get_risks('(a|ab)*c'))
+        self.assertEquals(
+            ['adjacent overlapping quantifiers'], get_risks('.*.*='))
+        self.assertEquals([], get_risks('(x|y)+'))
+        self.assertEquals([], get_risks(r'\b(vim|tail|grep)\b'))
+        self.assertTrue(get_risks('[')[0].startswith('does not compile'))
+        self.assertTrue(
+            get_risks('(?<=a+)b')[0].startswith('does not compile'))
+
+    def test_rule_risks(self):
+        self.assertEquals([], get_rule_risks('evt.severity > 2'))
+        self.assertEquals(1, len(get_rule_risks('evt.severity >')))
+
+    def test_analyze(self):
+        patterns = list(get_patterns(ZP.cfg))
+        self.assertEquals(
+            [('process', 'RegexTest/nested', 'includeRegex'),
+             ('process', 'RegexTest/sshd', 'includeRegex'),
+             ('event', '/Status/RegexTest/LinkDown', 'regex'),
+             ('event', '/Status/RegexTest/LinkDown', 'rule')],
+            [(x.kind, x.name, x.field) for x in patterns])
+
+        results = RegexAnalyzer(
+            event_samples=['Interface Gi0/1, changed state to down', 'other'],
+            repeat=1).analyze(patterns)
+
+        by_name = {(x['name'], x['field']): x for x in results}
+        self.assertEquals(
+            ['nested quantifier'],
+            by_name[('RegexTest/nested', 'includeRegex')]['risks'])
+        self.assertEquals(
+            1, by_name[('/Status/RegexTest/LinkDown', 'regex')]['matches'])
+
+        # Rules aren't timed, so they're ranked last.
+        self.assertEquals('rule', results[-1]['field'])
+        self.assertIsNone(results[-1]['seconds'])
+
+    def test_time_failure(self):
+        result = dict(
+            kind='event', pattern='(?<=a+)b', risks=[], matches=None,
+            seconds=None, seconds_per_match=None, timed_out=False)
+
+        analyzer = RegexAnalyzer(repeat=1)
+        try:
+            analyzer.time(result)
+        finally:
+            analyzer.pool.terminate()
+
+        self.assertTrue(result['risks'][0].startswith('failed'))
+        self.assertIsNone(result['seconds'])
+        self.assertFalse(result['timed_out'])
+
+
+def test_suite():
+    """Return test suite for this module."""
+    from unittest import TestSuite, makeSuite
+    suite = TestSuite()
+    suite.addTest(makeSuite(TestRegexAnalyzer))
+    return suite
+
+
+if __name__ == "__main__":
+    from zope.testrunner.runner import Runner
+    runner = Runner(found_suites=[test_suite()])
+    runner.run()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Maintained relationship counter tests."""
+
+# Zenoss Imports
+import Globals  # noqa
+from Products.ZenUtils.Utils import unused
+unused(Globals)
+
+from Products.ZenTestCase.BaseTestCase import BaseTestCase
+
+# zenpacklib Imports
+from ZenPacks.zenoss.ZenPackLib.tests.ZPLTestHarness import ZPLTestHarness
+
+
+YAML_DOC = """
+name: ZenPacks.zenoss.CountTest
+
+class_relationships:
+  - CountDevice 1:MC Pool
+  - CountDevice 1:MC Disk
+  - Pool 1:M Disk
+
+classes:
+  CountDevice:
+    base: [zenpacklib.Device]
+
+  Pool:
+    base: [zenpacklib.Component]
+
+  Disk:
+    base: [zenpacklib.Component]
+"""
+
+ZP = ZPLTestHarness(YAML_DOC)
+
+
+class TestRelationshipCounts(BaseTestCase):
+    """Test relationship counters maintained by ZPL setters."""
+
+    def afterSetUp(self):
+        super(TestRelationshipCounts, self).afterSetUp()
+
+        self.dmd.REQUEST = None
+        self.dmd.Devices.createOrganizer('/CountTest')
+        self.dmd.Devices.CountTest._setProperty(
+            'zPythonClass', 'ZenPacks.zenoss.CountTest.CountDevice')
+
+        self.CFG = ZP.cfg
+        self.device = self.dmd.Devices.CountTest.createInstance('testdevice')
+
+        from ZenPacks.zenoss.CountTest.Pool import Pool
+        from ZenPacks.zenoss.CountTest.Disk import Disk
+
+        self.device.pools._setObject('pool1', Pool('pool1'))
+        self.pool = self.device.pools._getOb('pool1')
+        self.pool.index_object()
+
+        self.disks = []
+        for i in range(3):
+            disk_id = 'disk{}'.format(i)
+            self.device.disks._setObject(disk_id, Disk(disk_id))
+            disk = self.device.disks._getOb(disk_id)
+            disk.index_object()
+            self.disks.append(disk)
+
+        self.info = self.CFG.classes['Pool'].info_class(self.pool)
+
+    def test_counted_relnames(self):
+        self.assertEquals(['disks'], self.pool.get_counted_relnames())
+        self.assertEquals([], self.disks[0].get_counted_relnames())
+
+    def test_setter_maintains_count(self):
+        self.pool.set_disks(['disk0', 'disk1', 'disk2'])
+        self.assertEquals(3, self.pool.get_relationship_count('disks'))
+        self.assertEquals(3, self.info.disks_count)
+
+        self.pool.set_disks(['disk0'])
+        self.assertEquals(1, self.pool.get_relationship_count('disks'))
+        self.assertEquals(1, self.info.disks_count)
+
+    def test_remote_setter_maintains_count(self):
+        self.pool.set_disks([])
+        self.disks[0].set_pool('pool1')
+        self.disks[1].set_pool('pool1')
+        self.assertEquals(2, self.pool.get_relationship_count('disks'))
+
+        self.disks[0].set_pool(None)
+        self.assertEquals(1, self.pool.get_relationship_count('disks'))
+
+    def test_delete_maintains_count(self):
+        self.pool.set_disks(['disk0', 'disk1', 'disk2'])
+        self.device.disks._delObject('disk2')
+        self.assertEquals(2, self.pool.get_relationship_count('disks'))
+
+    def test_fallback_without_counter(self):
+        self.pool.disks.addRelation(self.disks[0])
+        self.assertIsNone(self.pool.get_relationship_count('disks'))
+        self.assertEquals(1, self.info.disks_count)
+
+    def test_direct_change_not_stale(self):
+        self.pool.set_disks(['disk0', 'disk1'])
+        self.pool.disks.addRelation(self.disks[2])
+
+        # The counter is stale, but the loaded relationship is counted.
+        self.assertEquals(2, self.pool.get_relationship_count('disks'))
+        self.assertEquals(3, self.info.disks_count)
+
+        # Reindexing doesn't touch the counter. Recomputing corrects it.
+        self.pool.index_object()
+        self.assertEquals(2, self.pool.get_relationship_count('disks'))
+        self.assertTrue(self.pool.update_relationship_counts())
+        self.assertEquals(3, self.pool.get_relationship_count('disks'))
+
+    def test_update_relationship_counts(self):
+        self.pool.disks.addRelation(self.disks[0])
+        self.assertEquals({}, self.pool.relationship_counts())
+        self.assertTrue(self.pool.update_relationship_counts())
+        self.assertFalse(self.pool.update_relationship_counts())
+        self.assertEquals({'disks': 1}, self.pool.relationship_counts())
+
+
+def test_suite():
+    """Return test suite for this module."""
+    from unittest import TestSuite, makeSuite
+    suite = TestSuite()
+    suite.addTest(makeSuite(TestRelationshipCounts))
+    return suite
+
+
+if __name__ == "__main__":
+    from zope.testrunner.runner import Runner
+    runner = Runner(found_suites=[test_suite()])
+    runner.run()
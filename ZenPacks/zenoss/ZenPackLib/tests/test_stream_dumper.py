@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+
+##############################################################################
+#
+# Copyright (C) Zenoss, Inc. 2017, all rights reserved.
+#
+# This content is made available according to terms specified in
+# License.zenoss under the directory where your Zenoss product is installed.
+#
+##############################################################################
+
+"""Streaming YAML dump tests."""
+
+import os
+import shutil
+import tempfile
+import weakref
+from StringIO import StringIO
+
+# Zenoss Imports
+import Globals  # noqa
+from Products.ZenUtils.Utils import unused
+unused(Globals)
+
+import yaml
+from Products.ZenTestCase.BaseTestCase import BaseTestCase
+
+# zenpacklib Imports
+from ZenPacks.zenoss.ZenPackLib.lib.benchmark import PeakMemory
+from ZenPacks.zenoss.ZenPackLib.lib.helpers.Dumper import Dumper
+from ZenPacks.zenoss.ZenPackLib.lib.helpers.StreamDumper import (
+    StreamDumper, dump_split)
+from ZenPacks.zenoss.ZenPackLib.lib.helpers.loaders import OrderedLoader
+from ZenPacks.zenoss.ZenPackLib.lib.params.ZenPackSpecParams import (
+    ZenPackSpecParams)
+
+
+ZENPACK_NAME = 'ZenPacks.zenoss.StreamTest'
+
+
+def device_classes(count):
+    """Return device_classes parameter for count device classes."""
+    return {
+        '/StreamTest/Class{}'.format(i): {
+            'templates': {
+                'Device': {
+                    'description': 'Template {}'.format(i),
+                    'datasources': {
+                        'ds{}'.format(j): {
+                            'type': 'SNMP',
+                            'oid': '1.3.6.1.2.1.{}.{}'.format(i, j),
+                            'datapoints': {'ds{}'.format(j): 'GAUGE'},
+                        } for j in range(5)},
+                },
+            },
+        } for i in range(count)}
+
+
+def generate_specs(count, live=None):
+    """Generate (name, DeviceClassSpecParams), creating each as needed."""
+    for name, params in sorted(device_classes(count).iteritems()):
+        zpsp = ZenPackSpecParams(ZENPACK_NAME, device_classes={name: params})
+        spec = zpsp.device_classes[name]
+        if live is not None:
+            live.add(spec)
+        yield name, spec
+
+
+class NullStream(object):
+    """Stream that only counts what's written to it."""
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+
+    def flush(self):
+        pass
+
+
+class TestStreamDumper(BaseTestCase):
+    """Test StreamDumper and dump_split."""
+
+    def test_same_yaml(self):
+        zpsp = ZenPackSpecParams(ZENPACK_NAME, device_classes=device_classes(3))
+        expected = yaml.dump(zpsp, Dumper=Dumper)
+
+        stream = StringIO()
+        with StreamDumper(stream, ZENPACK_NAME, 'device_classes') as dumper:
+            for name, spec in zpsp.device_classes.iteritems():
+                dumper.dump(name, spec)
+
+        self.assertEquals(
+            yaml.load(expected, Loader=OrderedLoader),
+            yaml.load(stream.getvalue(), Loader=OrderedLoader))
+
+    def test_one_spec_in_memory(self):
+        live = weakref.WeakSet()
+        peak = 0
+        stream = NullStream()
+        with StreamDumper(stream, ZENPACK_NAME, 'device_classes') as dumper:
+            for name, spec in generate_specs(50, live):
+                dumper.dump(name, spec)
+                del spec
+                peak = max(peak, len(live))
+
+        self.assertTrue(stream.size > 0)
+        self.assertTrue(peak <= 2, "{} specs in memory".format(peak))
+
+    def test_peak_memory(self):
+        count = 500
+
+        # Memory freed by the first dump can be reused by the second, so
+        # measuring streaming first only understates the difference.
+        with PeakMemory() as streamed:
+            with StreamDumper(NullStream(), ZENPACK_NAME, 'device_classes') as dumper:
+                for name, spec in generate_specs(count):
+                    dumper.dump(name, spec)
+
+        with PeakMemory() as full:
+            zpsp = ZenPackSpecParams(
+                ZENPACK_NAME, device_classes=device_classes(count))
+            NullStream().write(yaml.dump(zpsp, Dumper=Dumper))
+            del zpsp
+
+        self.assertTrue(
+            streamed.kb * 2 < full.kb,
+            "peak grew {} KB streamed, {} KB with yaml.dump".format(
+                streamed.kb, full.kb))
+
+    def test_dump_split(self):
+        directory = tempfile.mkdtemp()
+        try:
+            filenames = dump_split(
+                directory, ZENPACK_NAME, 'device_classes', generate_specs(2))
+
+            self.assertEquals(
+                ['device_classes_StreamTest_Class0.yaml',
+                 'device_classes_StreamTest_Class1.yaml'],
+                sorted(os.path.basename(x) for x in filenames))
+
+            with open(filenames[0]) as stream:
+                data = yaml.load(stream, Loader=OrderedLoader)
+
+            self.assertEquals(ZENPACK_NAME, data['name'])
+            self.assertEquals(
+                ['/StreamTest/Class0'], data['device_classes'].keys())
+        finally:
+            shutil.rmtree(directory)
+
+
+def test_suite():
+    """Return test suite for this module."""
+    from unittest import TestSuite, makeSuite
+    suite = TestSuite()
+    suite.addTest(makeSuite(TestStreamDumper))
+    return suite
+
+
+if __name__ == "__main__":
+    from zope.testrunner.runner import Runner
+    runner = Runner(found_suites=[test_suite()])
+    runner.run()
@@ -12,6 +12,8 @@
 """
     Test accurate detection of template modifications
 """
+from Acquisition import aq_base
+
 from ZenPacks.zenoss.ZenPackLib.tests.ZPLTestBase import ZPLTestBase
 
 
@@ -289,6 +291,65 @@ class TestTemplateModified(ZPLTestBase):
         self.get_result(self.z, self.z)
         self.get_result(self.z, self.z_1, DIFF)
 
+    def test_no_prototype(self):
+        zenpack = self.z.schema.ZenPack(self.dmd)
+        tspec = self.z.cfg.device_classes.get('/Server').templates.get('Device')
+        tspec_param = self.z.cfg.specparams.device_classes.get('/Server').templates.get('Device')
+
+        template = tspec.create(self.dmd, False)
+        template_ids = template.getPrimaryParent().objectIds()
+
+        # Templates are compared with their spec without creating one.
+        def create(*args, **kwargs):
+            raise AssertionError('prototype created')
+
+        tspec.create = create
+        try:
+            self.assertIsNone(
+                zenpack.object_changed(self.dmd, template, tspec, tspec_param))
+
+            template.thresholds._getOb('CPU Utilization').escalateCount = 9
+            self.assertIn(
+                '-    escalateCount: 9',
+                zenpack.object_changed(self.dmd, template, tspec, tspec_param))
+        finally:
+            del tspec.create
+
+        self.assertEquals(template_ids, template.getPrimaryParent().objectIds())
+        self.assertFalse(hasattr(aq_base(template), 'zpl_spec_hash'))
+
+    def test_reconcile(self):
+        orig_tspec = self.z.cfg.device_classes.get('/Server').templates.get('Device')
+        template = orig_tspec.create(self.dmd, False)
+        threshold = aq_base(template.thresholds._getOb('CPU Utilization'))
+        datasource = aq_base(template.datasources._getOb('memBuffer'))
+
+        new_tspec = self.z_1.cfg.device_classes.get('/Server').templates.get('Device')
+        new_tspec_param = self.z_1.cfg.specparams.device_classes.get('/Server').templates.get('Device')
+
+        # One threshold and one graph differ.
+        self.assertEquals(
+            2, new_tspec.reconcile(self.dmd, template, backup_id='Device-preupgrade'))
+
+        zenpack = self.z_1.schema.ZenPack(self.dmd)
+        self.assertIsNone(
+            zenpack.object_changed(self.dmd, template, new_tspec, new_tspec_param))
+
+        # Changed objects are updated in place, and unchanged objects are
+        # preserved.
+        self.assertIs(threshold, aq_base(template.thresholds._getOb('CPU Utilization')))
+        self.assertEquals(7, threshold.escalateCount)
+        self.assertIs(datasource, aq_base(template.datasources._getOb('memBuffer')))
+
+        # Only changed objects are backed up.
+        backup = template.getPrimaryParent()._getOb('Device-preupgrade')
+        self.assertEquals(['CPU Utilization'], backup.thresholds.objectIds())
+        self.assertEquals(5, backup.thresholds._getOb('CPU Utilization').escalateCount)
+        self.assertEquals([], backup.datasources.objectIds())
+        self.assertEquals(['Load Average'], backup.graphDefs.objectIds())
+
+        self.assertEquals(0, new_tspec.reconcile(self.dmd, template))
+
     def get_result(self, orig, new, expected=None):
         # original template spec
         orig_tspec = orig.cfg.device_classes.get('/Server').templates.get('Device')
@@ -9,6 +9,8 @@
 #
 ##############################################################################
 
+import transaction
+
 from ZenPacks.zenoss.ZenPackLib.tests.ZPLTestBase import ZPLTestBase
 
 
@@ -91,6 +93,61 @@ class TestTemplateReplacement(ZPLTestBase):
 
         self._test_replacement(obj, templates)
 
+    def test_device_replacement_read_only(self):
+        templates = self._get_templates()
+        writes = []
+
+        def getRRDTemplateByName(self, name):
+            return templates.get(name)
+
+        def setZenProperty(self, name, value):
+            writes.append((name, value))
+
+        device_class = self.z.zp.TestDevice.TestDevice
+        obj = device_class('test_device_1')
+        self.dmd.Devices.devices._setObject(obj.id, obj)
+        obj = self.dmd.Devices.devices._getOb(obj.id)
+        obj.setZenProperty('zDeviceTemplates', ['TestTemplate'])
+
+        # Store the device so that any later write marks it changed.
+        transaction.savepoint()
+        self.assertIsNotNone(obj._p_jar)
+        self.assertFalse(obj._p_changed)
+
+        # Patch the class, since instance attributes would be writes.
+        device_class.getRRDTemplateByName = getRRDTemplateByName
+        device_class.setZenProperty = setZenProperty
+        try:
+            for i in range(3):
+                self.assertListEqual(
+                    ['TestTemplate-replacement', 'TestTemplate-addition'],
+                    [tpl.titleOrId() for tpl in obj.getRRDTemplates()])
+        finally:
+            del device_class.getRRDTemplateByName
+            del device_class.setZenProperty
+
+        self.assertListEqual([], writes)
+        self.assertListEqual(['TestTemplate'], obj.zDeviceTemplates)
+        self.assertFalse(obj._p_changed)
+
+    def test_device_update_template_bindings(self):
+        templates = self._get_templates()
+
+        def getRRDTemplateByName(name):
+            return templates.get(name)
+
+        obj = self.z.zp.TestDevice.TestDevice('test_device_1')
+        obj.setZenProperty('zDeviceTemplates', ['TestTemplate'])
+        obj.getRRDTemplateByName = getRRDTemplateByName
+
+        self.assertTrue(obj.update_template_bindings())
+        self.assertListEqual(
+            ['TestTemplate', 'TestTemplate-replacement', 'TestTemplate-addition'],
+            obj.zDeviceTemplates)
+
+        # Bindings are already current.
+        self.assertFalse(obj.update_template_bindings())
+
     def test_component_replacement(self):
         templates = self._get_templates()
 
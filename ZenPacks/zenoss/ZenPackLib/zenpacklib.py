@@ -65,7 +65,7 @@ from lib.base.Component import (
 )
 
 from lib.spec import ZenPackSpec
-from lib.functions import relationships_from_yuml, catalog_search, ucfirst, relname_from_classname
+from lib.functions import relationships_from_yuml, catalog_search, catalog_records, load_objects, range_query, prefix_query, ucfirst, relname_from_classname
 
 LOG = logging.getLogger('zen.ZenPackLib')
 